@@ -1,8 +1,10 @@
 from django.contrib import messages
+from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404
 from django.views.generic import UpdateView, DeleteView
 from permission.login import LoginAdmin
 from IMS_production.models import Category, Product, StockMovement, Sale
+from IMS_production.deletion import request_deletion
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import UserPassesTestMixin
 from .forms import ProductForm
@@ -36,10 +38,11 @@ class CategoryDeleteView(LoginAdmin, UserPassesTestMixin, DeleteView):
     def test_func(self):
         return self.request.user.is_admin
     
-    def post(self, request, *args, **kwargs):
-        category = self.get_object()
-        messages.success(self.request, f"Category '{category.name}' was successfully removed.")
-        return super().post(request, *args, **kwargs)
+    def form_valid(self, form):
+        # The products and their history go in chunks in the background (IMS_production.deletion)
+        request_deletion(self.object, self.request.user)
+        messages.success(self.request, f"Category '{self.object.name}' is being removed in the background.")
+        return HttpResponseRedirect(self.get_success_url())
     
 
     
@@ -55,19 +58,9 @@ class ProductUpdateView(LoginAdmin, UserPassesTestMixin, UpdateView):
     login_url = reverse_lazy('login')
     
     def get_object(self, queryset=None):
-        # Fetch the product instance based on SKU
-        sku = self.kwargs.get('sku')
-        return get_object_or_404(Product, sku=sku)
-    
-    def get_form(self, form_class=None):
-        # Fetch the instance based on the SKU from the URL
-        sku = self.kwargs.get('sku')
-        product_instance = get_object_or_404(Product, sku=sku)
-        
-        # Pass the instance to the form
-        form = super().get_form(form_class)
-        form.instance = product_instance
-        return form
+        # Never a cached copy: save() writes every column back,
+        # and a stale copy would undo sales and shard changes made since
+        return get_object_or_404(Product.objects.select_related('category'), sku=self.kwargs.get('sku'))
     
     def form_valid(self, form):
         # Before saving, check if the quantity or price is greater than 0
@@ -82,6 +75,11 @@ class ProductUpdateView(LoginAdmin, UserPassesTestMixin, UpdateView):
         if instance.price <= 0:
             form.add_error('price', 'The price must be greater than 0.')
             return self.form_invalid(form)
+
+        # Sharded stock lives in StockShard rows and the next fold would overwrite the edit
+        if instance.shard_count and 'quantity' in form.changed_data:
+            form.add_error('quantity', 'This product\'s stock is sharded; change it with a stock movement.')
+            return self.form_invalid(form)
         
         messages.success(self.request, f"Product '{instance.name}' is successful updated..!")
         # Proceed if everything is valid
@@ -98,15 +96,13 @@ class ProductDeleteView(LoginAdmin, UserPassesTestMixin, DeleteView):
     login_url = reverse_lazy('login')
     
     def get_object(self, queryset=None):
-        # Fetch the product instance based on SKU
-        sku = self.kwargs.get('sku')
-        return get_object_or_404(Product, sku=sku)
+        return get_object_or_404(Product.objects.select_related('category'), sku=self.kwargs.get('sku'))
     
-    def post(self, request, *args, **kwargs):
-        # Add a success message before deleting the product
-        product = self.get_object()
-        messages.success(self.request, f"Product '{product.name}' was successfully removed.")
-        return super().post(request, *args, **kwargs)
+    def form_valid(self, form):
+        # Its sales and movements go in chunks in the background (IMS_production.deletion)
+        request_deletion(self.object, self.request.user)
+        messages.success(self.request, f"Product '{self.object.name}' is being removed in the background.")
+        return HttpResponseRedirect(self.get_success_url())
     
     def test_func(self):
         return self.request.user.is_admin
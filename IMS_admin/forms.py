@@ -1,5 +1,6 @@
 from django import forms
 from IMS_production.models import Product, Category
+from IMS_production.lookups import category_choices
 from phonenumber_field.formfields import PhoneNumberField
 
 class ProductForm(forms.ModelForm):
@@ -10,9 +11,11 @@ class ProductForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Customize the 'category' field to show options from the Category table
-        category = Category.objects.all()
+        category = Category.objects.filter(pending_deletion=False)
         self.fields['category'].queryset = category
         self.fields['category'].label_from_instance = lambda obj: f"{obj.name}"
+        # Render the options from the cache; the submitted id is still checked against the queryset
+        self.fields['category'].choices = [('', self.fields['category'].empty_label), *category_choices()]
         self.fields['category'].widget.attrs.update({'class': 'form-select'})  # Add Bootstrap styling
 
 
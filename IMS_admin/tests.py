@@ -1,2 +1,275 @@
+import json
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from IMS_production import shards
+from IMS_production.cache import PRODUCTS, invalidate
+from IMS_production.ledger import sell
+from IMS_production.models import Category, DeletionJob, Product, Sale, SalesSummary, StockMovement
+from IMS_production.tasks import cascade_delete
+from .listviews import ProductView
 
 # Create your tests here.
+
+
+class AdminListTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_user("boss", "boss@example.com", role="admin", password="pw")
+        food = Category.objects.create(name="Food", description="")
+        drinks = Category.objects.create(name="Drinks", description="")
+        Product.objects.create(name="Rice", description="", category=food, price=Decimal("10.00"), quantity=5)
+        Product.objects.create(name="Juice", description="", category=drinks, price=Decimal("4.50"), quantity=0)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+
+class ExportTests(AdminListTestCase):
+    def test_csv_export_applies_search_filters(self):
+        response = self.client.get(reverse('admin-product'), {'q': 'rice', 'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,name,sku,category,quantity,price,created_at,updated_at")
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Rice", lines[1])
+
+    def test_ndjson_export_streams_one_object_per_line(self):
+        response = self.client.get(reverse('admin-product'), {'format': 'ndjson'})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual({row['name'] for row in rows}, {"Rice", "Juice"})
+        self.assertEqual({row['category'] for row in rows}, {"Food", "Drinks"})
+
+
+class ProductUpdateTests(AdminListTestCase):
+    def test_update_saves_over_the_current_row(self):
+        rice = Product.objects.get(name="Rice")
+        shards.enable(rice, 2)                  # a queryset update the form's data knows nothing of
+        response = self.client.post(reverse('update-product', args=[rice.sku]), {
+            'category': rice.category_id, 'name': "Rice", 'price': "12.00", 'quantity': 5,
+        })
+        self.assertEqual(response.status_code, 302)
+        rice.refresh_from_db()
+        self.assertEqual((rice.price, rice.shard_count), (Decimal("12.00"), 2))
+
+
+    def test_stock_of_a_sharded_product_is_not_edited_in_the_form(self):
+        rice = Product.objects.get(name="Rice")
+        shards.enable(rice, 2)
+        response = self.client.post(reverse('update-product', args=[rice.sku]), {
+            'category': rice.category_id, 'name': "Rice", 'price': "10.00", 'quantity': 50,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('quantity', response.context['form'].errors)
+        shards.fold_all()
+        self.assertEqual(Product.objects.get(pk=rice.pk).quantity, 5)
+
+class KeysetPaginationTests(AdminListTestCase):
+    def test_cursors_walk_every_page_and_back(self):
+        food = Category.objects.get(name="Food")
+        for i in range(5):
+            Product.objects.create(name=f"Bean {i}", description="", category=food, price=Decimal("1.00"), quantity=1)
+
+        patcher = patch.object(ProductView, 'keyset_page_size', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        seen, pages, params = [], [], {}
+        while True:
+            response = self.client.get(reverse('admin-product'), params)
+            keyset = response.context['keyset']
+            pages.append([p.pk for p in response.context['products']])
+            seen.extend(pages[-1])
+            if not keyset['has_next']:
+                break
+            params = {'after': keyset['next_cursor']}
+
+        expected = list(Product.objects.order_by('-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+        response = self.client.get(reverse('admin-product'), {'before': keyset['previous_cursor']})
+        self.assertEqual([p.pk for p in response.context['products']], pages[1])
+        self.assertTrue(response.context['keyset']['has_previous'])
+
+    def test_rows_edited_while_paging_are_neither_skipped_nor_repeated(self):
+        food = Category.objects.get(name="Food")
+        for i in range(5):
+            Product.objects.create(name=f"Bean {i}", description="", category=food, price=Decimal("1.00"), quantity=1)
+        patcher = patch.object(ProductView, 'keyset_page_size', 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        first = self.client.get(reverse('admin-product'))
+        # A sale on a row not shown yet bumps its auto_now timestamp
+        last = Product.objects.order_by('id').first()
+        sell(last, 1, Decimal("1.00"))
+
+        seen = [p.pk for p in first.context['products']]
+        params = {'after': first.context['keyset']['next_cursor']}
+        while True:
+            response = self.client.get(reverse('admin-product'), params)
+            seen.extend(p.pk for p in response.context['products'])
+            if not response.context['keyset']['has_next']:
+                break
+            params = {'after': response.context['keyset']['next_cursor']}
+        self.assertEqual(sorted(seen), sorted(Product.objects.values_list('pk', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_malformed_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse('admin-product'), {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['products']), 2)
+        self.assertFalse(response.context['keyset']['has_previous'])
+
+
+class SearchSyntaxViewTests(AdminListTestCase):
+    def test_typed_terms_filter_the_list(self):
+        response = self.client.get(reverse('admin-product'), {'q': 'qty>0'})
+        self.assertEqual([p.name for p in response.context['products']], ["Rice"])
+
+    def test_invalid_term_shows_message_and_empty_list(self):
+        response = self.client.get(reverse('admin-stock-movement'), {'q': 'qty>lots'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['movements']), 0)
+        self.assertIn("needs a number", str(list(response.context['messages'])[0]))
+
+
+class PageCacheTests(AdminListTestCase):
+    def test_list_rows_are_cached_until_a_write(self):
+        url = reverse('admin-product')
+        self.client.get(url, {'q': 'rice'})
+        # A queryset update sends no signal, so the cached page still shows the old name
+        Product.objects.filter(name="Rice").update(name="Rice (old)")
+        response = self.client.get(url, {'q': 'rice'})
+        self.assertEqual([p.name for p in response.context['products']], ["Rice"])
+
+        product = Product.objects.get(name="Rice (old)")
+        product.name = "Brown Rice"
+        product.save()
+        response = self.client.get(url, {'q': 'rice'})
+        self.assertEqual([p.name for p in response.context['products']], ["Brown Rice"])
+
+    def test_cache_key_depends_on_role_and_query(self):
+        view = ProductView()
+        view.request = RequestFactory().get(reverse('admin-product'), {'q': 'rice'})
+        view.request.user = self.admin
+        admin_key = view.get_page_cache_key()
+        view.request.user = get_user_model()(username="clerk", role="staff")
+        self.assertNotEqual(view.get_page_cache_key(), admin_key)
+        view.request.user = self.admin
+        view.request.GET = view.request.GET.copy()
+        view.request.GET['q'] = 'juice'
+        self.assertNotEqual(view.get_page_cache_key(), admin_key)
+
+
+class ConditionalGetTests(AdminListTestCase):
+    def test_unchanged_list_answers_304(self):
+        url = reverse('admin-product')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        product = Product.objects.get(name="Rice")
+        product.quantity = 9
+        product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_repeat_requests_do_not_aggregate_again(self):
+        url = reverse('admin-product')
+        etag = self.client.get(url)['ETag']
+        with patch('IMS_production.mixins.queryset_validators') as validators:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(url, {'after': 'x'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        validators.assert_not_called()
+
+        # A write bumps the namespace, so the next request aggregates again
+        Product.objects.filter(name="Rice").update(quantity=9)
+        invalidate(PRODUCTS)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_filters_and_users_get_their_own_etag(self):
+        url = reverse('admin-product')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'q': 'rice'})['ETag'], etag)
+
+        other = get_user_model().objects.create_user("boss2", "boss2@example.com", role="admin", password="pw")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class FragmentCacheTests(AdminListTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_rows_and_table_are_reused_until_they_change(self):
+        url = reverse('admin-product')
+        self.assertEqual(self.client.get(url)['X-Fragment-Cache'], "row=0/2; table=0/1")
+        response = self.client.get(url)
+        self.assertEqual(response['X-Fragment-Cache'], "table=1/1")
+        self.assertContains(response, "Juice")
+
+        product = Product.objects.get(name="Rice")
+        product.name = "Brown Rice"
+        product.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Fragment-Cache'], "row=1/2; table=0/1")
+        self.assertContains(response, "Brown Rice")
+
+
+class BackgroundDeletionTests(AdminListTestCase):
+    def test_category_is_marked_then_deleted_in_chunks(self):
+        food = Category.objects.get(name="Food")
+        rice = Product.objects.get(name="Rice")
+        for _ in range(3):
+            Sale.objects.create(product=rice, quantity=1, sale_price=Decimal("10.00"), total_revenue=Decimal("10.00"))
+            StockMovement.objects.create(product=rice, movement_type="Addition", quantity=2, reason="restock")
+
+        with patch('IMS_production.tasks.cascade_delete.delay') as delay, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin-delete-category', kwargs={'pk': food.pk}))
+        self.assertRedirects(response, reverse('admin-category'), fetch_redirect_response=False)
+        job = DeletionJob.objects.get(target='category', object_id=food.pk)
+        delay.assert_called_once_with(job.pk)
+
+        # Marked, hidden from the pickers, shown with a progress badge
+        self.assertTrue(Category.objects.get(pk=food.pk).pending_deletion)
+        self.assertContains(self.client.get(reverse('admin-category')), 'data-deletion-url')
+        self.assertEqual(self.client.get(reverse('autocomplete-products'), {'q': 'ri'}).json()['results'], [])
+
+        rows = 3 + 3 + SalesSummary.objects.filter(product=rice).count() + 1 + 1
+        with patch('IMS_production.deletion.DELETION_CHUNK_SIZE', 2):
+            self.assertEqual(cascade_delete(job.pk), {"status": "done", "deleted": rows})
+
+        self.assertFalse(Category.objects.filter(pk=food.pk).exists())
+        self.assertFalse(Product.objects.filter(pk=rice.pk).exists())
+        self.assertFalse(Sale.objects.exists() or StockMovement.objects.exists() or SalesSummary.objects.exists())
+        self.assertTrue(Product.objects.filter(name="Juice").exists())
+
+        status = self.client.get(reverse('deletion-status', kwargs={'target': 'category', 'pk': food.pk})).json()
+        self.assertEqual((status['status'], status['progress'], status['deleted']), ("done", 100, status['total']))
+
+    def test_rows_being_deleted_leave_the_lists_and_exports(self):
+        food = Category.objects.get(name="Food")
+        rice = Product.objects.get(name="Rice")
+        sell(rice, 1, Decimal("10.00"))
+        StockMovement.objects.create(product=rice, movement_type="Addition", quantity=2, reason="restock")
+        self.client.post(reverse('admin-delete-category', kwargs={'pk': food.pk}))
+
+        self.assertEqual([p.name for p in self.client.get(reverse('admin-product')).context['products']], ["Juice"])
+        self.assertEqual(len(self.client.get(reverse('admin-sales')).context['sales']), 0)
+        self.assertEqual(len(self.client.get(reverse('admin-stock-movement')).context['movements']), 0)
+        response = self.client.get(reverse('admin-product'), {'format': 'csv'})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn("Juice", lines[1])
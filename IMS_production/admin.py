@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product, StockMovement, Sale, SalesSummary
+from .models import Category, Product, StockMovement, Sale, SalesSummary, StockSnapshot
 
 
 # Define a custom AdminSite for enhanced customizations
@@ -43,9 +43,16 @@ class SaleAdmin(admin.ModelAdmin):
 
 @admin.register(SalesSummary)
 class SalesSummaryAdmin(admin.ModelAdmin):
-    list_display = ('product', 'total_sold', 'total_revenue', 'report_date')
+    list_display = ('product', 'period', 'period_start', 'total_sold', 'total_revenue', 'report_date')
     search_fields = ('product__name',)
-    list_filter = ('report_date',)
+    list_filter = ('period', 'report_date')
     readonly_fields = ('report_date',)
 
 
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('product', 'date', 'quantity', 'price')
+    search_fields = ('product__name',)
+    list_filter = ('date',)
@@ -0,0 +1,127 @@
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q, Sum
+from django.utils import timezone
+from .models import Product, Sale, StockMovement
+
+# Moving-average windows, in days
+VELOCITY_SHORT_WINDOW = getattr(settings, "VELOCITY_SHORT_WINDOW", 7)
+VELOCITY_LONG_WINDOW = getattr(settings, "VELOCITY_LONG_WINDOW", 28)
+# Days of demand a reorder must cover: supplier lead time plus a safety margin
+REORDER_LEAD_TIME_DAYS = getattr(settings, "REORDER_LEAD_TIME_DAYS", 7)
+REORDER_SAFETY_DAYS = getattr(settings, "REORDER_SAFETY_DAYS", 3)
+# Products listed in a digest before it is summarised as "... and N more"
+STOCK_ALERT_DIGEST_LINES = getattr(settings, "STOCK_ALERT_DIGEST_LINES", 20)
+
+
+#---------------------------------------------<> Velocity <>---------------------------------------------#
+
+def _midnight(day):
+    moment = datetime.combine(day, time.min)
+    return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+
+def _outflow_by_product(today, short, long):
+    """
+    ``{product_id: [short_units, long_units]}`` leaving stock in each window.
+
+    Two grouped aggregates (sales, and subtraction movements such as damage or
+    shrinkage) over the long window only; products without outflow never
+    appear, so the cost follows activity rather than catalog size.
+    """
+    short_start = today - timedelta(days=short - 1)
+    long_start = today - timedelta(days=long - 1)
+    outflow = {}
+
+    sales = (
+        Sale.objects.filter(sale_date__gte=long_start, sale_date__lte=today)
+        .values('product_id')
+        .annotate(short=Sum('quantity', filter=Q(sale_date__gte=short_start)), long=Sum('quantity'))
+        .values_list('product_id', 'short', 'long')
+    )
+    movements = (
+        StockMovement.objects.filter(movement_type='Subtraction', created_at__gte=_midnight(long_start))
+        .values('product_id')
+        .annotate(short=Sum('quantity', filter=Q(created_at__gte=_midnight(short_start))), long=Sum('quantity'))
+        .values_list('product_id', 'short', 'long')
+    )
+    for rows in (sales, movements):
+        for product_id, short_units, long_units in rows.iterator(chunk_size=5000):
+            totals = outflow.setdefault(product_id, [0, 0])
+            totals[0] += short_units or 0
+            totals[1] += long_units or 0
+    return outflow
+
+
+def stock_velocity(today=None, short=VELOCITY_SHORT_WINDOW, long=VELOCITY_LONG_WINDOW,
+                   lead_time=REORDER_LEAD_TIME_DAYS, safety=REORDER_SAFETY_DAYS):
+    """
+    Yield one dict per product with its velocity, reorder point and days of cover.
+
+    Velocity (units/day) is the higher of the short and long moving averages, so
+    a surge raises reorder points at once while a quiet week does not drop them.
+    The catalog is streamed, making a run linear in the number of products.
+    """
+    today = today or timezone.localdate()
+    outflow = _outflow_by_product(today, short, long)
+
+    products = Product.objects.order_by().values_list('pk', 'name', 'sku', 'quantity')
+    for pk, name, sku, quantity in products.iterator(chunk_size=5000):
+        short_units, long_units = outflow.get(pk, (0, 0))
+        velocity = max(short_units / short, long_units / long)
+        yield {
+            'id': pk,
+            'name': name,
+            'sku': sku,
+            'quantity': quantity,
+            'velocity': velocity,
+            'reorder_point': velocity * (lead_time + safety),
+            'days_of_cover': quantity / velocity if velocity else None,
+        }
+
+
+def reorder_alerts(**kwargs):
+    """Products out of stock or at/below their reorder point, least cover first."""
+    alerts = [
+        row for row in stock_velocity(**kwargs)
+        if row['quantity'] <= 0 or (row['velocity'] and row['quantity'] <= row['reorder_point'])
+    ]
+    alerts.sort(key=lambda row: (row['days_of_cover'] or 0, row['name']))
+    return alerts
+
+
+#---------------------------------------------<> Digest <>---------------------------------------------#
+
+def format_digest(alerts, limit=STOCK_ALERT_DIGEST_LINES):
+    lines = [f"Stock alert: {len(alerts)} product(s) need reordering."]
+    for row in alerts[:limit]:
+        if row['quantity'] <= 0:
+            status = "out of stock"
+        else:
+            status = f"{row['quantity']} left, {row['days_of_cover']:.1f} days cover"
+        lines.append(f"- {row['name']} ({row['sku']}): {status}, reorder at {row['reorder_point']:.0f}")
+    if len(alerts) > limit:
+        lines.append(f"... and {len(alerts) - limit} more.")
+    return "\n".join(lines)
+
+
+def alert_recipients():
+    """``STOCK_ALERT_RECIPIENTS`` if set, else the phone numbers of active admins."""
+    configured = getattr(settings, "STOCK_ALERT_RECIPIENTS", None)
+    if configured:
+        return list(configured)
+    numbers = (
+        get_user_model().objects.filter(role='admin', is_active=True)
+        .exclude(phone_number__isnull=True).exclude(phone_number='')
+        .values_list('phone_number', flat=True)
+    )
+    return [str(number) for number in numbers]
+
+
+__all__ = (
+    "alert_recipients",
+    "format_digest",
+    "reorder_alerts",
+    "stock_velocity",
+)
@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from .cache import cached
+from .models import Category, Product
+
+ANALYTICS = 'analytics'
+LOW_STOCK_THRESHOLD = getattr(settings, "LOW_STOCK_THRESHOLD", 10)
+
+STOCK_VALUE = F('quantity') * F('price')
+MONEY = DecimalField(max_digits=30, decimal_places=2)
+
+
+#---------------------------------------------<> Aggregates <>---------------------------------------------#
+
+def stock_by_category():
+    rows = (
+        Category.objects
+        .annotate(
+            product_count=Count('products'),
+            stock=Coalesce(Sum('products__quantity'), 0),
+            value=Coalesce(Sum(F('products__quantity') * F('products__price'), output_field=MONEY), Value(0), output_field=MONEY),
+        )
+        .order_by('-stock', 'name')
+        .values('id', 'name', 'product_count', 'stock', 'value')
+    )
+    return [{**row, 'value': float(row['value'])} for row in rows]
+
+
+def top_products(limit):
+    return list(
+        Product.objects.order_by('-quantity', 'pk')
+        .values('name', 'sku', 'quantity', category_name=F('category__name'))[:limit]
+    )
+
+
+def low_stock_products(limit, threshold=LOW_STOCK_THRESHOLD):
+    return list(
+        Product.objects.filter(quantity__lte=threshold).order_by('quantity', 'pk')
+        .values('name', 'sku', 'quantity', category_name=F('category__name'))[:limit]
+    )
+
+
+def stock_levels(threshold=LOW_STOCK_THRESHOLD):
+    """Product counts per stock bucket plus catalog totals, in one aggregate query."""
+    totals = Product.objects.aggregate(
+        out_of_stock=Count('pk', filter=Q(quantity__lte=0)),
+        low_stock=Count('pk', filter=Q(quantity__gt=0, quantity__lte=threshold)),
+        in_stock=Count('pk', filter=Q(quantity__gt=threshold)),
+        units=Coalesce(Sum('quantity'), 0),
+        value=Coalesce(Sum(STOCK_VALUE, output_field=MONEY), Value(0), output_field=MONEY),
+    )
+    totals['value'] = float(totals['value'])
+    totals['threshold'] = threshold
+    return totals
+
+
+def stock_analytics(top=10):
+    """
+    Everything the analytics page charts, computed with a fixed number of
+    aggregate queries whatever the catalog size.
+    """
+    return {
+        'levels': stock_levels(),
+        'categories': stock_by_category(),
+        'top_products': top_products(top),
+        'low_stock': low_stock_products(top),
+    }
+
+
+def cached_stock_analytics(top=10):
+    # Invalidated by the Product/Category signals and by the stock ledger
+    return cached(ANALYTICS, f'stock:{top}', lambda: stock_analytics(top))
+
+
+__all__ = (
+    "ANALYTICS",
+    "cached_stock_analytics",
+    "stock_analytics",
+)
@@ -6,4 +6,4 @@ class ImsProductionConfig(AppConfig):
     
     def ready(self):
         # Correctly import signals
-        pass
+        from . import signals  # noqa: F401
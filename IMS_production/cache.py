@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ANALYTICS_CACHE_TIMEOUT = getattr(settings, "ANALYTICS_CACHE_TIMEOUT", 300)
+
+# One namespace per entity; the signals in signals.py bump it on every write
+CATEGORIES = 'categories'
+PRODUCTS = 'products'
+SALES = 'sales'                     # sales and their summaries
+STOCK_MOVEMENTS = 'stock-movements'
+
+_suspended = ContextVar('ims_invalidation_suspended', default=False)
+
+
+#---------------------------------------------<> Versioned keys <>---------------------------------------------#
+
+def _version_key(namespace):
+    return f"ims:{namespace}:version"
+
+
+def version(namespace):
+    """Current generation of ``namespace``; keys built from an older one are never read again."""
+    return cache.get_or_set(_version_key(namespace), 1, timeout=None)
+
+
+def bump(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # The counter expired or was evicted: any fresh value is newer than what readers hold
+        cache.set(_version_key(namespace), 2, timeout=None)
+
+
+def invalidate(*namespaces):
+    """
+    Drop everything cached under ``namespaces``.
+
+    Inside a transaction the versions are bumped again on commit, so a reader
+    that recomputed from pre-commit data in between does not keep serving it.
+    Does nothing inside :func:`suspend_invalidation`.
+    """
+    if _suspended.get():
+        return
+    for namespace in namespaces:
+        bump(namespace)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: [bump(namespace) for namespace in namespaces])
+
+
+@contextmanager
+def suspend_invalidation():
+    """
+    Skip :func:`invalidate` (and so the write signals) inside the block; the
+    caller invalidates what it wrote afterwards, or measures without it.
+    """
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def cache_key(namespace, key):
+    """
+    Versioned key for ``key``; ``namespace`` may be a tuple when the value is
+    built from several entities, and then goes stale when any of them changes.
+    """
+    namespaces = namespace if isinstance(namespace, tuple) else (namespace,)
+    versions = '.'.join(str(version(name)) for name in namespaces)
+    return f"ims:{'+'.join(namespaces)}:{versions}:{key}"
+
+
+def cached(namespace, key, compute, timeout=ANALYTICS_CACHE_TIMEOUT):
+    """Return ``compute()`` cached under ``namespace``/``key`` until the namespace is invalidated."""
+    full_key = cache_key(namespace, key)
+    value = cache.get(full_key)
+    if value is None:
+        value = compute()
+        cache.set(full_key, value, timeout)
+    return value
+
+
+__all__ = (
+    "CATEGORIES",
+    "PRODUCTS",
+    "SALES",
+    "STOCK_MOVEMENTS",
+    "cache_key",
+    "cached",
+    "invalidate",
+    "suspend_invalidation",
+    "version",
+)
@@ -0,0 +1,435 @@
+import gzip
+import json
+import struct
+import sys
+from array import array
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from .analytics import ANALYTICS
+from .cache import PRODUCTS, SALES, STOCK_MOVEMENTS, invalidate
+from .deletion import delete_rows
+from .models import ArchivedPeriod, Sale, StockMovement
+from .partitions import PARTITION_KEYS, add_months, detach_partition, is_partitioned, month_of, partition_name, partitions
+
+# Sales and stock movements older than COLD_ARCHIVE_AFTER_MONTHS are only
+# read by reports, yet they make up most of both tables and their indexes.
+# Each such month (cut on the partition key: Sale.sale_date,
+# StockMovement.created_at, see IMS_production.partitions) is written to one
+# gzipped column file in default storage, read back and checked against the
+# live rows (row count and column sums), recorded as an ArchivedPeriod and
+# deleted: a month with its own partition is detached and dropped, otherwise
+# its rows are deleted without signals. Sales summaries keep their totals,
+# and rebuild_sales_summary reads the archived months back when it recomputes them.
+#
+# The readers put archived rows back where old data is asked for:
+# snapshots.net_change (stock at a past date) and the Sale / StockMovement
+# list exports, filtered by the same search syntax as the live rows. Each
+# period records the first and last value of its date columns, so a range
+# that doesn't reach archived months opens no file.
+#
+# File layout, after gunzip: MAGIC, a 4-byte big-endian header length, a JSON
+# header (row count, byte order, and per column its name, kind, array
+# typecode and byte size), then each column as the raw bytes of an
+# array.array. Integers, dates (ordinal), datetimes (microseconds since the
+# epoch, UTC) and decimals (scaled to integers) are 'q' arrays; text is
+# dictionary encoded as 'I' codes with the distinct values in the header.
+
+COLD_ARCHIVE_AFTER_MONTHS = getattr(settings, "COLD_ARCHIVE_AFTER_MONTHS", 24)
+COLD_ARCHIVE_DIR = getattr(settings, "COLD_ARCHIVE_DIR", "archive/cold")
+
+MAGIC = b'IMSCOL1\n'
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# (column, kind) written for each row
+COLUMNS = {
+    Sale: (
+        ('id', 'int'), ('product_id', 'int'), ('quantity', 'int'), ('sale_price', 'decimal'),
+        ('total_amount', 'int'), ('total_revenue', 'decimal'), ('sale_date', 'date'), ('created_at', 'datetime'),
+    ),
+    StockMovement: (
+        ('id', 'int'), ('product_id', 'int'), ('movement_type', 'text'), ('quantity', 'int'),
+        ('reason', 'text'), ('created_at', 'datetime'),
+    ),
+}
+
+# Summed on both sides to check a file against the rows it replaces
+TOTALS = {
+    Sale: ('quantity', 'total_revenue'),
+    StockMovement: ('quantity',),
+}
+
+NAMESPACES = {Sale: SALES, StockMovement: STOCK_MOVEMENTS}
+
+
+class ArchiveError(ValueError):
+    """An archive file that can't be read, or doesn't match the rows it was made from."""
+
+
+#---------------------------------------------<> Column files <>---------------------------------------------#
+
+def _encoder(kind, scale):
+    """The integer stored for one value of a non-text column."""
+    if kind == 'decimal':
+        return lambda value: int(value.scaleb(scale))
+    if kind == 'date':
+        return date.toordinal
+    if kind == 'datetime':
+        return lambda value: (value - EPOCH) // timedelta(microseconds=1)
+    return int
+
+
+def _decode(kind, values, column):
+    if kind == 'text':
+        dictionary = column['dictionary']
+        return [dictionary[code] for code in values]
+    if kind == 'decimal':
+        return [Decimal(value).scaleb(-column['scale']) for value in values]
+    if kind == 'date':
+        return [date.fromordinal(value) for value in values]
+    if kind == 'datetime':
+        return [EPOCH + timedelta(microseconds=value) for value in values]
+    return values.tolist()
+
+
+class _ColumnBuffer:
+    """``model``'s rows as one array per column, filled a chunk of rows at a time."""
+
+    def __init__(self, model):
+        self.columns = []
+        for name, kind in COLUMNS[model]:
+            scale = model._meta.get_field(name).decimal_places if kind == 'decimal' else 0
+            dictionary = {} if kind == 'text' else None
+            self.columns.append((name, kind, scale, dictionary, array('I' if kind == 'text' else 'q')))
+
+    def __len__(self):
+        return len(self.columns[0][4])
+
+    def extend(self, rows):
+        """Append ``rows``, a list of tuples in COLUMNS[model] order."""
+        for position, (_, kind, scale, dictionary, values) in enumerate(self.columns):
+            column = (row[position] for row in rows)
+            if dictionary is not None:
+                values.extend(dictionary.setdefault(value, len(dictionary)) for value in column)
+            else:
+                values.extend(map(_encoder(kind, scale), column))
+
+    def values(self, name):
+        return next(values for column, *_, values in self.columns if column == name)
+
+    def bounds(self):
+        """First and last value of each date and datetime column, as ISO strings."""
+        return {
+            name: [value.isoformat() for value in _decode(kind, array('q', (min(values), max(values))), {})]
+            for name, kind, _, _, values in self.columns if kind in ('date', 'datetime')
+        }
+
+    def payload(self):
+        """The bytes of the column file."""
+        header = {'rows': len(self), 'byteorder': sys.byteorder, 'columns': []}
+        body = []
+        for name, kind, scale, dictionary, values in self.columns:
+            raw = values.tobytes()
+            extras = {'dictionary': list(dictionary)} if kind == 'text' else {'scale': scale} if kind == 'decimal' else {}
+            header['columns'].append({'name': name, 'kind': kind, 'typecode': values.typecode, 'size': len(raw), **extras})
+            body.append(raw)
+        head = json.dumps(header).encode()
+        return gzip.compress(MAGIC + struct.pack('>I', len(head)) + head + b''.join(body), mtime=0)
+
+
+def encode_table(model, data):
+    """``data`` (``{column: [values]}`` for every column of COLUMNS[model]) as the bytes of a column file."""
+    buffer = _ColumnBuffer(model)
+    buffer.extend(list(zip(*(data[name] for name, _ in COLUMNS[model]))))
+    return buffer.payload()
+
+
+def decode_table(payload, columns=None):
+    """``(rows, {column: [values]})`` from a column file, only for ``columns`` if given."""
+    raw = gzip.decompress(payload)
+    if not raw.startswith(MAGIC):
+        raise ArchiveError("Not a column archive")
+    offset = len(MAGIC)
+    (length,) = struct.unpack_from('>I', raw, offset)
+    header = json.loads(raw[offset + 4:offset + 4 + length])
+    offset += 4 + length
+
+    data = {}
+    for column in header['columns']:
+        size = column['size']
+        if columns is None or column['name'] in columns:
+            values = array(column['typecode'])
+            values.frombytes(raw[offset:offset + size])
+            if header['byteorder'] != sys.byteorder:
+                values.byteswap()
+            if len(values) != header['rows']:
+                raise ArchiveError(f"Column {column['name']} holds {len(values)} values, expected {header['rows']}")
+            data[column['name']] = _decode(column['kind'], values, column)
+        offset += size
+    return header['rows'], data
+
+
+#---------------------------------------------<> Archiving <>---------------------------------------------#
+
+def _source(model):
+    return model._meta.model_name
+
+
+def _month_range(model, month):
+    """First and following month as values of ``model``'s partition key (midnight UTC for timestamps)."""
+    following = add_months(month, 1)
+    if model._meta.get_field(PARTITION_KEYS[model]).get_internal_type() == 'DateTimeField':
+        return tuple(datetime(m.year, m.month, 1, tzinfo=dt_timezone.utc) for m in (month, following))
+    return month, following
+
+
+def month_rows(model, month):
+    key = PARTITION_KEYS[model]
+    start, end = _month_range(model, month)
+    return model.objects.filter(**{f'{key}__gte': start, f'{key}__lt': end})
+
+
+def _totals(model, queryset):
+    sums = queryset.order_by().aggregate(count=Count('pk'), **{column: Sum(column) for column in TOTALS[model]})
+    return {name: str(value or 0) for name, value in sums.items()}
+
+
+def _file_totals(model, data):
+    totals = {'count': str(len(data['id']))}
+    for column in TOTALS[model]:
+        totals[column] = str(sum(data[column]))
+    return totals
+
+
+def _check(expected, actual, what):
+    mismatched = [name for name in expected if Decimal(expected[name]) != Decimal(actual.get(name, 0))]
+    if mismatched:
+        raise ArchiveError(f"{what} doesn't match the live rows: {', '.join(mismatched)} differ")
+
+
+def _drop_rows(model, month, ids, chunk_size):
+    """Delete the archived rows: detach and drop the month's partition when it holds exactly them."""
+    name = partition_name(model, month)
+    if is_partitioned(model) and name in {row[0] for row in partitions(model)}:
+        if month_rows(model, month).count() == len(ids):
+            detached = detach_partition(model, month)
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(detached)}")
+            return
+    # By id, without signals: a sale's post_delete would take it out of the summaries, which keep it
+    for start in range(0, len(ids), chunk_size):
+        delete_rows(model, ids[start:start + chunk_size])
+
+
+def archive_period(model, month, chunk_size=5000):
+    """
+    Move ``model``'s rows for ``month`` (a past month) to a column file and delete them.
+
+    Returns the ArchivedPeriod, or None if the month has no rows. The rows
+    are read ``chunk_size`` at a time, locked, into compact column arrays;
+    the file is read back and compared with their count and sums, and they
+    are deleted by id, all in one transaction, so an edit can't slip in
+    between the export and the delete.
+    """
+    month = month_of(month)
+    if month >= month_of(timezone.localdate()):
+        raise ArchiveError("Only past months can be archived")
+    if ArchivedPeriod.objects.filter(source=_source(model), month=month).exists():
+        raise ArchiveError(f"{model._meta.db_table} {month:%Y-%m} is already archived")
+
+    names = [name for name, _ in COLUMNS[model]]
+    buffer = _ColumnBuffer(model)
+    name = None
+    try:
+        with transaction.atomic():
+            rows = month_rows(model, month).select_for_update().order_by('pk').values_list(*names)
+            rows = rows.iterator(chunk_size=chunk_size)
+            while chunk := list(islice(rows, chunk_size)):
+                buffer.extend(chunk)
+            if not len(buffer):
+                return None
+
+            ids = buffer.values('id')
+            # Rows written to the month after the read have a higher id and stay live
+            totals = _totals(model, month_rows(model, month).filter(pk__lte=ids[-1]))
+            payload = buffer.payload()
+            written = _file_totals(model, decode_table(payload, ('id', *TOTALS[model]))[1])
+            _check(totals, written, "The archive file")
+
+            name = default_storage.save(
+                f"{COLD_ARCHIVE_DIR}/{model._meta.db_table}/{month:%Y-%m}.imscol.gz", ContentFile(payload),
+            )
+            period = ArchivedPeriod.objects.create(
+                source=_source(model), month=month, file=name, rows=len(buffer), size=len(payload),
+                totals=written, bounds=buffer.bounds(),
+            )
+            _drop_rows(model, month, ids, chunk_size)
+    except Exception:
+        if name is not None:
+            default_storage.delete(name)
+        raise
+    invalidate(NAMESPACES[model], PRODUCTS, ANALYTICS)
+    return period
+
+
+def closed_months(model, after_months=COLD_ARCHIVE_AFTER_MONTHS, today=None):
+    """Months older than ``after_months`` months that still have live rows and aren't archived yet."""
+    key = PARTITION_KEYS[model]
+    cutoff, _ = _month_range(model, add_months(month_of(today or timezone.localdate()), -after_months))
+    old = model.objects.filter(**{f'{key}__lt': cutoff}).order_by()
+    if isinstance(cutoff, datetime):
+        months = {month_of(moment.date()) for moment in old.datetimes(key, 'month', tzinfo=dt_timezone.utc)}
+    else:
+        months = set(old.dates(key, 'month'))
+    # A row back-dated into an archived month stays live; readers see both
+    months -= set(ArchivedPeriod.objects.filter(source=_source(model)).values_list('month', flat=True))
+    return sorted(months)
+
+
+def archive_closed_periods(after_months=COLD_ARCHIVE_AFTER_MONTHS, today=None):
+    """Archive every closed month of sales and stock movements; the ArchivedPeriods created."""
+    archived = []
+    for model in COLUMNS:
+        for month in closed_months(model, after_months, today):
+            period = archive_period(model, month)
+            if period is not None:
+                archived.append(period)
+    return archived
+
+
+def verify_period(period):
+    """Read ``period``'s file back and compare it with the totals recorded when it was written."""
+    model = next(model for model in COLUMNS if _source(model) == period.source)
+    _check(period.totals, _file_totals(model, read_period(period)), f"{period.file}")
+
+
+#---------------------------------------------<> Reading <>---------------------------------------------#
+
+def _parse(value):
+    return datetime.fromisoformat(value) if 'T' in value else date.fromisoformat(value)
+
+
+def _overlaps(period, bounds):
+    for column, (low, high) in (bounds or {}).items():
+        if column not in period.bounds:
+            continue
+        first, last = (_parse(value) for value in period.bounds[column])
+        if (low is not None and last < low) or (high is not None and first > high):
+            return False
+    return True
+
+
+def has_archive(model):
+    return ArchivedPeriod.objects.filter(source=_source(model)).exists()
+
+
+def archived_periods(model, bounds=None):
+    """``model``'s ArchivedPeriods, oldest first, that can hold rows within ``bounds`` ``{column: (low, high)}``."""
+    periods = ArchivedPeriod.objects.filter(source=_source(model)).order_by('month')
+    return [period for period in periods if _overlaps(period, bounds)]
+
+
+def read_period(period, columns=None):
+    """``{column: [values]}`` of an archived period."""
+    with default_storage.open(period.file, 'rb') as stream:
+        return decode_table(stream.read(), columns)[1]
+
+
+def archived_rows(model, bounds=None, columns=None):
+    """
+    Rows of the archived periods that can fall within ``bounds``, as dicts.
+
+    ``bounds`` only picks the files; rows are not filtered one by one.
+    """
+    for period in archived_periods(model, bounds):
+        data = read_period(period, columns)
+        names = list(data)
+        for values in zip(*data.values()):
+            yield dict(zip(names, values))
+
+
+def archived_net_change(after, until=None):
+    """Like snapshots.net_change, over the archived rows: ``{product_id: units}``."""
+    change = defaultdict(int)
+    bounds = {'created_at': (after, until)}
+
+    def within(row):
+        return row['created_at'] >= after and (until is None or row['created_at'] < until)
+
+    for row in archived_rows(Sale, bounds, ('product_id', 'quantity', 'created_at')):
+        if within(row):
+            change[row['product_id']] -= row['quantity']
+    for row in archived_rows(StockMovement, bounds, ('product_id', 'movement_type', 'quantity', 'created_at')):
+        if within(row):
+            change[row['product_id']] += row['quantity'] if row['movement_type'] == 'Addition' else -row['quantity']
+    return change
+
+
+def _related(model, fields, rows):
+    """``{relation lookup: {id: value}}`` for the ``fields`` that go through a relation."""
+    wanted = defaultdict(list)
+    for _, lookup in fields:
+        relation, _, remote = lookup.partition('__')
+        if remote:
+            wanted[relation].append(remote)
+
+    values = {}
+    for relation, remotes in wanted.items():
+        field = model._meta.get_field(relation)
+        ids = {row[field.attname] for row in rows}
+        found = field.related_model.objects.filter(pk__in=ids).values_list('pk', *remotes)
+        for pk, *columns in found:
+            for remote, value in zip(remotes, columns):
+                values.setdefault(f'{relation}__{remote}', {})[pk] = value
+    return values
+
+
+def export_rows(model, fields, row_filter=None):
+    """
+    Archived rows matching ``row_filter`` (search.RowFilter) as tuples of ``fields``.
+
+    ``fields`` are exports.EXPORT_FIELDS-style ``(column, lookup)`` pairs;
+    lookups through a relation (``product__sku``) are resolved with one query
+    per archived month.
+    """
+    if model not in COLUMNS:
+        return
+    attnames = {field.name: field.attname for field in model._meta.concrete_fields}
+    for period in archived_periods(model, row_filter.bounds if row_filter else None):
+        data = read_period(period)
+        rows = [dict(zip(data, values)) for values in zip(*data.values())]
+        if row_filter is not None:
+            rows = [row for row in rows if row_filter.matches(row)]
+        related = _related(model, fields, rows)
+        for row in rows:
+            yield tuple(
+                related.get(lookup, {}).get(row[attnames[lookup.split('__')[0]]]) if '__' in lookup
+                else row.get(attnames.get(lookup, lookup))
+                for _, lookup in fields
+            )
+
+
+__all__ = (
+    "COLUMNS",
+    "ArchiveError",
+    "archive_closed_periods",
+    "archive_period",
+    "archived_net_change",
+    "archived_periods",
+    "archived_rows",
+    "closed_months",
+    "decode_table",
+    "encode_table",
+    "export_rows",
+    "has_archive",
+    "read_period",
+    "verify_period",
+)
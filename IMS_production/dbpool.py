@@ -0,0 +1,48 @@
+from django.db import connections
+
+# Django 5.1 keeps one psycopg_pool.ConnectionPool per database alias and per
+# process when DATABASES[...]['OPTIONS']['pool'] is set. Pools are not
+# fork-safe: their connections and maintenance threads belong to the process
+# that opened them, so Celery's prefork children must never use the parent's.
+
+
+def _pooled():
+    """Connections whose pool this process has opened."""
+    for connection in connections.all(initialized_only=False):
+        # Reading ``connection.pool`` would open a pool for every other alias
+        if connection.alias in getattr(type(connection), '_connection_pools', ()):
+            yield connection
+
+
+def pool_stats():
+    """``{alias: stats}`` of every configured pool (psycopg_pool's counters, see ``get_stats``)."""
+    return {connection.alias: connection.pool.get_stats() for connection in _pooled()}
+
+
+def close_pools():
+    """Close every pool this process opened; the next query opens a new one."""
+    for connection in _pooled():
+        connection.close_pool()
+
+
+def forget_inherited_pools():
+    """
+    Drop pools copied into a forked child without closing them.
+
+    Closing would send a terminate message down sockets the parent still uses;
+    the child just discards its copies and opens its own pool on first use.
+    """
+    for connection in connections.all():
+        pools = getattr(type(connection), '_connection_pools', None)
+        if pools:
+            pools.clear()
+    for connection in connections.all(initialized_only=True):
+        # A connection the parent had checked out is just as shared
+        connection.connection = None
+
+
+__all__ = (
+    "close_pools",
+    "forget_inherited_pools",
+    "pool_stats",
+)
@@ -0,0 +1,179 @@
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .analytics import ANALYTICS
+from .cache import CATEGORIES, PRODUCTS, SALES, STOCK_MOVEMENTS, invalidate
+from .models import Category, DeletionJob, Product, Sale, SalesSummary, StockMovement, StockShard, StockSnapshot
+
+# Deleting a category through the ORM collects every product, sale, movement,
+# summary, shard and snapshot under it in memory and deletes them in one
+# transaction, holding locks on all of it (and firing a post_delete per sale)
+# for as long as that takes. Instead the row is only marked pending_deletion
+# and a DeletionJob is queued; the cascade_delete task then removes the
+# dependents DELETION_CHUNK_SIZE primary keys at a time, each chunk in its own
+# short transaction, and records its progress on the job for the admin lists.
+#
+# A run stops after DELETION_TIME_BUDGET seconds (the task then queues the
+# next one), and a job that dies half way resumes where it stopped: whatever
+# is left is still selected by product, and finished chunks are gone.
+
+DELETION_CHUNK_SIZE = getattr(settings, "DELETION_CHUNK_SIZE", 1000)
+DELETION_TIME_BUDGET = getattr(settings, "DELETION_TIME_BUDGET", 240)
+
+# Deleted before the products, in this order; none of them is referenced by anything
+DEPENDENTS = (StockShard, StockSnapshot, SalesSummary, StockMovement, Sale)
+
+# The auto_now field saved with the flag, so cached rows and list ETags change
+_TOUCHED = {Category: 'created', Product: 'created_at'}
+
+
+#---------------------------------------------<> Reading <>---------------------------------------------#
+
+def exclude_pending(queryset):
+    """
+    ``queryset`` (of products, or of rows with a ``product``) without what is
+    being deleted: pending products and everything under them or under a
+    pending category.
+    """
+    prefix = '' if queryset.model is Product else 'product__'
+    return queryset.filter(**{f'{prefix}pending_deletion': False, f'{prefix}category__pending_deletion': False})
+
+
+#---------------------------------------------<> Requesting <>---------------------------------------------#
+
+def request_deletion(obj, user=None):
+    """
+    Mark ``obj`` (a Category or Product) pending deletion and queue its cascade; returns the DeletionJob.
+
+    Asking again for a row that is already pending returns its job, and
+    queues it once more if it had failed.
+    """
+    from .tasks import cascade_delete
+
+    model = type(obj)
+    with transaction.atomic():
+        job = DeletionJob.objects.filter(target=model._meta.model_name, object_id=obj.pk).order_by('-pk').first()
+        if obj.pending_deletion and job is not None and job.status != 'failed':
+            return job
+        if job is None or job.status != 'failed':
+            job = DeletionJob.objects.create(
+                target=model._meta.model_name, object_id=obj.pk, label=obj.name[:100],
+                requested_by=user if user is not None and user.is_authenticated else None,
+            )
+        else:
+            DeletionJob.objects.filter(pk=job.pk).update(status='pending', error='')
+        obj.pending_deletion = True
+        obj.save(update_fields=['pending_deletion', _TOUCHED[model]])
+        transaction.on_commit(lambda: cascade_delete.delay(job.pk))
+    return job
+
+
+#---------------------------------------------<> Running <>---------------------------------------------#
+
+def delete_rows(model, ids):
+    """
+    Delete the ``model`` rows with primary keys ``ids`` in one statement; the number deleted.
+
+    Sends no signals and cascades nothing, so only for rows nothing references.
+    """
+    if not ids:
+        return 0
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({placeholders})",
+            list(ids),
+        )
+        return cursor.rowcount
+
+
+def _delete_chunk(queryset, chunk_size):
+    """Delete up to ``chunk_size`` rows of ``queryset`` by primary key; the number deleted."""
+    model = queryset.model
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+    if not ids:
+        return 0
+    with transaction.atomic():
+        if model is Product:
+            # Through the collector for the post_delete cache invalidation; the
+            # dependents are gone by now so it finds nothing else to delete
+            return model.objects.filter(pk__in=ids).delete()[0]
+        # No signals: a sale's post_delete would revert summaries being deleted too
+        return delete_rows(model, ids)
+
+
+def _advance(job, deleted):
+    DeletionJob.objects.filter(pk=job.pk).update(deleted=F('deleted') + deleted)
+    job.deleted += deleted
+
+
+def run(job_id, chunk_size=None, time_budget=None):
+    """
+    Carry out DeletionJob ``job_id`` and return it.
+
+    Its status is 'done', or still 'running' if ``time_budget`` seconds ran
+    out first; an error marks it 'failed' and is raised.
+    """
+    chunk_size = chunk_size or DELETION_CHUNK_SIZE
+    deadline = time.monotonic() + (time_budget or DELETION_TIME_BUDGET)
+    job = DeletionJob.objects.get(pk=job_id)
+    if job.status == 'done':
+        return job
+
+    if job.target == 'category':
+        products = Product.objects.filter(category_id=job.object_id)
+        owner = Category.objects.filter(pk=job.object_id)
+    else:
+        products = Product.objects.filter(pk=job.object_id)
+        owner = products
+    product_ids = products.values('pk')
+
+    try:
+        remaining = sum(model.objects.filter(product__in=product_ids).count() for model in DEPENDENTS)
+        remaining += products.count() + (owner.count() if job.target == 'category' else 0)
+        job.total, job.status = job.deleted + remaining, 'running'
+        DeletionJob.objects.filter(pk=job.pk).update(total=job.total, status=job.status)
+
+        for queryset in [model.objects.filter(product__in=product_ids) for model in DEPENDENTS] + [products]:
+            while deleted := _delete_chunk(queryset, chunk_size):
+                _advance(job, deleted)
+                if time.monotonic() > deadline:
+                    return job
+        if job.target == 'category':
+            _advance(job, owner.delete()[0])
+    except Exception as error:
+        job.status, job.error = 'failed', str(error)
+        DeletionJob.objects.filter(pk=job.pk).update(status=job.status, error=job.error)
+        raise
+    finally:
+        invalidate(CATEGORIES, PRODUCTS, SALES, STOCK_MOVEMENTS, ANALYTICS)
+
+    job.status, job.finished_at = 'done', timezone.now()
+    DeletionJob.objects.filter(pk=job.pk).update(status=job.status, finished_at=job.finished_at)
+    return job
+
+
+def job_status(target, object_id):
+    """The latest job for ``target`` ``object_id`` as a dict for the progress endpoint, or None."""
+    job = DeletionJob.objects.filter(target=target, object_id=object_id).order_by('-pk').first()
+    if job is None:
+        return None
+    return {
+        'status': job.status, 'label': job.label, 'deleted': job.deleted,
+        'total': job.total, 'progress': job.progress, 'error': job.error,
+    }
+
+
+__all__ = (
+    "DELETION_CHUNK_SIZE",
+    "DELETION_TIME_BUDGET",
+    "delete_rows",
+    "exclude_pending",
+    "job_status",
+    "request_deletion",
+    "run",
+)
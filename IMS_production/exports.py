@@ -0,0 +1,111 @@
+import csv
+import json
+from itertools import chain, islice
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import Category, Product, Sale, SalesSummary, StockMovement
+
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# (column, ORM lookup) pairs read with values_list, so no model instances are built
+EXPORT_FIELDS = {
+    Category: (
+        ('id', 'id'), ('name', 'name'), ('description', 'description'), ('created', 'created'),
+    ),
+    Product: (
+        ('id', 'id'), ('name', 'name'), ('sku', 'sku'), ('category', 'category__name'),
+        ('quantity', 'quantity'), ('price', 'price'), ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    ),
+    Sale: (
+        ('id', 'id'), ('product', 'product__name'), ('sku', 'product__sku'), ('quantity', 'quantity'),
+        ('sale_price', 'sale_price'), ('total_amount', 'total_amount'), ('total_revenue', 'total_revenue'),
+        ('sale_date', 'sale_date'), ('created_at', 'created_at'),
+    ),
+    StockMovement: (
+        ('id', 'id'), ('product', 'product__name'), ('sku', 'product__sku'), ('movement_type', 'movement_type'),
+        ('quantity', 'quantity'), ('reason', 'reason'), ('created_at', 'created_at'),
+    ),
+    SalesSummary: (
+        ('id', 'id'), ('product', 'product__name'), ('period', 'period'), ('period_start', 'period_start'),
+        ('total_sold', 'total_sold'), ('total_revenue', 'total_revenue'), ('report_date', 'report_date'),
+    ),
+}
+
+
+#---------------------------------------------<> Encoders <>---------------------------------------------#
+
+class _Echo:
+    """File-like object whose write() hands the encoded line straight back to the generator."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+ENCODERS = {
+    'csv': csv_lines,
+    'ndjson': ndjson_lines,
+}
+
+
+#---------------------------------------------<> Streaming <>---------------------------------------------#
+
+async def _drain(lines, batch=EXPORT_CHUNK_SIZE):
+    # Under ASGI Django would buffer a sync iterator into a list before sending it;
+    # pull it in bounded batches on the sync thread instead.
+    next_batch = sync_to_async(lambda: list(islice(lines, batch)), thread_sensitive=True)
+    while True:
+        chunk = await next_batch()
+        if not chunk:
+            break
+        for line in chunk:
+            yield line
+
+
+def stream_queryset(request, queryset, export_format, fields=None, filename=None, chunk_size=EXPORT_CHUNK_SIZE,
+                    extra_rows=None):
+    """
+    Stream ``queryset`` as CSV or NDJSON without materialising it.
+
+    Rows come from ``values_list(...).iterator(chunk_size=...)`` (a server-side
+    cursor on PostgreSQL), so memory use stays flat for any table size.
+    ``extra_rows`` (tuples in ``fields`` order, e.g. archived rows) follow them.
+    """
+    fields = fields or EXPORT_FIELDS[queryset.model]
+    columns = [column for column, _ in fields]
+    rows = queryset.values_list(*[lookup for _, lookup in fields]).iterator(chunk_size=chunk_size)
+    if extra_rows is not None:
+        rows = chain(rows, extra_rows)
+    lines = ENCODERS[export_format](columns, rows)
+
+    content = _drain(lines) if isinstance(request, ASGIRequest) else lines
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[export_format])
+
+    filename = filename or f"{queryset.model._meta.model_name}-{timezone.now():%Y%m%d-%H%M%S}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+__all__ = (
+    "EXPORT_FIELDS",
+    "stream_queryset",
+)
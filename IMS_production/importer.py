@@ -0,0 +1,256 @@
+import csv
+import io
+import uuid
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.db.backends.base.operations import BaseDatabaseOperations
+from .analytics import ANALYTICS
+from .cache import CATEGORIES, PRODUCTS, invalidate
+from .models import Category, Product
+
+CATALOG_IMPORT_BATCH_SIZE = getattr(settings, "CATALOG_IMPORT_BATCH_SIZE", 1000)
+
+# Accepted header spellings, normalised to the Product/Category field they fill
+HEADER_ALIASES = {
+    'name': 'name', 'product': 'name', 'product name': 'name',
+    'category': 'category', 'category name': 'category',
+    'price': 'price',
+    'quantity': 'quantity', 'qty': 'quantity',
+    'sku': 'sku',
+    'description': 'description',
+    'category description': 'category_description',
+}
+
+
+#---------------------------------------------<> Readers <>---------------------------------------------#
+
+def _normalise_header(header):
+    return [HEADER_ALIASES.get(str(h or '').strip().lower(), str(h or '').strip().lower()) for h in header]
+
+
+def iter_csv(stream):
+    """Yield ``(row_number, dict)`` from a binary or text CSV stream, one line at a time."""
+    if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(stream, 'mode', ''):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(stream)
+    header = _normalise_header(next(reader, []))
+    for number, values in enumerate(reader, start=2):
+        if any(v.strip() for v in values):
+            yield number, dict(zip(header, values))
+
+
+def iter_xlsx(stream):
+    """Yield ``(row_number, dict)`` from an XLSX workbook using openpyxl's streaming reader."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ValueError("XLSX imports require the 'openpyxl' package; upload a CSV instead.") from exc
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _normalise_header(next(rows, []))
+        for number, values in enumerate(rows, start=2):
+            if any(v not in (None, '') for v in values):
+                yield number, {k: '' if v is None else str(v) for k, v in zip(header, values)}
+    finally:
+        workbook.close()
+
+
+def iter_rows(stream, filename):
+    """Pick the reader from the file extension."""
+    if Path(filename).suffix.lower() in ('.xlsx', '.xlsm'):
+        return iter_xlsx(stream)
+    return iter_csv(stream)
+
+
+#---------------------------------------------<> Importer <>---------------------------------------------#
+
+class CatalogImporter:
+    """
+    Load products from a row stream with a bounded number of queries per batch.
+
+    - Categories are resolved by name once and cached; missing ones are bulk created.
+    - Rows clashing with ``unique_product_name_per_category`` or an existing SKU are
+      reported per row instead of aborting the import.
+    - Products are written with ``bulk_create`` every ``batch_size`` rows.
+    """
+
+    def __init__(self, batch_size=None, on_progress=None):
+        self.batch_size = batch_size or CATALOG_IMPORT_BATCH_SIZE
+        self.on_progress = on_progress
+        self.categories = {}
+        self.seen = set()
+        self.seen_skus = set()
+        self.report = {'processed': 0, 'created': 0, 'categories_created': 0, 'conflicts': [], 'errors': []}
+
+    def run(self, rows):
+        batch = []
+        for number, row in rows:
+            parsed = self._parse(number, row)
+            if parsed:
+                batch.append(parsed)
+            self.report['processed'] += 1
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        self._flush(batch)
+        return self.report
+
+    #--------------------------------------------<> Row parsing <>--------------------------------------------#
+
+    def _error(self, number, message):
+        self.report['errors'].append({'row': number, 'error': message})
+
+    def _parse(self, number, row):
+        name = (row.get('name') or '').strip()
+        category = (row.get('category') or '').strip()
+        if not name or not category:
+            self._error(number, "Product name and category are required.")
+            return None
+        if len(name) > 50 or len(category) > 50:
+            self._error(number, "Product and category names are limited to 50 characters.")
+            return None
+
+        price_field = Product._meta.get_field('price')
+        try:
+            price = Decimal(str(row.get('price') or '').strip())
+            quantity = Decimal(str(row.get('quantity') or '').strip())
+            # inf and NaN parse as Decimals but are not prices
+            if not (price.is_finite() and quantity.is_finite()):
+                raise ValueError
+            price = price.quantize(Decimal(1).scaleb(-price_field.decimal_places))
+            quantity = int(quantity)
+        except (InvalidOperation, ValueError):
+            self._error(number, "Price and quantity must be numbers.")
+            return None
+        if price <= 0:
+            self._error(number, "The price must be greater than 0.")
+            return None
+        if quantity <= 0:
+            self._error(number, "The quantity must be greater than 0.")
+            return None
+
+        # Out-of-range values would fail the whole batch's insert with a DataError
+        if price.adjusted() >= price_field.max_digits - price_field.decimal_places:
+            self._error(number, "The price is too large.")
+            return None
+        # The portable IntegerField range; SQLite alone would take more
+        if quantity > BaseDatabaseOperations.integer_field_ranges['IntegerField'][1]:
+            self._error(number, "The quantity is too large.")
+            return None
+
+        return {
+            'row': number,
+            'name': name,
+            'category': category,
+            'category_description': (row.get('category_description') or '').strip(),
+            'description': (row.get('description') or '').strip(),
+            'price': price,
+            'quantity': quantity,
+            'sku': (row.get('sku') or '').strip(),
+        }
+
+    #--------------------------------------------<> Batch writes <>--------------------------------------------#
+
+    def _resolve_categories(self, batch):
+        missing = {item['category']: item['category_description'] for item in batch}
+        missing = {name: desc for name, desc in missing.items() if name not in self.categories}
+        if not missing:
+            return
+
+        for pk, name in Category.objects.filter(name__in=missing).order_by('pk').values_list('pk', 'name'):
+            self.categories.setdefault(name, pk)
+
+        to_create = [Category(name=name, description=desc) for name, desc in missing.items() if name not in self.categories]
+        if to_create:
+            for category in Category.objects.bulk_create(to_create):
+                self.categories[category.name] = category.pk
+            self.report['categories_created'] += len(to_create)
+
+    def _conflict(self, item, reason):
+        self.report['conflicts'].append({
+            'row': item['row'], 'name': item['name'], 'category': item['category'], 'reason': reason,
+        })
+
+    def _flush(self, batch):
+        if batch:
+            with transaction.atomic():
+                self._resolve_categories(batch)
+                self._create_products(batch)
+                # bulk_create sends no post_save
+                invalidate(CATEGORIES, PRODUCTS, ANALYTICS)
+        if self.on_progress:
+            self.on_progress(self.report)
+
+    def _create_products(self, batch):
+        category_ids = {self.categories[item['category']] for item in batch}
+        names = {item['name'] for item in batch}
+        skus = {item['sku'] for item in batch if item['sku']}
+
+        existing = set(
+            Product.objects.filter(category_id__in=category_ids, name__in=names).values_list('category_id', 'name')
+        )
+        existing_skus = set(Product.objects.filter(sku__in=skus).values_list('sku', flat=True)) if skus else set()
+
+        products, rows = [], []
+        for item in batch:
+            key = (self.categories[item['category']], item['name'])
+            if key in existing or key in self.seen:
+                self._conflict(item, f"Product name '{item['name']}' already exists in category '{item['category']}'.")
+                continue
+            if item['sku'] and (item['sku'] in existing_skus or item['sku'] in self.seen_skus):
+                self._conflict(item, f"SKU '{item['sku']}' already exists.")
+                continue
+
+            product = Product(
+                name=item['name'], description=item['description'], category_id=key[0],
+                price=item['price'], quantity=item['quantity'], sku=item['sku'],
+            )
+            # bulk_create bypasses Product.save(), so assign the SKU here
+            product.sku = product.sku or product.generate_sku()
+            self.seen.add(key)
+            self.seen_skus.add(product.sku)
+            products.append(product)
+            rows.append(item)
+
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_create(products)
+            self.report['created'] += len(products)
+        except (IntegrityError, DataError):
+            # A concurrent writer took a name or SKU between the check and the insert, or
+            # a value the checks let through does not fit its column: retry row by row
+            # so only the offending rows are reported.
+            for product, item in zip(products, rows):
+                try:
+                    with transaction.atomic():
+                        product.pk = None
+                        product.save()
+                    self.report['created'] += 1
+                except IntegrityError:
+                    self._conflict(item, "Product conflicts with a row created during the import.")
+                except DataError as exc:
+                    self._error(item['row'], f"Value out of range: {exc}")
+
+
+def import_catalog_file(stream, filename, batch_size=None, on_progress=None):
+    """Import a CSV/XLSX stream and return the per-row report."""
+    importer = CatalogImporter(batch_size=batch_size, on_progress=on_progress)
+    return importer.run(iter_rows(stream, filename))
+
+
+def unique_upload_name(filename):
+    return f"imports/{uuid.uuid4().hex}{Path(filename).suffix.lower()}"
+
+
+__all__ = (
+    "CatalogImporter",
+    "import_catalog_file",
+    "iter_csv",
+    "iter_xlsx",
+    "iter_rows",
+    "unique_upload_name",
+)
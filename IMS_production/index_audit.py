@@ -0,0 +1,199 @@
+from dataclasses import dataclass, field
+
+from django.db import connection, migrations
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+# Every index on a table is maintained on every INSERT and on every UPDATE that
+# is not HOT (PostgreSQL can only skip index maintenance when no indexed column
+# changed). Product.quantity and the sales summary counters change on every
+# sale, so an index nobody reads there is pure write cost.
+#
+# The audit reads the indexes that actually exist (not what the models say),
+# plus pg_stat_user_indexes on PostgreSQL, and suggests dropping:
+#   - unused:    never scanned since the statistics were last reset
+#   - duplicate: same columns as another index or a unique constraint
+#   - prefix:    its columns are a leading prefix of another index's columns
+# Unique, primary key, partial, expression and opclass indexes are never
+# suggested for removal as duplicates or prefixes: they do more than a plain btree.
+
+
+@dataclass
+class DbIndex:
+    name: str
+    columns: tuple
+    unique: bool = False
+    primary_key: bool = False
+    special: bool = False       # partial / expression / opclass / non-btree
+    scans: int = None           # pg_stat_user_indexes.idx_scan, None off PostgreSQL
+    size: int = None            # bytes
+    definition: str = ''
+
+
+@dataclass
+class Finding:
+    model: type
+    index: DbIndex
+    reason: str                 # 'unused', 'duplicate' or 'prefix'
+    covered_by: str = None
+    operation: object = None    # migration operation that drops it, None if not declared by the model
+    notes: list = field(default_factory=list)
+
+
+#---------------------------------------------<> Reading the database <>---------------------------------------------#
+
+def table_indexes(model):
+    """The indexes and unique constraints that exist on ``model``'s table."""
+    table = model._meta.db_table
+    partial = {index.name for index in model._meta.indexes if index.condition is not None}
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+        stats = _pg_index_stats(cursor, table) if connection.vendor == 'postgresql' else {}
+
+    indexes = []
+    for name, info in constraints.items():
+        if not (info['index'] or info['unique'] or info['primary_key']):
+            continue    # foreign key / check constraints
+        scans, size, definition, predicate = stats.get(name, (None, None, '', False))
+        orders = info.get('orders') or []
+        special = (
+            predicate or name in partial
+            or not info['columns'] or info.get('definition')
+            or info.get('type', 'idx') not in ('idx', 'btree')
+            or '_pattern_ops' in definition or ' INCLUDE ' in definition
+            or any(order == 'DESC' for order in orders)
+        )
+        indexes.append(DbIndex(
+            name=name, columns=tuple(info['columns']), unique=info['unique'], primary_key=info['primary_key'],
+            special=bool(special), scans=scans, size=size, definition=definition,
+        ))
+    return sorted(indexes, key=lambda index: index.name)
+
+
+def _pg_index_stats(cursor, table):
+    cursor.execute(
+        "SELECT s.indexrelname, s.idx_scan, pg_relation_size(s.indexrelid), "
+        "pg_get_indexdef(s.indexrelid), i.indpred IS NOT NULL "
+        "FROM pg_stat_user_indexes s JOIN pg_index i ON i.indexrelid = s.indexrelid "
+        "WHERE s.relname = %s",
+        [table],
+    )
+    return {name: (scans, size, definition, predicate) for name, scans, size, definition, predicate in cursor.fetchall()}
+
+
+def table_write_stats(model):
+    """``{'updates': n, 'hot_updates': n, 'stats_reset': datetime}`` on PostgreSQL, else None."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT t.n_tup_upd, t.n_tup_hot_upd, d.stats_reset "
+            "FROM pg_stat_user_tables t, pg_stat_database d "
+            "WHERE t.relname = %s AND d.datname = current_database()",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return {'updates': row[0], 'hot_updates': row[1], 'stats_reset': row[2]}
+
+
+#---------------------------------------------<> Audit <>---------------------------------------------#
+
+def _keep_rank(model, index):
+    """Which of two equivalent indexes to keep: constraints, then field indexes, then Meta indexes."""
+    if index.primary_key or index.unique:
+        return 0
+    if any(declared.name == index.name for declared in model._meta.indexes):
+        return 2
+    return 1 if _field_for(model, index) is not None else 3
+
+
+def _field_for(model, index):
+    if len(index.columns) != 1:
+        return None
+    for model_field in model._meta.local_fields:
+        if model_field.column == index.columns[0] and model_field.db_index and not model_field.unique:
+            return model_field
+    return None
+
+
+def drop_operation(model, index):
+    """The migration operation that removes ``index`` from the model, or None if the model doesn't declare it."""
+    for declared in model._meta.indexes:
+        if declared.name == index.name:
+            return migrations.RemoveIndex(model_name=model._meta.model_name, name=index.name)
+    model_field = _field_for(model, index)
+    if model_field is not None:
+        altered = model_field.clone()
+        altered.db_index = False
+        return migrations.AlterField(model_name=model._meta.model_name, name=model_field.name, field=altered)
+    return None
+
+
+def audit_model(model, indexes=None):
+    """Findings for ``model``'s table, in the order they should be read."""
+    indexes = table_indexes(model) if indexes is None else indexes
+    droppable = [index for index in indexes if not (index.unique or index.primary_key)]
+    findings = {}
+
+    for index in droppable:
+        if index.scans == 0:
+            findings[index.name] = Finding(model, index, 'unused')
+
+    def kept():
+        return [index for index in indexes if index.name not in findings and not index.special]
+
+    ranked = sorted(droppable, key=lambda index: (_keep_rank(model, index), index.name))
+    for index in reversed(ranked):
+        if index.name in findings or index.special:
+            continue
+        for other in kept():
+            if other is index:
+                continue
+            if other.columns == index.columns and _keep_rank(model, other) <= _keep_rank(model, index):
+                findings[index.name] = Finding(model, index, 'duplicate', covered_by=other.name)
+                break
+            if len(other.columns) > len(index.columns) and other.columns[:len(index.columns)] == index.columns:
+                findings[index.name] = Finding(model, index, 'prefix', covered_by=other.name)
+                break
+
+    for finding in findings.values():
+        finding.operation = drop_operation(model, finding.index)
+        if finding.operation is None:
+            finding.notes.append("not declared by the model (created in SQL); drop it with RunSQL")
+        leading = finding.index.columns[0] if finding.index.columns else None
+        if finding.reason == 'unused' and any(
+            model_field.is_relation and model_field.column == leading for model_field in model._meta.local_fields
+        ):
+            finding.notes.append("leads with a foreign key: deleting a referenced row will scan this table")
+    return sorted(findings.values(), key=lambda finding: finding.index.name)
+
+
+#---------------------------------------------<> Migration <>---------------------------------------------#
+
+def suggested_migration(app_label, findings, name='drop_redundant_indexes'):
+    """Source of a migration dropping every finding the models declare, or None if there is nothing to drop."""
+    operations = [finding.operation for finding in findings if finding.operation is not None]
+    if not operations:
+        return None
+
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    leaves = loader.graph.leaf_nodes(app_label)
+    number = int(leaves[0][1].split('_', 1)[0]) + 1 if leaves else 1
+
+    migration = migrations.Migration(f'{number:04d}_{name}', app_label)
+    migration.dependencies = leaves
+    migration.operations = operations
+    return MigrationWriter(migration).as_string()
+
+
+__all__ = (
+    "DbIndex",
+    "Finding",
+    "audit_model",
+    "drop_operation",
+    "suggested_migration",
+    "table_indexes",
+    "table_write_stats",
+)
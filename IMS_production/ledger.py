@@ -0,0 +1,141 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .analytics import ANALYTICS
+from .cache import PRODUCTS, invalidate
+from .models import Product, Sale, StockMovement
+from . import shards
+
+
+#-----------------------------------------------<> Errors <>-----------------------------------------------#
+
+class InsufficientStock(Exception):
+    """Raised when a decrement would take a product's stock below zero."""
+
+    def __init__(self, product, requested, available):
+        self.product = product
+        self.requested = requested
+        self.available = available
+        super().__init__(
+            f"Not enough stock for '{product.name}': requested {requested}, available {available}"
+        )
+
+
+#-----------------------------------------------<> Ledger <>-----------------------------------------------#
+
+def adjust_stock(product, delta):
+    """
+    Apply ``delta`` to ``product.quantity`` with one conditional UPDATE.
+
+    Decrements only match while ``quantity >= -delta``, so concurrent sales can
+    never spend the same units twice and the balance never goes negative.
+    Only the quantity (and the auto_now timestamp) is written, never the whole row.
+
+    Products with ``shard_count`` set change one of their StockShard rows
+    instead; their ``quantity`` catches up when the shards are folded. Which
+    path applies is decided by the row in the database, not by ``product``,
+    which may have been loaded before shards.enable/disable ran.
+    """
+    while True:
+        quantity = _adjust_row(product, delta)
+        if quantity is not None:
+            return quantity
+
+
+def _adjust_row(product, delta):
+    """The new quantity; None if the product turned out to be sharded and its shards changed under us."""
+    queryset = Product.objects.filter(pk=product.pk, shard_count=0)
+    if delta < 0:
+        queryset = queryset.filter(quantity__gte=-delta)
+
+    # `created_at` is Product's auto_now column, bump it the way save() would.
+    updated = queryset.update(quantity=F('quantity') + delta, created_at=timezone.now())
+    if not updated:
+        shard_count, available = Product.objects.filter(pk=product.pk).values_list('shard_count', 'quantity').first() or (0, 0)
+        product.shard_count = shard_count
+        if shard_count:
+            return _adjust_shards(product, delta, shard_count)
+        raise InsufficientStock(product, -delta, available)
+
+    # update() sends no post_save, so drop the cached products and analytics here
+    invalidate(PRODUCTS, ANALYTICS)
+    product.refresh_from_db(fields=['quantity', 'created_at'])
+    return product.quantity
+
+
+def _adjust_shards(product, delta, shard_count):
+    if delta < 0:
+        written = shards.take(product.pk, -delta, shard_count)
+    else:
+        written = shards.put(product.pk, delta, shard_count)
+    if written:
+        # The product row is left alone (that is the point of sharding), so its
+        # created_at moves at the next fold, when quantity does; cached stock goes now
+        invalidate(PRODUCTS, ANALYTICS)
+        return product.quantity
+
+    # Nothing was written: either the shards are short, or shards.disable/enable
+    # replaced them since shard_count was read and the caller must start over
+    if delta < 0 and Product.objects.filter(pk=product.pk, shard_count=shard_count).exists():
+        raise InsufficientStock(product, -delta, shards.total(product.pk))
+    return None
+
+
+def record_movement(movement):
+    """
+    Persist an unsaved StockMovement and apply it to the product's stock.
+
+    The stock change and the movement row commit together or not at all.
+    """
+    if movement.quantity <= 0:
+        raise ValueError("Movement quantity must be greater than 0.")
+
+    delta = movement.quantity if movement.movement_type == 'Addition' else -movement.quantity
+    with transaction.atomic():
+        adjust_stock(movement.product, delta)
+        movement.save()
+    return movement
+
+
+def record_sale(sale):
+    """
+    Persist an unsaved Sale and take its quantity out of stock.
+
+    Raises InsufficientStock (and writes nothing) if the product cannot cover the sale.
+    """
+    if sale.quantity <= 0:
+        raise ValueError("Sale quantity must be greater than 0.")
+
+    with transaction.atomic():
+        adjust_stock(sale.product, -sale.quantity)
+        sale.save()
+    return sale
+
+
+def sell(product, quantity, sale_price, total_revenue=None, sale_date=None):
+    """Convenience wrapper building the Sale row for callers without a form (POS, imports)."""
+    sale = Sale(
+        product=product,
+        quantity=quantity,
+        sale_price=sale_price,
+        total_revenue=total_revenue if total_revenue is not None else sale_price * quantity,
+    )
+    if sale_date is not None:
+        sale.sale_date = sale_date
+    return record_sale(sale)
+
+
+def move(product, movement_type, quantity, reason):
+    """Convenience wrapper building the StockMovement row for callers without a form."""
+    movement = StockMovement(product=product, movement_type=movement_type, quantity=quantity, reason=reason)
+    return record_movement(movement)
+
+
+__all__ = (
+    "InsufficientStock",
+    "adjust_stock",
+    "record_movement",
+    "record_sale",
+    "sell",
+    "move",
+)
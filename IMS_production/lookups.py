@@ -0,0 +1,79 @@
+import hashlib
+from django.conf import settings
+from django.db.models import Q
+from .cache import CATEGORIES, PRODUCTS, cached
+from .models import Category, Product
+
+LOOKUP_CACHE_TIMEOUT = getattr(settings, "LOOKUP_CACHE_TIMEOUT", 3600)
+AUTOCOMPLETE_LIMIT = getattr(settings, "AUTOCOMPLETE_LIMIT", 20)
+
+
+#---------------------------------------------<> Cached reads <>---------------------------------------------#
+
+def category_choices():
+    """``[(id, name), ...]`` for category dropdowns, shared by every form until a category changes."""
+    return cached(
+        CATEGORIES, 'choices',
+        lambda: list(Category.objects.filter(pending_deletion=False).order_by('name').values_list('pk', 'name')),
+        timeout=LOOKUP_CACHE_TIMEOUT,
+    )
+
+
+#---------------------------------------------<> Autocomplete <>---------------------------------------------#
+
+def _normalise(term):
+    return ' '.join(term.split()).lower()
+
+
+def _term_key(limit, term):
+    # Terms may hold spaces or be long; keep the key short and portable
+    return f"suggest:{limit}:{hashlib.md5(term.encode()).hexdigest()}"
+
+
+def product_suggestions(term, limit=AUTOCOMPLETE_LIMIT):
+    """
+    ``[{id, text}, ...]`` for products whose name or SKU starts with ``term``.
+
+    ``istartswith`` compiles to ``UPPER(col) LIKE 'TERM%'``, which the trigram
+    indexes on UPPER(name) and UPPER(sku) serve on PostgreSQL, so a lookup
+    reads only the matching rows. Results are cached per term until any
+    product changes.
+    """
+    term = _normalise(term)
+    if not term:
+        return []
+
+    def compute():
+        rows = (
+            Product.objects.filter(Q(name__istartswith=term) | Q(sku__istartswith=term))
+            .filter(pending_deletion=False, category__pending_deletion=False)
+            .order_by('name', 'pk')
+            .values_list('pk', 'name', 'sku', 'category__name', 'quantity')[:limit]
+        )
+        return [
+            {'id': pk, 'text': f"{name} ({category})", 'sku': sku, 'quantity': quantity}
+            for pk, name, sku, category, quantity in rows
+        ]
+    return cached(PRODUCTS, _term_key(limit, term), compute, timeout=LOOKUP_CACHE_TIMEOUT)
+
+
+def category_suggestions(term, limit=AUTOCOMPLETE_LIMIT):
+    """``[{id, text}, ...]`` for categories whose name starts with ``term``."""
+    term = _normalise(term)
+    if not term:
+        return []
+
+    def compute():
+        rows = (
+            Category.objects.filter(name__istartswith=term, pending_deletion=False)
+            .order_by('name', 'pk').values_list('pk', 'name')[:limit]
+        )
+        return [{'id': pk, 'text': name} for pk, name in rows]
+    return cached(CATEGORIES, _term_key(limit, term), compute, timeout=LOOKUP_CACHE_TIMEOUT)
+
+
+__all__ = (
+    "category_choices",
+    "category_suggestions",
+    "product_suggestions",
+)
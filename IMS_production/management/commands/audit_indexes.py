@@ -0,0 +1,123 @@
+import statistics
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from IMS_production import index_audit
+from IMS_production.cache import suspend_invalidation
+from IMS_production.ledger import adjust_stock
+from IMS_production.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Report unused, duplicate and prefix-redundant indexes on each model's table "
+        "(usage from pg_stat_user_indexes on PostgreSQL) and print a migration dropping them. "
+        "--benchmark times Product stock updates with the current indexes and again with the "
+        "suggested ones dropped, inside a transaction that is rolled back; the drop locks the "
+        "table while it runs, so benchmark against a copy of production, not production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('app_labels', nargs='*', default=['IMS_production'])
+        parser.add_argument('--migration', metavar='PATH', help="Write the suggested migration here instead of printing it")
+        parser.add_argument('--benchmark', type=int, default=0, metavar='N', help="Time N Product stock updates before and after")
+
+    def handle(self, *args, **options):
+        findings_by_app = {}
+        for app_label in options['app_labels']:
+            try:
+                app = apps.get_app_config(app_label)
+            except LookupError as error:
+                raise CommandError(str(error))
+            findings_by_app[app_label] = []
+            for model in app.get_models():
+                if model._meta.managed and not model._meta.proxy:
+                    findings_by_app[app_label] += self._report(model)
+
+        for app_label, findings in findings_by_app.items():
+            source = index_audit.suggested_migration(app_label, findings)
+            if source is None:
+                continue
+            if options['migration']:
+                with open(options['migration'], 'w') as handle:
+                    handle.write(source)
+                self.stdout.write(self.style.SUCCESS(f"Suggested migration written to {options['migration']}"))
+            else:
+                self.stdout.write(f"\n# Suggested migration for {app_label}:\n{source}")
+
+        if options['benchmark']:
+            findings = [finding for finding in findings_by_app.get('IMS_production', []) if finding.model is Product]
+            self._benchmark(options['benchmark'], findings)
+
+    #---------------------------------------------<> Report <>---------------------------------------------#
+
+    def _report(self, model):
+        indexes = index_audit.table_indexes(model)
+        findings = index_audit.audit_model(model, indexes)
+
+        header = f"{model._meta.label} ({model._meta.db_table}): {len(indexes)} indexes"
+        writes = index_audit.table_write_stats(model)
+        if writes and writes['updates']:
+            header += (f", {writes['updates']} updates, {100 * writes['hot_updates'] / writes['updates']:.0f}% HOT"
+                       f" (stats since {writes['stats_reset'] or 'cluster start'})")
+        self.stdout.write(self.style.MIGRATE_HEADING(header))
+
+        for index in indexes:
+            usage = '' if index.scans is None else f"  scans={index.scans} size={index.size // 1024}kB"
+            kind = 'unique' if index.unique else 'index'
+            self.stdout.write(f"  {index.name}: {kind} ({', '.join(index.columns) or 'expression'}){usage}")
+        for finding in findings:
+            reason = {
+                'unused': "never scanned",
+                'duplicate': f"duplicates {finding.covered_by}",
+                'prefix': f"is a prefix of {finding.covered_by}",
+            }[finding.reason]
+            self.stdout.write(self.style.WARNING(f"  -> drop {finding.index.name}: {reason}"))
+            for note in finding.notes:
+                self.stdout.write(f"     {note}")
+        return findings
+
+    #---------------------------------------------<> Benchmark <>---------------------------------------------#
+
+    def _benchmark(self, updates, findings):
+        category = Category.objects.create(name='audit_indexes', description='')
+        products = [
+            Product(name=f'audit_indexes {n}', description='', category=category, price=1, quantity=updates)
+            for n in range(100)
+        ]
+        try:
+            for product in products:
+                product.save()
+            self._time_updates("current indexes", products, updates)
+
+            names = [finding.index.name for finding in findings]
+            if not names:
+                self.stdout.write("Nothing to drop on Product; skipping the second run.")
+                return
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for name in names:
+                        cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+                self._time_updates(f"without {', '.join(names)}", products, updates)
+                transaction.set_rollback(True)
+        finally:
+            category.delete()
+
+    def _time_updates(self, label, products, updates):
+        timings = []
+        # Cache invalidation is not what is being measured
+        with suspend_invalidation():
+            for n in range(updates):
+                product = products[n % len(products)]
+                started = time.perf_counter()
+                adjust_stock(product, -1 if n % 2 else 1)
+                timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"[{label}] {len(timings)} updates: {len(timings) / (sum(timings) / 1000):.0f}/s, "
+            f"mean {statistics.mean(timings):.3f}ms, p95 {p95:.3f}ms"
+        )
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import statistics
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from IMS_admin.listviews import ProductView
+from IMS_production.dbpool import close_pools, pool_stats
+from sms_tasks.models import MessageTask
+from sms_tasks.services import WhatsAppService
+from sms_tasks.tasks import send_whatsapp
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a product list request and a send_whatsapp task with and without the connection pool. "
+        "The connection is closed after every iteration, as Django does at the end of each request "
+        "and Celery after each task, so the unpooled run pays for a new connection every time. "
+        "WhatsApp is not called; the HTTP send is stubbed out."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--skip-task', action='store_true', help="Only time the list view")
+
+    def handle(self, *args, **options):
+        pool_options = connection.settings_dict.get('OPTIONS', {}).get('pool')
+        if connection.vendor != 'postgresql' or not pool_options:
+            self.stdout.write(self.style.WARNING(
+                "No connection pool configured for this database; timing the unpooled path only."
+            ))
+
+        cases = [("list view", self._list_view)]
+        if not options['skip_task']:
+            cases.append(("send_whatsapp", self._send_whatsapp))
+
+        try:
+            for label, case in cases:
+                self._run(f"{label}, new connection each time", case, options, pool=None)
+                if connection.vendor == 'postgresql' and pool_options:
+                    self._run(f"{label}, pooled", case, options, pool=pool_options)
+        finally:
+            self._configure(pool_options)
+            MessageTask.objects.filter(recipient=self.RECIPIENT, message_body=self.BODY).delete()
+
+    #---------------------------------------------<> Cases <>---------------------------------------------#
+
+    RECIPIENT = '+250700000000'
+    BODY = 'benchmark_db_pool'
+
+    def _list_view(self):
+        # The page cache is switched off so every request reaches the database
+        view = ProductView.as_view(page_cache_namespaces=())
+        request = RequestFactory().get(reverse('admin-product'))
+        request.user = get_user_model()(username='benchmark', role='admin')
+        view(request).render()
+
+    def _send_whatsapp(self):
+        task = MessageTask.objects.create(recipient=self.RECIPIENT, message_body=self.BODY, scheduled_time=timezone.now())
+        sent = {'success': True, 'message_id': 'benchmark', 'raw': None, 'error': None}
+        with mock.patch.object(WhatsAppService, 'send_raw', return_value=sent), \
+                contextlib.redirect_stdout(io.StringIO()):
+            send_whatsapp.apply(args=[str(task.pk)])
+
+    #---------------------------------------------<> Runner <>---------------------------------------------#
+
+    def _configure(self, pool):
+        close_pools()
+        connection.close()
+        if pool:
+            connection.settings_dict['OPTIONS']['pool'] = pool
+        else:
+            connection.settings_dict.get('OPTIONS', {}).pop('pool', None)
+
+    def _run(self, label, case, options, pool):
+        self._configure(pool)
+        case()                  # warm-up: imports, template loading, pool start
+        connection.close()
+
+        timings = []
+        for _ in range(options['iterations']):
+            started = time.perf_counter()
+            case()
+            connection.close()  # what request_finished / task_postrun do
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"[{label}] {len(timings)} runs: mean {statistics.mean(timings):.2f}ms, "
+            f"p50 {statistics.median(timings):.2f}ms, p95 {p95:.2f}ms"
+        )
+        if pool:
+            self.stdout.write(f"  pool: {pool_stats().get(connection.alias)}")
@@ -0,0 +1,103 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from IMS_production import shards
+from IMS_production.ledger import InsufficientStock, sell
+from IMS_production.models import Category, Product, Sale
+
+
+class Command(BaseCommand):
+    help = (
+        "Run many threads selling the same SKU and report throughput, oversells and lost updates. "
+        "Use --legacy to compare against the old read-modify-write path and --shards N "
+        "to compare against sharded stock counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--sales-per-thread', type=int, default=50)
+        parser.add_argument('--stock', type=int, default=None,
+                            help="Initial stock (defaults to 3/4 of the attempted sales to force contention at zero)")
+        parser.add_argument('--legacy', action='store_true', help="Also run the read-modify-write path")
+        parser.add_argument('--shards', type=int, default=0, help="Also run with the stock spread over N shards")
+
+    def handle(self, *args, **options):
+        attempts = options['threads'] * options['sales_per_thread']
+        stock = options['stock'] if options['stock'] is not None else attempts * 3 // 4
+
+        self.stdout.write(f"{options['threads']} threads x {options['sales_per_thread']} sales, initial stock {stock}")
+        self._run("ledger", self._ledger_sale, stock, options)
+        if options['legacy']:
+            self._run("legacy", self._legacy_sale, stock, options)
+        if options['shards']:
+            self._run(f"sharded x{options['shards']}", self._ledger_sale, stock, options, shard_count=options['shards'])
+
+    #---------------------------------------------<> Sale paths <>---------------------------------------------#
+
+    @staticmethod
+    def _ledger_sale(product_id):
+        product = Product.objects.get(pk=product_id)
+        try:
+            sell(product, 1, product.price + 1)
+            return True
+        except InsufficientStock:
+            return False
+
+    @staticmethod
+    def _legacy_sale(product_id):
+        # What IMS_staff.converter did before the ledger: read, change in Python, save the whole row.
+        product = Product.objects.get(pk=product_id)
+        if product.quantity < 1:
+            return False
+        product.quantity -= 1
+        product.save()
+        Sale.objects.create(product=product, quantity=1, sale_price=product.price + 1, total_revenue=product.price + 1)
+        return True
+
+    #---------------------------------------------<> Runner <>---------------------------------------------#
+
+    def _run(self, label, sale, stock, options, shard_count=0):
+        category = Category.objects.create(name=f"bench-{uuid.uuid4().hex[:8]}", description="benchmark")
+        product = Product.objects.create(
+            name="bench", description="benchmark", category=category, price=Decimal("10.00"), quantity=stock,
+        )
+        if shard_count:
+            shards.enable(product, shard_count)
+        results = []
+        lock = threading.Lock()
+
+        def worker():
+            sold = 0
+            try:
+                for _ in range(options['sales_per_thread']):
+                    if sale(product.pk):
+                        sold += 1
+            finally:
+                connection.close()
+            with lock:
+                results.append(sold)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        sold = sum(results)
+        shards.fold(product.pk)
+        product.refresh_from_db()
+        rows = Sale.objects.filter(product=product).count()
+        lost = product.quantity - (stock - sold)
+
+        self.stdout.write(
+            f"[{label}] {sold} sales in {elapsed:.2f}s ({sold / elapsed:.0f} sales/s); "
+            f"final stock {product.quantity}, sale rows {rows}, lost updates {lost}, "
+            f"oversold {max(0, sold - stock)}"
+        )
+        category.delete()
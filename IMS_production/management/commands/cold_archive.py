@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from IMS_production import coldstore
+from IMS_production.models import ArchivedPeriod, Sale, StockMovement
+
+MODELS = {'sale': Sale, 'stockmovement': StockMovement}
+
+
+class Command(BaseCommand):
+    help = (
+        "List the months of sales and stock movements moved to cold storage, archive the closed "
+        "ones (older than --after months) or a single --month, and --verify that every archived "
+        "file still reads back to the totals recorded when it was written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run', action='store_true', help="Archive every month older than --after months")
+        parser.add_argument('--after', type=int, default=coldstore.COLD_ARCHIVE_AFTER_MONTHS)
+        parser.add_argument('--month', metavar='YYYY-MM', help="Archive this month")
+        parser.add_argument('--model', choices=sorted(MODELS), help="Table to archive --month from (both by default)")
+        parser.add_argument('--verify', action='store_true', help="Read every archived file back and check its totals")
+
+    def handle(self, *args, **options):
+        if options['run']:
+            periods = coldstore.archive_closed_periods(options['after'])
+            for period in periods:
+                self.stdout.write(self.style.SUCCESS(f"Archived {period.source} {period.month:%Y-%m}: {period.rows} rows"))
+            if not periods:
+                self.stdout.write("Nothing to archive")
+
+        if options['month']:
+            try:
+                month = date.fromisoformat(f"{options['month']}-01")
+            except ValueError:
+                raise CommandError("--month takes a month as YYYY-MM")
+            models = [MODELS[options['model']]] if options['model'] else list(MODELS.values())
+            for model in models:
+                try:
+                    period = coldstore.archive_period(model, month)
+                except coldstore.ArchiveError as error:
+                    raise CommandError(str(error))
+                if period is None:
+                    self.stdout.write(f"No {model._meta.db_table} rows in {month:%Y-%m}")
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"Archived {period.source} {month:%Y-%m}: {period.rows} rows"))
+
+        failed = 0
+        self.stdout.write(self.style.MIGRATE_HEADING("Archived periods"))
+        for period in ArchivedPeriod.objects.order_by('source', 'month'):
+            line = f"  {period.source:<14} {period.month:%Y-%m} {period.rows:>9} rows {period.size // 1024:>7}kB  {period.file}"
+            if options['verify']:
+                try:
+                    coldstore.verify_period(period)
+                except (coldstore.ArchiveError, OSError) as error:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"{line}  FAILED: {error}"))
+                    continue
+                line += "  ok"
+            self.stdout.write(line)
+        if failed:
+            raise CommandError(f"{failed} archived period(s) failed verification")
@@ -0,0 +1,47 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from IMS_production import partitions
+from IMS_production.models import Sale, StockMovement
+
+MODELS = {'sale': Sale, 'stockmovement': StockMovement}
+
+
+class Command(BaseCommand):
+    help = (
+        "List the monthly partitions of the Sale and StockMovement tables (PostgreSQL), create the "
+        "upcoming ones, or detach a past month. A detached month keeps its rows in a standalone "
+        "table named after the partition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--create', action='store_true', help="Create missing partitions up to --ahead months out")
+        parser.add_argument('--ahead', type=int, default=partitions.PARTITION_MONTHS_AHEAD)
+        parser.add_argument('--detach', metavar='YYYY-MM', help="Detach this month")
+        parser.add_argument('--model', choices=sorted(MODELS), help="Table to detach from (both by default)")
+
+    def handle(self, *args, **options):
+        if not any(partitions.is_partitioned(model) for model in MODELS.values()):
+            raise CommandError("No partitioned tables: partitioning needs PostgreSQL and migration 0011.")
+
+        if options['create']:
+            created = partitions.ensure_partitions(options['ahead'])
+            self.stdout.write(self.style.SUCCESS(f"Created {', '.join(created)}" if created else "Nothing to create"))
+
+        if options['detach']:
+            try:
+                month = date.fromisoformat(f"{options['detach']}-01")
+            except ValueError:
+                raise CommandError("--detach takes a month as YYYY-MM")
+            models = [MODELS[options['model']]] if options['model'] else list(MODELS.values())
+            for model in models:
+                try:
+                    name = partitions.detach_partition(model, month)
+                except ValueError as error:
+                    raise CommandError(str(error))
+                self.stdout.write(self.style.SUCCESS(f"Detached {name}"))
+
+        for model in MODELS.values():
+            self.stdout.write(self.style.MIGRATE_HEADING(model._meta.db_table))
+            for name, month, rows in partitions.partitions(model):
+                self.stdout.write(f"  {name:<45} {f'{month:%Y-%m}' if month else 'default':<8} ~{rows} rows")
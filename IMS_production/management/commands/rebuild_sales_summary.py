@@ -0,0 +1,108 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from IMS_production import coldstore, rollups
+from IMS_production.cache import SALES, invalidate
+from IMS_production.models import Product, Sale, SalesSummary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily, weekly and monthly SalesSummary buckets from Sale. "
+        "Products are rebuilt a range at a time, each range summed by the database and swapped in "
+        "with its old buckets in one short transaction, so dashboards keep reading the old totals "
+        "until the new ones are complete. Summary writes (new and edited sales) wait only for the "
+        "range being swapped, so none is lost or counted twice. "
+        "Months moved to cold storage are read back from their files and counted too."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Buckets inserted per statement")
+        parser.add_argument('--products-per-transaction', type=int, default=200,
+                            help="Products whose buckets are swapped in one transaction")
+        parser.add_argument('--product', type=int, action='append', dest='products',
+                            help="Only rebuild this product id (repeatable)")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        products = Product.objects.order_by('pk')
+        if options['products']:
+            products = products.filter(pk__in=options['products'])
+        product_ids = list(products.values_list('pk', flat=True))
+
+        # Archived months never change: read them once, before any lock is taken
+        archived, archived_sales = self._archived_buckets(set(product_ids))
+
+        deleted = buckets = 0
+        step = options['products_per_transaction']
+        for offset in range(0, len(product_ids), step):
+            replaced, written = self._swap(product_ids[offset:offset + step], archived, chunk_size)
+            deleted += replaced
+            buckets += written
+        # The buckets were written without signals
+        invalidate(SALES)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Replaced {deleted} summary rows with {buckets} buckets ({archived_sales} archived sales added)"
+        ))
+
+    def _swap(self, product_ids, archived, chunk_size):
+        """Replace the buckets of ``product_ids``; ``(rows deleted, buckets written)``."""
+        sales = Sale.objects.order_by().filter(product_id__in=product_ids)
+        with transaction.atomic():
+            # Sales committing from here on wait on the summary table until this range
+            # commits and then add themselves to the new buckets; the sums below only
+            # see sales committed before. (SQLite: the delete takes the write lock.)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LOCK TABLE {connection.ops.quote_name(SalesSummary._meta.db_table)} IN EXCLUSIVE MODE")
+            deleted, _ = SalesSummary.objects.filter(product_id__in=product_ids).delete()
+
+            written = 0
+            for period, start in (('day', F('sale_date')), ('week', TruncWeek('sale_date')), ('month', TruncMonth('sale_date'))):
+                rows = (
+                    sales.annotate(start=start).values('product_id', 'start')
+                    .annotate(sold=Sum('quantity'), revenue=Sum('total_revenue'))
+                    .values_list('product_id', 'start', 'sold', 'revenue')
+                )
+                written += self._insert(period, rows.iterator(chunk_size=chunk_size), chunk_size)
+            rollups.apply_deltas([delta for pk in product_ids for delta in archived.get(pk, ())])
+        return deleted, written
+
+    @staticmethod
+    def _insert(period, rows, chunk_size):
+        batch, written = [], 0
+        for product_id, start, sold, revenue in rows:
+            batch.append(SalesSummary(
+                product_id=product_id, period=period, period_start=start, total_sold=sold, total_revenue=revenue,
+            ))
+            if len(batch) == chunk_size:
+                written += len(SalesSummary.objects.bulk_create(batch))
+                batch = []
+        return written + len(SalesSummary.objects.bulk_create(batch))
+
+    @staticmethod
+    def _archived_buckets(product_ids):
+        """``({product_id: [bucket delta, ...]}, sales read)`` summed from the archived sales of ``product_ids``."""
+        # Buckets of deleted products went with them; their archived sales stay out
+        buckets = defaultdict(lambda: defaultdict(lambda: [0, Decimal(0)]))
+        columns = ('product_id', 'sale_date', 'quantity', 'total_revenue')
+
+        read = 0
+        for row in coldstore.archived_rows(Sale, columns=columns):
+            if row['product_id'] not in product_ids:
+                continue
+            for product_id, period, start, sold, revenue in rollups.sale_deltas(
+                row['product_id'], row['sale_date'], row['quantity'], row['total_revenue'],
+            ):
+                bucket = buckets[product_id][(period, start)]
+                bucket[0] += sold
+                bucket[1] += revenue
+            read += 1
+        return {
+            product_id: [(product_id, period, start, sold, revenue) for (period, start), (sold, revenue) in sums.items()]
+            for product_id, sums in buckets.items()
+        }, read
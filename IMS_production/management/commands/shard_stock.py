@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from IMS_production import shards
+from IMS_production.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Turn sharded stock counters on or off for hot SKUs. Sharded products take sales "
+        "on one of --shards sub-counter rows and their quantity is folded back every minute."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('skus', nargs='+')
+        parser.add_argument('--shards', type=int, default=8)
+        parser.add_argument('--off', action='store_true', help="Fold the shards back into the product row")
+
+    def handle(self, *args, **options):
+        for sku in options['skus']:
+            product = Product.objects.filter(sku=sku).first()
+            if product is None:
+                raise CommandError(f"No product with SKU '{sku}'")
+            if options['off']:
+                shards.disable(product)
+                self.stdout.write(f"{sku}: single row, quantity {product.quantity}")
+            else:
+                shards.enable(product, options['shards'])
+                self.stdout.write(f"{sku}: {options['shards']} shards, quantity {product.quantity}")
@@ -0,0 +1,46 @@
+import logging
+from .replica import pin, replica_alias
+
+logger = logging.getLogger(__name__)
+
+
+class FragmentCacheStatsMiddleware:
+    """
+    Report the {% cacherow %}/{% cachetable %} hits of a request.
+
+    Adds ``X-Fragment-Cache: row=45/50; table=0/1`` (hits/lookups) to responses
+    that rendered cached fragments, and logs the same line at DEBUG.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        stats = getattr(request, 'fragment_cache_stats', None)
+        if stats:
+            report = '; '.join(f"{kind}={hits}/{hits + misses}" for kind, (hits, misses) in sorted(stats.items()))
+            response.headers['X-Fragment-Cache'] = report
+            logger.debug("fragment cache %s %s", request.path, report)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin a session to the primary database after a write.
+
+    Any non-GET request counts as a write; for the next REPLICA_PIN_SECONDS
+    the session's @use_replica views read from the primary, so a redirect
+    after "Product created" lists the new product even if the replica lags.
+    Must come after SessionMiddleware.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in self.SAFE_METHODS and response.status_code < 500 and replica_alias():
+            pin(request)
+        return response
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def clear_legacy_summaries(apps, schema_editor):
+    # The old post_save handler only ever created one lifetime row per product and
+    # never updated it, so those totals are wrong. `manage.py rebuild_sales_summary`
+    # recomputes the daily/weekly/monthly buckets from Sale.
+    SalesSummary = apps.get_model('IMS_production', 'SalesSummary')
+    SalesSummary.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('IMS_production', '0005_alter_sale_sale_price_alter_sale_total_revenue'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_legacy_summaries, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='salessummary',
+            name='period',
+            field=models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], default='day', max_length=5, verbose_name='Period'),
+        ),
+        migrations.AddField(
+            model_name='salessummary',
+            name='period_start',
+            field=models.DateField(default=django.utils.timezone.now, verbose_name='Period Start'),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='salessummary',
+            name='total_revenue',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name='salessummary',
+            name='total_sold',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='salessummary',
+            index=models.Index(fields=['period', 'period_start'], name='IMS_product_period_1ffebc_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='salessummary',
+            constraint=models.UniqueConstraint(fields=('product', 'period', 'period_start'), name='unique_sales_summary_bucket'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.1.3 on 2026-10-17 09:12
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Product.search_vector is maintained by triggers rather than by Django because it
+# includes the category name, which a GeneratedField cannot read. The pg_trgm indexes
+# are on UPPER(column) because that is what Django's icontains lookup compiles to.
+# Every sale updates the product row (quantity), so the vector is only rebuilt when
+# name, sku or category actually change; renaming a category rebuilds its products.
+CREATE_SQL = """
+CREATE OR REPLACE FUNCTION ims_product_search_document(p_name text, p_sku text, p_category_id bigint)
+RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector('simple', coalesce(p_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(p_sku, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(
+            (SELECT name FROM {category} WHERE id = p_category_id), '')), 'B')
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION ims_product_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := ims_product_search_document(NEW.name, NEW.sku, NEW.category_id);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ims_product_search_vector_insert
+    BEFORE INSERT ON {product}
+    FOR EACH ROW EXECUTE FUNCTION ims_product_search_vector();
+
+CREATE TRIGGER ims_product_search_vector_update
+    BEFORE UPDATE OF name, sku, category_id ON {product}
+    FOR EACH ROW WHEN (
+        OLD.name IS DISTINCT FROM NEW.name
+        OR OLD.sku IS DISTINCT FROM NEW.sku
+        OR OLD.category_id IS DISTINCT FROM NEW.category_id
+    )
+    EXECUTE FUNCTION ims_product_search_vector();
+
+CREATE OR REPLACE FUNCTION ims_category_search_vector() RETURNS trigger AS $$
+BEGIN
+    UPDATE {product} SET search_vector = ims_product_search_document(name, sku, category_id)
+    WHERE category_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ims_category_search_vector
+    AFTER UPDATE OF name ON {category}
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION ims_category_search_vector();
+
+UPDATE {product} SET search_vector = ims_product_search_document(name, sku, category_id);
+
+CREATE INDEX product_search_vector_gin ON {product} USING gin (search_vector);
+CREATE INDEX product_name_trgm ON {product} USING gin (UPPER(name) gin_trgm_ops);
+CREATE INDEX product_sku_trgm ON {product} USING gin (UPPER(sku) gin_trgm_ops);
+CREATE INDEX category_name_trgm ON {category} USING gin (UPPER(name) gin_trgm_ops);
+"""
+
+DROP_SQL = """
+DROP INDEX IF EXISTS category_name_trgm;
+DROP INDEX IF EXISTS product_sku_trgm;
+DROP INDEX IF EXISTS product_name_trgm;
+DROP INDEX IF EXISTS product_search_vector_gin;
+DROP TRIGGER IF EXISTS ims_category_search_vector ON {category};
+DROP FUNCTION IF EXISTS ims_category_search_vector();
+DROP TRIGGER IF EXISTS ims_product_search_vector_update ON {product};
+DROP TRIGGER IF EXISTS ims_product_search_vector_insert ON {product};
+DROP FUNCTION IF EXISTS ims_product_search_vector();
+DROP FUNCTION IF EXISTS ims_product_search_document(text, text, bigint);
+"""
+
+
+def _run(sql, apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        # Other backends keep search_vector empty; IMS_production.search falls back to icontains
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute(sql.format(
+        product=quote(apps.get_model('IMS_production', 'Product')._meta.db_table),
+        category=quote(apps.get_model('IMS_production', 'Category')._meta.db_table),
+    ), params=None)
+
+
+def create_search_backend(apps, schema_editor):
+    _run(CREATE_SQL, apps, schema_editor)
+
+
+def drop_search_backend(apps, schema_editor):
+    _run(DROP_SQL, apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('IMS_production', '0006_salessummary_buckets'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_backend, drop_search_backend),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('IMS_production', '0007_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('quantity', models.IntegerField(verbose_name='Quantity')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Price')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='IMS_production.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='IMS_product_date_4f09d5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'date'), name='unique_stock_snapshot_per_day')],
+            },
+        ),
+    ]
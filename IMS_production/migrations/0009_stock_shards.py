@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('IMS_production', '0008_stocksnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Stock Shards'),
+        ),
+        migrations.CreateModel(
+            name='StockShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Shard')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Quantity')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shards', to='IMS_production.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('product', 'shard'), name='unique_stock_shard'), models.CheckConstraint(condition=models.Q(('quantity__gte', 0)), name='stock_shard_not_negative')],
+            },
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:34
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import RemoveIndexConcurrently as PostgresRemoveIndexConcurrently
+from django.db import migrations, models
+
+# Product, Sale, StockMovement and the summaries are written on every sale, so
+# on PostgreSQL the indexes are dropped CONCURRENTLY (no write lock), including
+# the ones that go with db_index on the foreign keys; a plain AlterField would
+# also drop and re-validate the foreign key. Other databases get the plain
+# operations. Same operations as sms_tasks 0002.
+
+
+class RemoveIndexConcurrently(PostgresRemoveIndexConcurrently):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return migrations.RemoveIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return migrations.RemoveIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class DropFieldIndexConcurrently(migrations.AlterField):
+    """AlterField that only turns db_index off; the index is dropped CONCURRENTLY."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        # Same lookup AlterField does, minus the indexes declared in Meta
+        meta_index_names = {index.name for index in model._meta.indexes}
+        column = model._meta.get_field(self.name).column
+        for name in schema_editor._constraint_names(model, [column], index=True, type_=models.Index.suffix, exclude=meta_index_names):
+            schema_editor.execute(schema_editor._delete_index_sql(model, name, concurrently=True))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        field = model._meta.get_field(self.name)
+        schema_editor.execute(schema_editor._create_index_sql(model, fields=[field], concurrently=True))
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('IMS_production', '0009_stock_shards'),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name='category',
+            name='IMS_product_name_e235bd_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='product',
+            name='IMS_product_sku_bfdc72_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='product',
+            name='IMS_product_price_460f91_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='product',
+            name='IMS_product_quantit_cd03d9_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='product',
+            name='IMS_product_name_334d5b_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='sale',
+            name='IMS_product_product_295811_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='salessummary',
+            name='IMS_product_product_e58cb0_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='salessummary',
+            name='IMS_product_report__c7a166_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='salessummary',
+            name='IMS_product_total_s_216996_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='salessummary',
+            name='IMS_product_total_r_aa84db_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='stockmovement',
+            name='IMS_product_product_39a813_idx',
+        ),
+        DropFieldIndexConcurrently(
+            model_name='product',
+            name='category',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='products', to='IMS_production.category'),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='salessummary',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sales_summary', to='IMS_production.product'),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='stockshard',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='stock_shards', to='IMS_production.product'),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='stocksnapshot',
+            name='product',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='IMS_production.product'),
+        ),
+    ]
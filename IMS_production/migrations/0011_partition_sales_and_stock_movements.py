@@ -0,0 +1,152 @@
+from django.db import migrations, models
+
+# Rebuild Sale and StockMovement as tables range-partitioned by month on
+# PostgreSQL (see IMS_production.partitions). Nothing changes for Django: the
+# columns, index names and foreign keys are the same, ids keep counting from
+# where they were. Other backends are left alone.
+#
+# A partitioned table's primary key must include the partition key, so it
+# becomes (id, <key>); id still comes from one sequence and stays unique. The
+# rows are copied while the tables are locked, so run this in a quiet window.
+#
+# StockMovement.created_at was auto_now, so every save() would have moved an
+# edited row into the current month's partition; it becomes auto_now_add first
+# (no database change).
+
+PARTITIONED = (
+    ('Sale', 'sale_date'),
+    ('StockMovement', 'created_at'),
+)
+
+# Months before the current one get a partition only if they hold rows; this
+# month and the next few always do. IMS_production.tasks.create_partitions
+# keeps creating them ahead from there.
+MONTHS_AHEAD = 3
+
+
+def _table_ddl(cursor, table):
+    """The primary key name, index definitions and foreign keys of ``table``."""
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [f'"{table}"']
+    )
+    primary_key = cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+        [table, primary_key],
+    )
+    indexes = [definition.replace(' ON ONLY ', ' ON ') for definition, in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [f'"{table}"'],
+    )
+    return primary_key, indexes, cursor.fetchall()
+
+
+def _is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = %s AND pg_catalog.pg_table_is_visible(c.oid)",
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def _recreate(schema_editor, table, primary_key_columns, ddl):
+    primary_key, indexes, foreign_keys = ddl
+    quote = schema_editor.quote_name
+    schema_editor.execute(
+        f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(primary_key)} PRIMARY KEY ({primary_key_columns})"
+    )
+    for definition in indexes:
+        schema_editor.execute(definition)
+    for name, definition in foreign_keys:
+        schema_editor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}")
+
+
+def partition(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for model_name, key in PARTITIONED:
+        model = apps.get_model('IMS_production', model_name)
+        table, column = model._meta.db_table, model._meta.get_field(key).column
+        timestamp = model._meta.get_field(key).get_internal_type() == 'DateTimeField'
+        legacy = f'{table}_unpartitioned'
+
+        with schema_editor.connection.cursor() as cursor:
+            if _is_partitioned(cursor, table):
+                continue
+            ddl = _table_ddl(cursor, table)
+            cursor.execute(
+                f"SELECT DISTINCT date_trunc('month', {quote(column)})::date FROM {quote(table)} "
+                f"UNION SELECT (date_trunc('month', now()) + make_interval(months => n))::date "
+                f"FROM generate_series(0, %s) AS n ORDER BY 1",
+                [MONTHS_AHEAD],
+            )
+            months = [month for month, in cursor.fetchall()]
+
+        schema_editor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}")
+        schema_editor.execute(
+            f"CREATE TABLE {quote(table)} (LIKE {quote(legacy)} INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE ({quote(column)})"
+        )
+        for month in months:
+            following = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+            start, end = (f"{m.isoformat()} 00:00:00+00" if timestamp else m.isoformat() for m in (month, following))
+            schema_editor.execute(
+                f"CREATE TABLE {quote(f'{table}_p{month:%Y_%m}')} PARTITION OF {quote(table)} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        schema_editor.execute(f"CREATE TABLE {quote(f'{table}_pdefault')} PARTITION OF {quote(table)} DEFAULT")
+
+        schema_editor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(legacy)}")
+        schema_editor.execute(f"DROP TABLE {quote(legacy)}")
+
+        sequence = quote(f'{table}_id_seq')
+        schema_editor.execute(f"CREATE SEQUENCE {sequence} AS bigint OWNED BY {quote(table)}.id")
+        schema_editor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+        schema_editor.execute(f"SELECT setval('{sequence}', COALESCE(MAX(id), 0) + 1, false) FROM {quote(table)}")
+        _recreate(schema_editor, table, f"id, {quote(column)}", ddl)
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for model_name, key in PARTITIONED:
+        table = apps.get_model('IMS_production', model_name)._meta.db_table
+        partitioned = f'{table}_partitioned'
+
+        with schema_editor.connection.cursor() as cursor:
+            if not _is_partitioned(cursor, table):
+                continue
+            ddl = _table_ddl(cursor, table)
+
+        schema_editor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(partitioned)}")
+        schema_editor.execute(
+            f"CREATE TABLE {quote(table)} (LIKE {quote(partitioned)} INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+        )
+        schema_editor.execute(f"INSERT INTO {quote(table)} SELECT * FROM {quote(partitioned)}")
+        schema_editor.execute(f"DROP TABLE {quote(partitioned)} CASCADE")
+        schema_editor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        schema_editor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{quote(table)}', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+            f"FROM {quote(table)}"
+        )
+        _recreate(schema_editor, table, 'id', ddl)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('IMS_production', '0010_drop_redundant_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('IMS_production', '0012_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('sale', 'Sale'), ('stockmovement', 'Stock Movement')], max_length=20, verbose_name='Source')),
+                ('month', models.DateField(verbose_name='Month')),
+                ('file', models.CharField(max_length=255, verbose_name='File')),
+                ('rows', models.PositiveIntegerField(verbose_name='Rows')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Size')),
+                ('totals', models.JSONField(default=dict, verbose_name='Totals')),
+                ('bounds', models.JSONField(default=dict, verbose_name='Bounds')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source', 'month'), name='unique_archived_period')],
+            },
+        ),
+    ]
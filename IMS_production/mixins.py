@@ -0,0 +1,263 @@
+import base64
+import hashlib
+import json
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from utils.http import not_modified, queryset_validators, set_validators, vary_etag
+from .cache import cached, version
+from .coldstore import COLUMNS as ARCHIVED_COLUMNS, export_rows, has_archive
+from .exports import CONTENT_TYPES, EXPORT_FIELDS, stream_queryset
+from .replica import replica_reads
+from .search import SEARCH_RANK, QuerySyntaxError
+
+
+#---------------------------------------------<> Read replica <>---------------------------------------------#
+
+class ReplicaReadMixin:
+    """Serve a read-only view from the replica database (the class-based ``use_replica``)."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(request):
+            return super().dispatch(request, *args, **kwargs)
+
+
+#---------------------------------------------<> Export <>---------------------------------------------#
+
+class ExportMixin:
+    """
+    Adds ``?format=csv|ndjson`` to a ListView.
+
+    The export runs the view's own ``get_queryset()``, so every search filter
+    applies, and streams the rows instead of rendering the HTML table. Sales
+    and stock movements moved to cold storage follow the live rows, matched
+    against the same ``?q=`` by the view's ``search_syntax``.
+    """
+    export_fields = None          # defaults to exports.EXPORT_FIELDS[model]
+    export_chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('format', '').lower()
+        if export_format in CONTENT_TYPES:
+            queryset = self.get_queryset()
+            if queryset is None:
+                # Search views return None after flagging an invalid query
+                queryset = self.model._default_manager.none()
+            # Rows are streamed after dispatch returns, so fix the database chosen now
+            queryset = queryset.using(queryset.db)
+            return stream_queryset(
+                request, queryset, export_format,
+                fields=self.export_fields, chunk_size=self.export_chunk_size,
+                extra_rows=self.get_archived_export_rows(),
+            )
+        return super().get(request, *args, **kwargs)
+
+    def get_archived_export_rows(self):
+        """Archived rows matching the search, in export field order; None if there are none to add."""
+        if self.model not in ARCHIVED_COLUMNS or not has_archive(self.model):
+            return None
+        query = self.request.GET.get('q', '').strip()
+        syntax = getattr(self, 'search_syntax', None)
+        try:
+            row_filter = syntax.row_filter(self.model, query) if syntax is not None and query else None
+        except QuerySyntaxError:
+            return None
+        return export_rows(self.model, self.export_fields or EXPORT_FIELDS[self.model], row_filter)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['export_formats'] = list(CONTENT_TYPES)
+        return context
+
+
+#---------------------------------------------<> Conditional GET <>---------------------------------------------#
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified for a ListView, answering 304 before anything is rendered.
+
+    The validators come from one aggregate over the filtered queryset (newest
+    ``conditional_field``, row count), salted with the versions of the view's
+    ``page_cache_namespaces`` so writes that leave the timestamp alone
+    (queryset updates, auto_now_add columns) still change it. Every write
+    bumps those versions, so the aggregate is cached under them and a repeat
+    request costs cache reads only. That watermark is also in the context as
+    ``list_watermark`` for {% cachetable %}; the ETag adds the user to it.
+    """
+    conditional_field = 'created_at'
+    conditional_cache_timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60)
+
+    def get_conditional_salt(self):
+        namespaces = getattr(self, 'page_cache_namespaces', ())
+        return tuple(version(namespace) for namespace in namespaces)
+
+    def get_conditional_cache_key(self):
+        view = f'{type(self).__module__}.{type(self).__qualname__}'
+        role = getattr(self.request.user, 'role', '') or 'anonymous'
+        # Every page of a listing shares the aggregate
+        params = self.request.GET.copy()
+        for name in ('after', 'before'):
+            params.pop(name, None)
+        query = hashlib.md5(params.urlencode().encode()).hexdigest()
+        return f'validators:{role}:{view}:{query}:{self.object_list.db}'
+
+    def get_list_validators(self):
+        namespaces = tuple(getattr(self, 'page_cache_namespaces', ()))
+        compute = lambda: queryset_validators(
+            self.object_list, self.conditional_field, *self.get_conditional_salt(),
+        )
+        if not namespaces:
+            return compute()
+        return cached(namespaces, self.get_conditional_cache_key(), compute, timeout=self.conditional_cache_timeout)
+
+    def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        if self.object_list is None:
+            self.object_list = self.model._default_manager.none()
+        self.list_watermark, last_modified = self.get_list_validators()
+        etag = vary_etag(self.list_watermark, request.user.pk)
+
+        # Flash messages (e.g. "Product created", a search syntax error) live only in a fresh render
+        if not len(get_messages(request)):
+            response = not_modified(request, etag, last_modified)
+            if response is not None:
+                return response
+
+        context = self.get_context_data(list_watermark=self.list_watermark)
+        return set_validators(self.render_to_response(context), etag, last_modified)
+
+
+#---------------------------------------------<> Keyset pagination <>---------------------------------------------#
+
+class KeysetPaginationMixin:
+    """
+    Seek pagination for ListViews: each page is one indexed range scan.
+
+    Rows are ordered by ``keyset_fields`` (``-`` for descending, the last field
+    must be unique) and the page boundary travels in an opaque ``after`` or
+    ``before`` cursor, so page N costs the same as page 1 instead of an
+    ever-growing OFFSET or COUNT(*). The fields must never change once a row
+    exists, or rows jump across the cursor while someone pages: auto_now
+    columns (Product.created_at, Category.created) don't
+    qualify, so the default is the primary key, newest first.
+    """
+    keyset_fields = ('-id',)
+    keyset_page_size = getattr(settings, 'LIST_PAGE_SIZE', 50)
+
+    def get_keyset_ordering(self):
+        ordering = list(self.keyset_fields)
+        queryset = getattr(self, 'object_list', None)
+        if queryset is not None and SEARCH_RANK in queryset.query.annotations:
+            # Ranked search: best match first, the unique field breaks ties
+            ordering = [f'-{SEARCH_RANK}', ordering[-1]]
+        return ordering
+
+    #---------------------------------------------<> Cursors <>---------------------------------------------#
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, name.lstrip('-')) for name in self.get_keyset_ordering()]
+        # isoformat() keeps the microseconds DjangoJSONEncoder would round away
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        raw = json.dumps(values, cls=DjangoJSONEncoder).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return the keyset values of a cursor, or None if it is missing or malformed."""
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw)
+            names = [name.lstrip('-') for name in self.get_keyset_ordering()]
+            if len(values) != len(names):
+                return None
+            # Annotations such as the search rank are plain JSON numbers
+            return [
+                value if name == SEARCH_RANK else self.model._meta.get_field(name).to_python(value)
+                for name, value in zip(names, values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    def _seek(self, values, forward):
+        """Q for rows strictly after (or before) ``values`` in the keyset order."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.get_keyset_ordering(), values):
+            field = name.lstrip('-')
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    #---------------------------------------------<> Paging <>---------------------------------------------#
+
+    def paginate_keyset(self, queryset):
+        ordering = self.get_keyset_ordering()
+        size = self.keyset_page_size
+        after = self.decode_cursor(self.request.GET.get('after'))
+        before = None if after else self.decode_cursor(self.request.GET.get('before'))
+
+        if before:
+            reverse = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+            rows = list(queryset.filter(self._seek(before, forward=False)).order_by(*reverse)[:size + 1])
+            has_previous, has_next = len(rows) > size, True
+            page = rows[:size][::-1]
+        else:
+            if after:
+                queryset = queryset.filter(self._seek(after, forward=True))
+            rows = list(queryset.order_by(*ordering)[:size + 1])
+            has_previous, has_next = bool(after), len(rows) > size
+            page = rows[:size]
+
+        return {
+            'page': page,
+            'has_next': has_next and bool(page),
+            'has_previous': has_previous and bool(page),
+            'next_cursor': self.encode_cursor(page[-1]) if page else '',
+            'previous_cursor': self.encode_cursor(page[0]) if page else '',
+        }
+
+    def get_context_data(self, **kwargs):
+        queryset = kwargs.pop('object_list', self.object_list)
+        if queryset is None:
+            queryset = self.model._default_manager.none()
+
+        keyset = self.paginate_keyset(queryset)
+        context = super().get_context_data(object_list=keyset.pop('page'), **kwargs)
+        context['keyset'] = keyset
+        return context
+
+
+#---------------------------------------------<> Page cache <>---------------------------------------------#
+
+class CachedPageMixin:
+    """
+    Caches the rows of a keyset-paginated list page, per role.
+
+    Only the evaluated page is cached, not the HTML, so the user name, messages
+    and CSRF token still render per request and the search parser still
+    reports bad queries. Entries are keyed on the user's role, the view, the
+    query string and the database read (replica or primary), and go stale as soon as any of ``page_cache_namespaces`` is
+    invalidated by a write.
+    """
+    page_cache_namespaces = ()
+    page_cache_timeout = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60)
+
+    def get_page_cache_key(self):
+        view = f'{type(self).__module__}.{type(self).__qualname__}'
+        role = getattr(self.request.user, 'role', '') or 'anonymous'
+        query = hashlib.md5(self.request.GET.urlencode().encode()).hexdigest()
+        return f'page:{role}:{view}:{query}'
+
+    def paginate_keyset(self, queryset):
+        if not self.page_cache_namespaces:
+            return super().paginate_keyset(queryset)
+        return cached(
+            self.page_cache_namespaces, f'{self.get_page_cache_key()}:{queryset.db}',
+            lambda: super(CachedPageMixin, self).paginate_keyset(queryset),
+            timeout=self.page_cache_timeout,
+        )
@@ -1,3 +1,5 @@
+from django.contrib.postgres.search import SearchVectorField
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -10,13 +12,14 @@ class Category(models.Model):
     name = models.CharField(_("Category"), max_length=50)
     description = models.TextField(_("Description"))
     created = models.DateTimeField(auto_now=True)
+    # Set while IMS_production.deletion removes the category in the background
+    pending_deletion = models.BooleanField(default=False)
     
     def __str__(self):
         return f"Category: {self.name}"
 
     class Meta:
         indexes = [
-            models.Index(fields=['name']),
             models.Index(fields=['created']),
             models.Index(fields=['name','created']),
         ]
@@ -25,11 +28,18 @@ class Product(models.Model):
     name = models.CharField(_("Product Name"), max_length=50)
     sku = models.CharField(max_length=50, unique=True)
     description = models.TextField(_("Description"))
-    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
+    # db_index=False: unique_product_name_per_category leads with category
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products', db_index=False)
     price = models.DecimalField(_("Price"), max_digits=10, decimal_places=2, default=0.00)
     quantity = models.IntegerField(_("Quantity"))
     created_at = models.DateTimeField(auto_now=True)
     updated_at = models.DateTimeField(auto_now_add=True)
+    # >0 spreads stock over that many StockShard rows for hot SKUs (IMS_production.shards)
+    shard_count = models.PositiveSmallIntegerField(_("Stock Shards"), default=0)
+    # Name, SKU and category name as a tsvector, kept current by a PostgreSQL trigger (IMS_production.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Set while IMS_production.deletion removes the product in the background
+    pending_deletion = models.BooleanField(default=False)
     
     def save(self, *args, **kwargs):
         if not self.sku:
@@ -48,13 +58,12 @@ class Product(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['category', 'name'], name='unique_product_name_per_category')
         ]
+        # Every sale rewrites quantity (see ledger.adjust_stock), so no index
+        # includes it; sku is already indexed by its unique constraint.
+        # `manage.py audit_indexes` reports what is left unused.
         indexes = [
             models.Index(fields=['name']),
-            models.Index(fields=['sku']),
-            models.Index(fields=['price']),
             models.Index(fields=['price', 'name']),
-            models.Index(fields=['quantity']),
-            models.Index(fields=['name', 'price', 'quantity']),
             models.Index(fields=['created_at']),
         ]
 
@@ -69,14 +78,14 @@ class StockMovement(models.Model):
     movement_type = models.CharField(_("Movement Type"), choices=MOVES, max_length=50)
     quantity = models.IntegerField(_("Quantity"))
     reason = models.CharField(_("Reason"), max_length=100)
-    created_at = models.DateTimeField(auto_now=True)
+    # Set once: the table is partitioned and archived by month on it (IMS_production.partitions)
+    created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self) -> str:
         return f"Movement: {self.movement_type} for Product: {self.product.name}"
     
     class Meta:
         indexes = [
-            models.Index(fields=['product']),
             models.Index(fields=['movement_type']),
             models.Index(fields=['created_at']),
         ]
@@ -101,25 +110,137 @@ class Sale(models.Model):
     
     class Meta:
         indexes = [
-            models.Index(fields=['product']),
             models.Index(fields=['sale_date']),
             models.Index(fields=['created_at']),
         ]
 
 
 class SalesSummary(models.Model):
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sales_summary")
-    total_sold = models.IntegerField()
-    total_revenue = models.DecimalField(max_digits=10, decimal_places=2)
+    PERIODS = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="sales_summary", db_index=False)
+    period = models.CharField(_("Period"), choices=PERIODS, max_length=5, default='day')
+    period_start = models.DateField(_("Period Start"))
+    total_sold = models.IntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=20, decimal_places=2, default=0)
     report_date = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"Sales Summary for {self.product.name} on {self.report_date}"
+        return f"Sales Summary for {self.product.name} ({self.period} of {self.period_start})"
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'period', 'period_start'], name='unique_sales_summary_bucket')
+        ]
+        # Each sale upserts three buckets and rewrites total_sold, total_revenue
+        # and report_date, so those stay unindexed. Product lookups use the
+        # unique constraint.
+        indexes = [
+            models.Index(fields=['period', 'period_start']),
+        ]
+
+
+class StockShard(models.Model):
+    """One slice of a hot product's stock; sales decrement a random shard instead of the product row."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_shards', db_index=False)
+    shard = models.PositiveSmallIntegerField(_("Shard"))
+    quantity = models.IntegerField(_("Quantity"), default=0)
+
+    def __str__(self):
+        return f"Shard {self.shard} of {self.product_id}: {self.quantity}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'shard'], name='unique_stock_shard'),
+            models.CheckConstraint(condition=models.Q(quantity__gte=0), name='stock_shard_not_negative'),
+        ]
+
+
+class StockSnapshot(models.Model):
+    """Closing stock of a product at the end of a day, written nightly by IMS_production.snapshots."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots', db_index=False)
+    date = models.DateField(_("Date"))
+    quantity = models.IntegerField(_("Quantity"))
+    price = models.DecimalField(_("Price"), max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"Stock of {self.product_id} on {self.date}: {self.quantity}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'date'], name='unique_stock_snapshot_per_day')
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+
+class DeletionJob(models.Model):
+    """A category or product being deleted in chunks by the cascade_delete task (IMS_production.deletion)."""
+    TARGETS = [
+        ('category', 'Category'),
+        ('product', 'Product'),
+    ]
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    target = models.CharField(_("Target"), choices=TARGETS, max_length=10)
+    object_id = models.PositiveBigIntegerField(_("Object ID"))
+    label = models.CharField(_("Label"), max_length=100)
+    status = models.CharField(_("Status"), choices=STATUSES, max_length=10, default='pending')
+    total = models.PositiveIntegerField(_("Rows to delete"), default=0)
+    deleted = models.PositiveIntegerField(_("Rows deleted"), default=0)
+    error = models.TextField(_("Error"), blank=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def progress(self):
+        """Percentage of the rows deleted so far."""
+        if self.status == 'done':
+            return 100
+        return min(99, self.deleted * 100 // self.total) if self.total else 0
+
+    def __str__(self):
+        return f"Deletion of {self.target} {self.object_id}: {self.status}"
+
     class Meta:
         indexes = [
-            models.Index(fields=['product']),
-            models.Index(fields=['total_sold']),
-            models.Index(fields=['total_revenue']),
-            models.Index(fields=['report_date']),
+            models.Index(fields=['target', 'object_id']),
+        ]
+
+
+class ArchivedPeriod(models.Model):
+    """A month of Sale or StockMovement rows moved to a columnar file by IMS_production.coldstore."""
+    SOURCES = [
+        ('sale', 'Sale'),
+        ('stockmovement', 'Stock Movement'),
+    ]
+
+    source = models.CharField(_("Source"), choices=SOURCES, max_length=20)
+    month = models.DateField(_("Month"))
+    file = models.CharField(_("File"), max_length=255)
+    rows = models.PositiveIntegerField(_("Rows"))
+    size = models.PositiveBigIntegerField(_("Size"))
+    # Row count and column sums checked against the live rows before they were deleted
+    totals = models.JSONField(_("Totals"), default=dict)
+    # {column: [first, last]} of each date column, so readers skip files a date range can't reach
+    bounds = models.JSONField(_("Bounds"), default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archived {self.source} {self.month:%Y-%m}: {self.rows} rows"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'month'], name='unique_archived_period')
         ]
@@ -0,0 +1,172 @@
+import re
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+from .cache import PRODUCTS, SALES, STOCK_MOVEMENTS, invalidate
+from .analytics import ANALYTICS
+from .models import Sale, StockMovement
+
+# On PostgreSQL, Sale and StockMovement are range-partitioned by month
+# (migration 0011): Sale by its business sale_date, StockMovement by
+# created_at, which is set once (auto_now_add) so an edited row stays in its
+# month. The ORM doesn't know; queries bounded on the partition key only
+# read the matching months, and an old month can be detached in one statement
+# instead of deleting its rows. Timestamp partitions are cut at midnight UTC.
+#
+# Each table also has a DEFAULT partition for rows outside every month (a sale
+# back-dated before the first partition). create_partition() moves such rows
+# into a new month's partition when it is created.
+
+PARTITION_KEYS = {Sale: 'sale_date', StockMovement: 'created_at'}
+PARTITION_MONTHS_AHEAD = getattr(settings, "PARTITION_MONTHS_AHEAD", 3)
+
+_BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+#---------------------------------------------<> Months <>---------------------------------------------#
+
+def month_of(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(model, month):
+    return f"{model._meta.db_table}_p{month:%Y_%m}"
+
+
+def default_partition_name(model):
+    return f"{model._meta.db_table}_pdefault"
+
+
+def _bound(model, month):
+    """``month`` as a literal of the partition key's type."""
+    if model._meta.get_field(PARTITION_KEYS[model]).get_internal_type() == 'DateTimeField':
+        return f"{month.isoformat()} 00:00:00+00"
+    return month.isoformat()
+
+
+#---------------------------------------------<> Inspection <>---------------------------------------------#
+
+def is_partitioned(model):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_catalog.pg_table_is_visible(c.oid)",
+            [model._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions(model):
+    """``[(name, first_month, estimated_rows)]`` oldest first; the default partition has no month and comes last."""
+    if not is_partitioned(model):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_catalog.pg_table_is_visible(p.oid)",
+            [model._meta.db_table],
+        )
+        rows = cursor.fetchall()
+
+    result = []
+    for name, bound, estimate in rows:
+        match = _BOUNDS.search(bound)
+        month = date.fromisoformat(match.group(1)[:10]) if match else None
+        result.append((name, month, max(estimate, 0)))
+    return sorted(result, key=lambda row: (row[1] is None, row[1] or date.min))
+
+
+#---------------------------------------------<> Maintenance <>---------------------------------------------#
+
+def create_partition(model, month):
+    """
+    Create ``model``'s partition for ``month``; False if it already exists.
+
+    Rows for that month sitting in the default partition are moved into it,
+    otherwise PostgreSQL would refuse to create it.
+    """
+    month = month_of(month)
+    table, name = model._meta.db_table, partition_name(model, month)
+    default = default_partition_name(model)
+    quote = connection.ops.quote_name
+    column = quote(model._meta.get_field(PARTITION_KEYS[model]).column)
+    start, end = _bound(model, month), _bound(model, add_months(month, 1))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s), to_regclass(%s)", [quote(name), quote(default)])
+        exists, has_default = cursor.fetchone()
+        if exists:
+            return False
+        if has_default:
+            cursor.execute(f"CREATE TEMPORARY TABLE ims_moved_rows (LIKE {quote(table)}) ON COMMIT DROP")
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {quote(default)} WHERE {column} >= %s AND {column} < %s RETURNING *) "
+                f"INSERT INTO ims_moved_rows SELECT * FROM moved",
+                [start, end],
+            )
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+        if has_default:
+            cursor.execute(f"INSERT INTO {quote(table)} SELECT * FROM ims_moved_rows")
+    return True
+
+
+def ensure_partitions(months_ahead=PARTITION_MONTHS_AHEAD, today=None):
+    """Create this month's and the next ``months_ahead`` months' partitions where missing; the names created."""
+    this_month = month_of(today or date.today())
+    created = []
+    for model in PARTITION_KEYS:
+        if not is_partitioned(model):
+            continue
+        for offset in range(months_ahead + 1):
+            month = add_months(this_month, offset)
+            if create_partition(model, month):
+                created.append(partition_name(model, month))
+    return created
+
+
+def detach_partition(model, month):
+    """
+    Detach ``month`` from ``model``'s table and return the name of the table it becomes.
+
+    The rows are not touched: they stay in that standalone table (dump it,
+    archive it, or DROP it) and simply stop being visible through the model.
+    Sales summaries already hold those months' totals and keep them.
+    """
+    if not is_partitioned(model):
+        raise ValueError(f"{model._meta.db_table} is not partitioned")
+    month = month_of(month)
+    name = partition_name(model, month)
+    if name not in {row[0] for row in partitions(model)}:
+        raise ValueError(f"{model._meta.db_table} has no partition for {month:%Y-%m}")
+    if month >= month_of(date.today()):
+        raise ValueError("Only past months can be detached")
+
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote(model._meta.db_table)} DETACH PARTITION {quote(name)}")
+    invalidate(SALES if model is Sale else STOCK_MOVEMENTS, PRODUCTS, ANALYTICS)
+    return name
+
+
+__all__ = (
+    "PARTITION_KEYS",
+    "add_months",
+    "create_partition",
+    "detach_partition",
+    "ensure_partitions",
+    "is_partitioned",
+    "month_of",
+    "partition_name",
+    "partitions",
+)
@@ -0,0 +1,89 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+# Reads go to the replica only inside a view that opted in with @use_replica
+# (or ReplicaReadMixin), and only for the apps in REPLICA_APPS: sessions and
+# users always come from the primary, so a login is never lost to lag.
+# A session that just wrote (any non-GET request, see ReplicaPinMiddleware)
+# reads from the primary for REPLICA_PIN_SECONDS so it sees its own writes.
+# Without a 'replica' entry in DATABASES all of this is a no-op.
+
+PIN_SESSION_KEY = '_replica_pinned_until'
+
+_read_alias = contextvars.ContextVar('replica_read_alias', default=None)
+
+
+def replica_alias():
+    """The configured replica alias, or None when there is no such database."""
+    alias = getattr(settings, 'REPLICA_DATABASE', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def is_pinned(request):
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def pin(request):
+    session = getattr(request, 'session', None)
+    if session is not None:
+        session[PIN_SESSION_KEY] = time.time() + getattr(settings, 'REPLICA_PIN_SECONDS', 15)
+
+
+@contextmanager
+def replica_reads(request=None):
+    """Route the reads made inside the block to the replica, unless ``request``'s session is pinned."""
+    alias = None if request is not None and is_pinned(request) else replica_alias()
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+def use_replica(view):
+    """
+    Send a read-only view's queries to the replica.
+
+    Works on function views and, through ``method_decorator``, on methods
+    such as DRF actions.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads(request):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Route reads to the replica while ``replica_reads`` is active; everything else uses the primary."""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias and model._meta.app_label in getattr(settings, 'REPLICA_APPS', ()):
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return None
+
+
+__all__ = (
+    "ReplicaRouter",
+    "is_pinned",
+    "pin",
+    "replica_alias",
+    "replica_reads",
+    "use_replica",
+)
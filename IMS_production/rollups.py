@@ -0,0 +1,113 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import SalesSummary
+
+PERIODS = ('day', 'week', 'month')
+
+
+#---------------------------------------------<> Buckets <>---------------------------------------------#
+
+def bucket_starts(day):
+    """Return the first day of the day, week (Monday) and month buckets containing ``day``."""
+    if isinstance(day, datetime):
+        day = day.date()
+    return {
+        'day': day,
+        'week': day - timedelta(days=day.weekday()),
+        'month': day.replace(day=1),
+    }
+
+
+def sale_deltas(product_id, sale_date, quantity, revenue, sign=1):
+    """Increments a single sale contributes to each of its buckets."""
+    return [
+        (product_id, period, start, sign * quantity, sign * Decimal(revenue))
+        for period, start in bucket_starts(sale_date).items()
+    ]
+
+
+#---------------------------------------------<> Upserts <>---------------------------------------------#
+
+def _merge(deltas):
+    merged = defaultdict(lambda: [0, Decimal(0)])
+    for product_id, period, start, sold, revenue in deltas:
+        bucket = merged[(product_id, period, start)]
+        bucket[0] += sold
+        bucket[1] += revenue
+    # A stable key order makes concurrent writers lock bucket rows in the same order.
+    return [(*key, sold, revenue) for key, (sold, revenue) in sorted(merged.items())]
+
+
+def _upsert_on_conflict(rows):
+    table = connection.ops.quote_name(SalesSummary._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql = (
+        f"INSERT INTO {table} (product_id, period, period_start, total_sold, total_revenue, report_date) "
+        f"VALUES (%s, %s, %s, %s, %s, %s) "
+        f"ON CONFLICT (product_id, period, period_start) DO UPDATE SET "
+        f"total_sold = {table}.total_sold + EXCLUDED.total_sold, "
+        f"total_revenue = {table}.total_revenue + EXCLUDED.total_revenue, "
+        f"report_date = EXCLUDED.report_date"
+    )
+    params = [
+        (
+            product_id, period,
+            connection.ops.adapt_datefield_value(start),
+            sold,
+            connection.ops.adapt_decimalfield_value(revenue, 20, 2),
+            now,
+        )
+        for product_id, period, start, sold, revenue in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _upsert_with_f(rows):
+    for product_id, period, start, sold, revenue in rows:
+        lookup = {'product_id': product_id, 'period': period, 'period_start': start}
+        increments = {'total_sold': F('total_sold') + sold, 'total_revenue': F('total_revenue') + revenue}
+        if SalesSummary.objects.filter(**lookup).update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                SalesSummary.objects.create(total_sold=sold, total_revenue=revenue, **lookup)
+        except IntegrityError:
+            # Another writer created the bucket first, fall back to incrementing it.
+            SalesSummary.objects.filter(**lookup).update(**increments)
+
+
+def apply_deltas(deltas):
+    """
+    Add ``(product_id, period, period_start, sold, revenue)`` increments to their buckets.
+
+    Buckets are never read back: PostgreSQL and SQLite use a single
+    ``INSERT ... ON CONFLICT DO UPDATE``, other backends an ``F()`` update with
+    an insert fallback, so concurrent sales never overwrite each other.
+    """
+    rows = _merge(deltas)
+    if not rows:
+        return 0
+    if connection.vendor in ('postgresql', 'sqlite'):
+        _upsert_on_conflict(rows)
+    else:
+        _upsert_with_f(rows)
+    return len(rows)
+
+
+def record(sale, sign=1):
+    """Apply (or with ``sign=-1`` revert) a sale's contribution to the rollups."""
+    return apply_deltas(sale_deltas(sale.product_id, sale.sale_date, sale.quantity, sale.total_revenue, sign))
+
+
+__all__ = (
+    "PERIODS",
+    "bucket_starts",
+    "sale_deltas",
+    "apply_deltas",
+    "record",
+)
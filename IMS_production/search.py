@@ -0,0 +1,377 @@
+import operator
+import re
+import shlex
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections, models
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Category
+
+# Annotation carrying the relevance of a ranked product search
+SEARCH_RANK = 'search_rank'
+
+# Text search configuration of Product.search_vector (see migration 0007): names
+# and SKUs are identifiers, so they are tokenised without stemming or stop words.
+SEARCH_CONFIG = 'simple'
+
+
+def is_postgres(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def product_search_q(text, prefix='', using='default'):
+    """
+    Q matching products whose name, SKU or category name contain ``text``.
+
+    ``prefix`` reaches the product through a relation, e.g. ``'product__'`` on
+    Sale. On PostgreSQL the whole-word match goes through the GIN index on
+    ``search_vector`` and the substring matches through the ``pg_trgm`` indexes
+    on ``UPPER(name)``, ``UPPER(sku)`` and ``UPPER(category.name)``, which is the
+    expression Django's ``icontains`` compiles to. Elsewhere it is the plain
+    ``icontains`` search the views always did.
+    """
+    # The category is matched in a subquery so the OR does not force a join
+    condition = (
+        Q(**{f'{prefix}name__icontains': text}) |
+        Q(**{f'{prefix}sku__icontains': text}) |
+        Q(**{f'{prefix}category__in': Category.objects.filter(name__icontains=text).values('pk')})
+    )
+    if is_postgres(using):
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        condition |= Q(**{f'{prefix}search_vector': query})
+    return condition
+
+
+def search_products(queryset, text):
+    """
+    Filter a Product queryset by ``text`` and, on PostgreSQL, rank the matches.
+
+    The rank (full-text rank plus name similarity) is annotated as ``search_rank``;
+    list views that find it order by it instead of their default ordering.
+    """
+    queryset = queryset.filter(product_search_q(text, using=queryset.db))
+    if not is_postgres(queryset.db):
+        return queryset
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.annotate(**{
+        SEARCH_RANK: SearchRank(F('search_vector'), query) + TrigramSimilarity('name', text),
+    })
+
+
+#---------------------------------------------<> Typed query syntax <>---------------------------------------------#
+
+class QuerySyntaxError(ValueError):
+    """Raised for a search term the view cannot compile; the message is shown to the user."""
+
+
+TERM = re.compile(r'^(?P<key>[a-z_]+)(?P<op>>=|<=|:|=|>|<)(?P<value>.+)$', re.IGNORECASE)
+PARTIAL_DATE = re.compile(r'^(?P<year>\d{4})(?:-(?P<month>\d{1,2})(?:-(?P<day>\d{1,2}))?)?$')
+
+
+def date_span(value):
+    """``YYYY``, ``YYYY-MM`` or ``YYYY-MM-DD`` as a half-open ``(start, end)`` range of dates."""
+    match = PARTIAL_DATE.match(value)
+    if not match:
+        raise QuerySyntaxError(f"'{value}' is not a date; use YYYY, YYYY-MM or YYYY-MM-DD.")
+    try:
+        year, month, day = int(match['year']), int(match['month'] or 0), int(match['day'] or 0)
+        if day:
+            start = date(year, month, day)
+            return start, start + timedelta(days=1)
+        if month:
+            return date(year, month, 1), date(year, month, monthrange(year, month)[1]) + timedelta(days=1)
+        return date(year, 1, 1), date(year + 1, 1, 1)
+    except ValueError:
+        raise QuerySyntaxError(f"'{value}' is not a valid date.") from None
+
+
+class QuerySyntax:
+    """
+    Compile a search-bar query into ORM filters.
+
+    ``fields`` maps the keys users type to model lookups, e.g.
+    ``{'qty': 'quantity', 'sku': 'product__sku'}``. The model field behind each
+    lookup decides how its value is read:
+
+    - numbers and dates take ``key:value``, ``key:low..high`` (either end may be
+      left open) and ``key>value`` / ``>=`` / ``<`` / ``<=``; dates may be a year,
+      a month or a day (``date:2025-01..2025-03``), and become a half-open range
+      on the column, so the B-tree index on it is used;
+    - fields with choices take one of their values (``type:addition``);
+    - other text fields match by prefix (``sku:ABC-``), which the pattern-ops
+      index on unique CharFields serves on PostgreSQL.
+
+    Quotes group words (``name:"basmati rice"``); an unbalanced one, as in
+    ``men's shirt``, just makes the query split on spaces. A ``key:value`` token
+    whose key is not in ``fields`` (``X:1``) stays text. A bare date is matched
+    against the ``dates`` keys. Everything else is free text, joined and handed to ``text(queryset, text)``; ``text_relation``
+    names the relation that text searches (e.g. 'product'), for row_filter.
+    """
+
+    def __init__(self, fields, text=None, dates=(), text_relation=None):
+        self.fields = fields
+        self.text = text
+        self.dates = dates
+        self.text_relation = text_relation
+
+    def conditions(self, model, query):
+        """``(conditions, words)``: one Q per term of ``query``, and the free text left over."""
+        try:
+            tokens = shlex.split(query)
+        except ValueError:
+            # An apostrophe or a stray quote in plain text
+            tokens = query.split()
+
+        conditions, words = [], []
+        for token in tokens:
+            match = TERM.match(token)
+            if match and match['key'].lower() in self.fields:
+                conditions.append(self._term(model, match['key'].lower(), match['op'], match['value']))
+            elif self.dates and PARTIAL_DATE.match(token) and '-' in token:
+                condition = Q()
+                for key in self.dates:
+                    condition |= self._term(model, key, ':', token)
+                conditions.append(condition)
+            else:
+                words.append(token)
+        if words and self.text is None:
+            raise QuerySyntaxError(f"Use one of: {self._keys()}.")
+        return conditions, ' '.join(words)
+
+    def filter(self, queryset, query):
+        conditions, text = self.conditions(queryset.model, query)
+        for condition in conditions:
+            queryset = queryset.filter(condition)
+        if text:
+            queryset = self.text(queryset, text)
+        return queryset
+
+    def row_filter(self, model, query):
+        """
+        ``query`` as a RowFilter over plain row dicts keyed by column (``product_id``, ``sale_date``...).
+
+        For rows that are not in the database any more (IMS_production.coldstore):
+        terms on the model's own columns are compared in Python, terms through
+        a relation and free text are resolved to the matching related ids.
+        """
+        conditions, text = self.conditions(model, query)
+        checks = [_compile(model, condition) for condition in conditions]
+        if text:
+            if self.text_relation is None:
+                raise QuerySyntaxError("Free text can't be searched here; use field:value terms.")
+            relation = model._meta.get_field(self.text_relation)
+            ids = set(relation.related_model.objects.filter(product_search_q(text)).values_list('pk', flat=True))
+            checks.append(lambda row, column=relation.attname: row[column] in ids)
+        return RowFilter(checks, _bounds(model, conditions))
+
+    def _keys(self):
+        return ', '.join(f'{key}:' for key in self.fields)
+
+    def _field(self, model, lookup):
+        field = None
+        for part in lookup.split('__'):
+            field = model._meta.get_field(part)
+            model = field.related_model
+        return field
+
+    def _term(self, model, key, op, value):
+        if key not in self.fields:
+            raise QuerySyntaxError(f"Unknown search field '{key}'. Use one of: {self._keys()}.")
+        lookup = self.fields[key]
+        field = self._field(model, lookup)
+
+        if field.choices:
+            if op not in (':', '='):
+                raise QuerySyntaxError(f"'{key}' only supports '{key}:value'.")
+            for choice, label in field.choices:
+                if value.lower() in (str(choice).lower(), str(label).lower()):
+                    return Q(**{lookup: choice})
+            options = ', '.join(str(choice) for choice, _ in field.choices)
+            raise QuerySyntaxError(f"'{value}' is not a valid {key}. Use one of: {options}.")
+
+        if isinstance(field, (models.DateField, models.IntegerField, models.DecimalField, models.FloatField)):
+            return self._range(lookup, field, key, op, value)
+
+        if op not in (':', '='):
+            raise QuerySyntaxError(f"'{key}' only supports '{key}:prefix'.")
+        return Q(**{f'{lookup}__startswith': value})
+
+    def _range(self, lookup, field, key, op, value):
+        if op in (':', '=') and '..' in value:
+            low, high = value.split('..', 1)
+            if not low and not high:
+                raise QuerySyntaxError(f"'{key}:..' needs at least one bound.")
+            condition = Q()
+            if low:
+                condition &= self._range(lookup, field, key, '>=', low)
+            if high:
+                condition &= self._range(lookup, field, key, '<=', high)
+            return condition
+
+        if isinstance(field, models.DateField):
+            start, end = (self._moment(field, bound) for bound in date_span(value))
+            return {
+                ':': Q(**{f'{lookup}__gte': start, f'{lookup}__lt': end}),
+                '=': Q(**{f'{lookup}__gte': start, f'{lookup}__lt': end}),
+                '>': Q(**{f'{lookup}__gte': end}),
+                '>=': Q(**{f'{lookup}__gte': start}),
+                '<': Q(**{f'{lookup}__lt': start}),
+                '<=': Q(**{f'{lookup}__lt': end}),
+            }[op]
+
+        try:
+            number = int(value) if isinstance(field, models.IntegerField) else Decimal(value)
+        except (ValueError, InvalidOperation):
+            raise QuerySyntaxError(f"'{key}' needs a number, got '{value}'.") from None
+        suffix = {':': 'exact', '=': 'exact', '>': 'gt', '>=': 'gte', '<': 'lt', '<=': 'lte'}[op]
+        return Q(**{f'{lookup}__{suffix}': number})
+
+    def _moment(self, field, day):
+        # DateTimeField is compared with aware midnights rather than __date, which would
+        # wrap the column in a cast and skip its index (and the monthly partition pruning)
+        if isinstance(field, models.DateTimeField):
+            moment = datetime.combine(day, time.min)
+            return timezone.make_aware(moment) if settings.USE_TZ else moment
+        return day
+
+
+#---------------------------------------------<> Rows outside the database <>---------------------------------------------#
+
+ROW_LOOKUPS = {
+    'exact': operator.eq, 'gt': operator.gt, 'gte': operator.ge, 'lt': operator.lt, 'lte': operator.le,
+    'startswith': lambda value, prefix: str(value).startswith(prefix),
+}
+
+
+class RowFilter:
+    """A compiled search query: ``matches(row)``, plus ``bounds`` ``{column: (low, high)}`` every match lies in."""
+
+    def __init__(self, checks, bounds):
+        self.checks = checks
+        self.bounds = bounds
+
+    def matches(self, row):
+        return all(check(row) for check in self.checks)
+
+
+def _split_lookup(lookup):
+    parts = lookup.split('__')
+    if parts[-1] in ROW_LOOKUPS:
+        return parts[:-1], parts[-1]
+    return parts, 'exact'
+
+
+def _compile(model, condition):
+    """A Q built by QuerySyntax as a function of a row dict."""
+    if isinstance(condition, Q):
+        checks = [_compile(model, child) for child in condition.children]
+        combine = all if condition.connector == Q.AND else any
+        if condition.negated:
+            return lambda row: not combine(check(row) for check in checks)
+        return lambda row: combine(check(row) for check in checks)
+
+    lookup, value = condition
+    path, suffix = _split_lookup(lookup)
+    field = model._meta.get_field(path[0])
+    if len(path) > 1:
+        # Through a relation: ask the database which related rows match
+        remote = '__'.join(path[1:] + [suffix])
+        ids = set(field.related_model.objects.filter(**{remote: value}).values_list('pk', flat=True))
+        return lambda row: row[field.attname] in ids
+    compare = ROW_LOOKUPS[suffix]
+    return lambda row: compare(row[field.attname], value)
+
+
+def _bounds(model, conditions):
+    """``{column: (low, high)}`` from the terms that bound one column from below and/or above."""
+    bounds = {}
+    for condition in conditions:
+        if condition.connector != Q.AND or condition.negated:
+            continue
+        leaves = [child for child in condition.children if isinstance(child, tuple)]
+        for lookup, value in leaves:
+            path, suffix = _split_lookup(lookup)
+            if len(path) > 1 or suffix not in ('gt', 'gte', 'lt', 'lte', 'exact'):
+                continue
+            column = model._meta.get_field(path[0]).attname
+            low, high = bounds.get(column, (None, None))
+            if suffix in ('gt', 'gte', 'exact'):
+                low = value if low is None else max(low, value)
+            if suffix in ('lt', 'lte', 'exact'):
+                high = value if high is None else min(high, value)
+            bounds[column] = (low, high)
+    return bounds
+
+
+#---------------------------------------------<> List view syntaxes <>---------------------------------------------#
+
+def _related_products(queryset, text):
+    return queryset.filter(product_search_q(text, 'product__', using=queryset.db))
+
+
+def _category_names(queryset, text):
+    return queryset.filter(name__icontains=text)
+
+
+PRODUCT_SEARCH = QuerySyntax(
+    fields={
+        'qty': 'quantity', 'price': 'price', 'sku': 'sku', 'category': 'category__name',
+        'created': 'created_at', 'updated': 'updated_at',
+    },
+    text=search_products,
+    dates=('created', 'updated'),
+)
+
+CATEGORY_SEARCH = QuerySyntax(
+    fields={'created': 'created'},
+    text=_category_names,
+    dates=('created',),
+)
+
+SALE_SEARCH = QuerySyntax(
+    fields={
+        'qty': 'quantity', 'price': 'sale_price', 'total': 'total_amount', 'revenue': 'total_revenue',
+        'date': 'sale_date', 'created': 'created_at', 'sku': 'product__sku',
+    },
+    text=_related_products,
+    dates=('date', 'created'),
+    text_relation='product',
+)
+
+SALES_SUMMARY_SEARCH = QuerySyntax(
+    fields={
+        'sold': 'total_sold', 'revenue': 'total_revenue', 'period': 'period',
+        'date': 'period_start', 'reported': 'report_date', 'sku': 'product__sku',
+    },
+    text=_related_products,
+    dates=('date',),
+    text_relation='product',
+)
+
+STOCK_MOVEMENT_SEARCH = QuerySyntax(
+    fields={'qty': 'quantity', 'type': 'movement_type', 'date': 'created_at', 'sku': 'product__sku'},
+    text=_related_products,
+    dates=('date',),
+    text_relation='product',
+)
+
+
+__all__ = (
+    "CATEGORY_SEARCH",
+    "PRODUCT_SEARCH",
+    "SALE_SEARCH",
+    "SALES_SUMMARY_SEARCH",
+    "SEARCH_RANK",
+    "STOCK_MOVEMENT_SEARCH",
+    "QuerySyntax",
+    "QuerySyntaxError",
+    "RowFilter",
+    "date_span",
+    "product_search_q",
+    "search_products",
+)
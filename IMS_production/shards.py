@@ -0,0 +1,147 @@
+import random
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .analytics import ANALYTICS
+from .cache import PRODUCTS, invalidate
+from .models import Product, StockShard
+
+# Hot SKUs can opt in to sharded stock: the units are spread over `shard_count`
+# StockShard rows and each sale decrements a random one, so concurrent sales of
+# the same product lock different rows. Product.quantity then holds the folded
+# total, refreshed by `fold` (run every minute by Celery Beat).
+# Every write to the product row here bumps `created_at` (its auto_now column) and
+# drops the cached products, as a save() would: list ETags and cached rows key on them.
+
+
+#---------------------------------------------<> Decrements / increments <>---------------------------------------------#
+
+def take(product_id, units, shard_count):
+    """
+    Take ``units`` out of the product's shards; False if they do not hold that many.
+
+    A random shard that can cover the whole amount is tried first, one
+    conditional UPDATE per shard. Only when no single shard can (stock running
+    out) are all shards locked, in shard order, and drained together.
+    No shard ever goes below zero, so neither does the total.
+    """
+    for shard in random.sample(range(shard_count), shard_count):
+        taken = (
+            StockShard.objects.filter(product_id=product_id, shard=shard, quantity__gte=units)
+            .update(quantity=F('quantity') - units)
+        )
+        if taken:
+            return True
+
+    with transaction.atomic():
+        shards = list(
+            StockShard.objects.select_for_update().filter(product_id=product_id, quantity__gt=0)
+            .order_by('shard').values_list('pk', 'quantity')
+        )
+        if sum(quantity for _, quantity in shards) < units:
+            return False
+        remaining = units
+        for pk, quantity in shards:
+            taken = min(quantity, remaining)
+            StockShard.objects.filter(pk=pk).update(quantity=F('quantity') - taken)
+            remaining -= taken
+            if not remaining:
+                break
+    return True
+
+
+def put(product_id, units, shard_count):
+    """Add ``units`` to a random shard; False if it no longer exists (shards disabled or re-spread meanwhile)."""
+    return bool(StockShard.objects.filter(product_id=product_id, shard=random.randrange(shard_count)).update(
+        quantity=F('quantity') + units,
+    ))
+
+
+def total(product_id):
+    return StockShard.objects.filter(product_id=product_id).aggregate(total=Sum('quantity'))['total'] or 0
+
+
+#---------------------------------------------<> Fold <>---------------------------------------------#
+
+def _spread(units, shard_count):
+    base, extra = divmod(max(units, 0), shard_count)
+    return [base + (1 if shard < extra else 0) for shard in range(shard_count)]
+
+
+def fold(product_id):
+    """
+    Write the shards' total into Product.quantity and even the shards out again.
+
+    Rebalancing keeps sales on the single-shard fast path until the product is
+    nearly sold out. Returns the total, or None if the product has no shards.
+    """
+    with transaction.atomic():
+        shards = list(
+            StockShard.objects.select_for_update().filter(product_id=product_id)
+            .order_by('shard').values_list('pk', 'quantity')
+        )
+        if not shards:
+            return None
+        units = sum(quantity for _, quantity in shards)
+        for (pk, quantity), target in zip(shards, _spread(units, len(shards))):
+            if quantity != target:
+                StockShard.objects.filter(pk=pk).update(quantity=target)
+        folded = Product.objects.filter(pk=product_id).exclude(quantity=units).update(
+            quantity=units, created_at=timezone.now(),
+        )
+        if folded:
+            invalidate(PRODUCTS, ANALYTICS)
+    return units
+
+
+def fold_all():
+    """Fold every sharded product; returns how many were folded."""
+    folded = 0
+    for product_id in Product.objects.filter(shard_count__gt=0).values_list('pk', flat=True).iterator():
+        if fold(product_id) is not None:
+            folded += 1
+    return folded
+
+
+#---------------------------------------------<> Opt in / out <>---------------------------------------------#
+
+def enable(product, shard_count):
+    """Spread the product's current stock over ``shard_count`` shards."""
+    if shard_count < 1:
+        raise ValueError("shard_count must be at least 1")
+    with transaction.atomic():
+        locked = Product.objects.select_for_update().get(pk=product.pk)
+        if locked.shard_count:
+            locked.quantity = fold(locked.pk)
+            StockShard.objects.filter(product_id=locked.pk).delete()
+        StockShard.objects.bulk_create(
+            StockShard(product_id=locked.pk, shard=shard, quantity=units)
+            for shard, units in enumerate(_spread(locked.quantity, shard_count))
+        )
+        Product.objects.filter(pk=locked.pk).update(shard_count=shard_count, created_at=timezone.now())
+        invalidate(PRODUCTS, ANALYTICS)
+    product.shard_count = shard_count
+    product.refresh_from_db(fields=['quantity', 'created_at'])
+
+
+def disable(product):
+    """Fold the shards back into Product.quantity and go back to single-row updates."""
+    with transaction.atomic():
+        Product.objects.select_for_update().filter(pk=product.pk).first()
+        fold(product.pk)
+        StockShard.objects.filter(product_id=product.pk).delete()
+        Product.objects.filter(pk=product.pk).update(shard_count=0, created_at=timezone.now())
+        invalidate(PRODUCTS, ANALYTICS)
+    product.shard_count = 0
+    product.refresh_from_db(fields=['quantity', 'created_at'])
+
+
+__all__ = (
+    "disable",
+    "enable",
+    "fold",
+    "fold_all",
+    "put",
+    "take",
+    "total",
+)
@@ -1,16 +1,59 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Sale, SalesSummary
+from .analytics import ANALYTICS
+from .cache import CATEGORIES, PRODUCTS, SALES, STOCK_MOVEMENTS, invalidate
+from .models import Category, Product, Sale, StockMovement
+from . import rollups
+
+
+@receiver(pre_save, sender=Sale, dispatch_uid='remember_sale_for_summary')
+def remember_sale_for_summary(sender, instance, **kwargs):
+    # Edits must take the old figures out of their buckets before adding the new ones
+    instance._summary_previous = None
+    if instance.pk:
+        instance._summary_previous = (
+            Sale.objects.filter(pk=instance.pk)
+            .values_list('product_id', 'sale_date', 'quantity', 'total_revenue')
+            .first()
+        )
+
 
 @receiver(post_save, sender=Sale, dispatch_uid='update_sales_summary')
 def update_sales_summary(sender, instance, created, **kwargs):
-    # Use `get_or_create` to retrieve or create a SalesSummary
-    summary, created_summary = SalesSummary.objects.get_or_create(
-        product=instance.product,
-        defaults={
-            'total_sold': instance.total_amount,
-            'total_revenue': instance.total_revenue
-        }
-    )
-            
-        
+    # Increment the daily, weekly and monthly buckets in place
+    deltas = rollups.sale_deltas(instance.product_id, instance.sale_date, instance.quantity, instance.total_revenue)
+    previous = getattr(instance, '_summary_previous', None)
+    if previous:
+        deltas += rollups.sale_deltas(*previous, sign=-1)
+    rollups.apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Sale, dispatch_uid='revert_sales_summary')
+def revert_sales_summary(sender, instance, origin=None, **kwargs):
+    # When a product or category delete cascades to its sales, the product's
+    # summaries are deleted too; re-inserting negative buckets would orphan them.
+    if isinstance(origin, Sale) or getattr(origin, 'model', None) is Sale:
+        rollups.record(instance, sign=-1)
+
+
+#---------------------------------------------<> Cache invalidation <>---------------------------------------------#
+
+# Namespaces whose cached values are built from each model
+CACHE_NAMESPACES = {
+    Category: (CATEGORIES, PRODUCTS, ANALYTICS),    # product rows show their category name
+    Product: (PRODUCTS, ANALYTICS),
+    Sale: (SALES, PRODUCTS, ANALYTICS),             # a sale moves stock
+    StockMovement: (STOCK_MOVEMENTS, PRODUCTS, ANALYTICS),
+}
+
+
+@receiver(post_save, sender=Category, dispatch_uid='invalidate_cache_on_category_save')
+@receiver(post_delete, sender=Category, dispatch_uid='invalidate_cache_on_category_delete')
+@receiver(post_save, sender=Product, dispatch_uid='invalidate_cache_on_product_save')
+@receiver(post_delete, sender=Product, dispatch_uid='invalidate_cache_on_product_delete')
+@receiver(post_save, sender=Sale, dispatch_uid='invalidate_cache_on_sale_save')
+@receiver(post_delete, sender=Sale, dispatch_uid='invalidate_cache_on_sale_delete')
+@receiver(post_save, sender=StockMovement, dispatch_uid='invalidate_cache_on_stock_movement_save')
+@receiver(post_delete, sender=StockMovement, dispatch_uid='invalidate_cache_on_stock_movement_delete')
+def invalidate_cached_reads(sender, **kwargs):
+    invalidate(*CACHE_NAMESPACES[sender])
@@ -0,0 +1,144 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+from .coldstore import archived_net_change
+from .models import Product, Sale, StockMovement, StockShard, StockSnapshot
+
+SNAPSHOT_BATCH_SIZE = getattr(settings, "STOCK_SNAPSHOT_BATCH_SIZE", 5000)
+
+
+#---------------------------------------------<> Stock changes <>---------------------------------------------#
+
+def end_of_day(day):
+    moment = datetime.combine(day + timedelta(days=1), time.min)
+    return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+
+def net_change(after, until=None):
+    """
+    ``{product_id: units}`` added to stock between ``after`` and ``until`` (now if None).
+
+    Stock moves when a row is written, so rows are placed by ``created_at``, not
+    by the business ``sale_date`` a sale may have been back-dated to. Rows moved
+    to cold storage (IMS_production.coldstore) are counted too.
+    """
+    change = defaultdict(int)
+
+    sales = Sale.objects.filter(created_at__gte=after)
+    movements = StockMovement.objects.filter(created_at__gte=after)
+    if until is not None:
+        sales = sales.filter(created_at__lt=until)
+        movements = movements.filter(created_at__lt=until)
+
+    for product_id, units in sales.values('product_id').annotate(units=Sum('quantity')).values_list('product_id', 'units'):
+        change[product_id] -= units
+    rows = movements.values('product_id', 'movement_type').annotate(units=Sum('quantity'))
+    for product_id, movement_type, units in rows.values_list('product_id', 'movement_type', 'units'):
+        change[product_id] += units if movement_type == 'Addition' else -units
+    for product_id, units in archived_net_change(after, until).items():
+        change[product_id] += units
+    return change
+
+
+#---------------------------------------------<> Nightly job <>---------------------------------------------#
+
+def take_snapshot(day=None, batch_size=SNAPSHOT_BATCH_SIZE):
+    """
+    Write every product's closing balance for ``day`` (yesterday by default).
+
+    Balances are the current quantities minus whatever moved after the day
+    ended, so the job gives the same answer whenever it runs. Rows are written
+    with bulk upserts, so re-running a day overwrites it.
+
+    Both are read in one transaction (REPEATABLE READ on PostgreSQL), so a sale
+    committing meanwhile is in the quantities and in the changes, or in neither.
+    """
+    day = day or timezone.localdate() - timedelta(days=1)
+    connection = transaction.get_connection()
+    outermost = not connection.in_atomic_block
+
+    written = 0
+    with transaction.atomic():
+        # Must be the transaction's first statement; an enclosing transaction keeps its own level
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        since = net_change(end_of_day(day))
+        # Sharded products' quantity lags their shards until the next fold, so read the shards in the same snapshot
+        sharded = StockShard.objects.values('product_id').annotate(units=Sum('quantity'))
+        sharded = dict(sharded.values_list('product_id', 'units'))
+
+        batch = []
+        products = Product.objects.order_by().values_list('pk', 'quantity', 'price')
+        for pk, quantity, price in products.iterator(chunk_size=batch_size):
+            quantity = sharded.get(pk, quantity)
+            batch.append(StockSnapshot(product_id=pk, date=day, quantity=quantity - since.get(pk, 0), price=price))
+            if len(batch) >= batch_size:
+                written += _write(batch)
+                batch = []
+        written += _write(batch)
+    return written
+
+
+def _write(batch):
+    if not batch:
+        return 0
+    with transaction.atomic():
+        StockSnapshot.objects.bulk_create(
+            batch, update_conflicts=True,
+            unique_fields=['product', 'date'], update_fields=['quantity', 'price'],
+        )
+    return len(batch)
+
+
+#---------------------------------------------<> Point-in-time queries <>---------------------------------------------#
+
+def stock_on(day, products=None):
+    """
+    ``{product_id: (quantity, price)}`` as it stood at the end of ``day``.
+
+    Starts from the nearest snapshot on or before ``day`` and applies only the
+    stock changes recorded since, so the work is bounded by the snapshot
+    interval rather than by the whole history. Products missing from that
+    snapshot are worked back from their current quantity instead.
+    """
+    products = Product.objects.all() if products is None else products
+    base = StockSnapshot.objects.filter(date__lte=day).aggregate(date=Max('date'))['date']
+
+    balances = {}
+    if base is not None:
+        snapshots = StockSnapshot.objects.filter(date=base, product__in=products.values('pk'))
+        change = net_change(end_of_day(base), end_of_day(day))
+        for product_id, quantity, price in snapshots.values_list('product_id', 'quantity', 'price').iterator():
+            balances[product_id] = (quantity + change.get(product_id, 0), price)
+
+    # `updated_at` is Product's creation time (auto_now_add); later products did not exist yet
+    missing = products.filter(updated_at__lt=end_of_day(day))
+    if base is not None:
+        missing = missing.exclude(pk__in=StockSnapshot.objects.filter(date=base).values('product_id'))
+    rows = list(missing.values_list('pk', 'quantity', 'price'))
+    if rows:
+        since = net_change(end_of_day(day))
+        for pk, quantity, price in rows:
+            balances[pk] = (quantity - since.get(pk, 0), price)
+    return balances
+
+
+def stock_valuation(day, products=None):
+    """Units and value of the stock held at the end of ``day``, priced as of that day."""
+    balances = stock_on(day, products)
+    units = sum(quantity for quantity, _ in balances.values())
+    value = sum((quantity * price for quantity, price in balances.values()), Decimal(0))
+    return {'date': day, 'products': len(balances), 'units': units, 'value': value}
+
+
+__all__ = (
+    "net_change",
+    "stock_on",
+    "stock_valuation",
+    "take_snapshot",
+)
@@ -0,0 +1,154 @@
+from celery import shared_task, Task
+from datetime import date
+from django.conf import settings
+from django.core.files.storage import default_storage
+import logging
+from sms_tasks.tasks import send_sms, send_whatsapp_payload
+from utils.whatsapp import TextMessage
+from .alerts import alert_recipients, format_digest, reorder_alerts
+from .analytics import ANALYTICS
+from .cache import PRODUCTS, invalidate
+from .coldstore import COLD_ARCHIVE_AFTER_MONTHS, archive_closed_periods
+from .deletion import run as run_deletion
+from .importer import import_catalog_file
+from .partitions import PARTITION_MONTHS_AHEAD, ensure_partitions
+from .shards import fold_all
+from .snapshots import take_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------
+# Catalog import
+# ----------------------------
+@shared_task(bind=True, acks_late=True)
+def import_catalog(self: Task, file_name: str, batch_size: int = None):
+    """
+    Stream an uploaded CSV/XLSX catalog from storage into Category/Product.
+
+    Progress (rows processed, products created, conflicts) is published as the
+    PROGRESS state so the upload page can poll it; the final result carries the
+    per-row conflict and error report. The uploaded file is removed afterwards.
+    """
+    def publish(report):
+        self.update_state(state='PROGRESS', meta={
+            'processed': report['processed'],
+            'created': report['created'],
+            'conflicts': len(report['conflicts']),
+            'errors': len(report['errors']),
+        })
+
+    try:
+        with default_storage.open(file_name, 'rb') as stream:
+            report = import_catalog_file(stream, file_name, batch_size=batch_size, on_progress=publish)
+    finally:
+        default_storage.delete(file_name)
+
+    logger.info(
+        "import_catalog: %s rows, %s products created, %s conflicts, %s errors",
+        report['processed'], report['created'], len(report['conflicts']), len(report['errors']),
+    )
+    return report
+
+
+# ----------------------------
+# Reorder alerts (run by Celery Beat)
+# ----------------------------
+@shared_task
+def send_stock_alerts(channel: str = None):
+    """
+    Compute sales velocity for the whole catalog and send one digest of the
+    products at or below their reorder point to each alert recipient.
+
+    ``channel`` is 'sms' (default, ``STOCK_ALERT_CHANNEL``) or 'whatsapp'.
+    """
+    channel = channel or getattr(settings, "STOCK_ALERT_CHANNEL", "sms")
+    alerts = reorder_alerts()
+    if not alerts:
+        logger.info("send_stock_alerts: no product below its reorder point")
+        return {"alerts": 0, "sent": 0}
+
+    message = format_digest(alerts)
+    recipients = alert_recipients()
+    for recipient in recipients:
+        if channel == "whatsapp":
+            send_whatsapp_payload.delay(TextMessage(to=recipient, body=message).build_payload())
+        else:
+            send_sms.delay(recipient, message)
+
+    logger.info("send_stock_alerts: %d products in digest, sent to %d recipients", len(alerts), len(recipients))
+    return {"alerts": len(alerts), "sent": len(recipients)}
+
+
+# ----------------------------
+# Nightly stock snapshot (run by Celery Beat)
+# ----------------------------
+@shared_task(acks_late=True)
+def snapshot_stock(day: str = None):
+    """Write yesterday's (or ``day``, YYYY-MM-DD) closing balance for every product."""
+    written = take_snapshot(date.fromisoformat(day) if day else None)
+    logger.info("snapshot_stock: %d product balances written", written)
+    return {"written": written}
+
+
+# ----------------------------
+# Fold sharded stock (run by Celery Beat)
+# ----------------------------
+@shared_task
+def fold_stock_shards():
+    """Refresh Product.quantity of sharded products from their shards."""
+    folded = fold_all()
+    if folded:
+        invalidate(PRODUCTS, ANALYTICS)
+    return {"folded": folded}
+
+
+# ----------------------------
+# Monthly partitions ahead of time (run by Celery Beat)
+# ----------------------------
+@shared_task
+def create_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Create the Sale/StockMovement partitions for this month and the next ``months_ahead``."""
+    created = ensure_partitions(months_ahead)
+    if created:
+        logger.info("create_partitions: created %s", ", ".join(created))
+    return {"created": created}
+
+
+# ----------------------------
+# Background cascade deletion
+# ----------------------------
+@shared_task(acks_late=True)
+def cascade_delete(job_id: int):
+    """Delete a pending category or product and everything under it in chunks (IMS_production.deletion)."""
+    job = run_deletion(job_id)
+    if job.status == 'running':
+        # Out of time for this run: carry on in a fresh one
+        cascade_delete.delay(job_id)
+        return {"status": job.status, "deleted": job.deleted}
+    logger.info("cascade_delete: %s %s '%s', %d rows deleted", job.target, job.object_id, job.label, job.deleted)
+    return {"status": job.status, "deleted": job.deleted}
+
+
+# ----------------------------
+# Cold storage of closed months (run by Celery Beat)
+# ----------------------------
+@shared_task(acks_late=True)
+def archive_cold_periods(after_months: int = COLD_ARCHIVE_AFTER_MONTHS):
+    """Move sales and stock movements older than ``after_months`` months to column files."""
+    periods = archive_closed_periods(after_months)
+    archived = [f"{period.source} {period.month:%Y-%m}" for period in periods]
+    if archived:
+        logger.info("archive_cold_periods: archived %s (%d rows)", ", ".join(archived), sum(p.rows for p in periods))
+    return {"archived": archived}
+
+
+__all__ = (
+    "archive_cold_periods",
+    "cascade_delete",
+    "create_partitions",
+    "fold_stock_shards",
+    "import_catalog",
+    "send_stock_alerts",
+    "snapshot_stock",
+)
@@ -0,0 +1,75 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+register = template.Library()
+
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 3600)
+
+
+# Like Django's {% cache %}, but without a timeout argument (entries are
+# versioned by their vary-on values, so they never need to expire early) and
+# counting hits and misses on the request for FragmentCacheStatsMiddleware.
+#
+#   {% cachetable "admin-product" list_watermark request.GET.urlencode %}
+#       {% for product in products %}
+#           {% cacherow "admin-product" product.pk product.created_at %}<td>...</td>{% endcacherow %}
+#       {% endfor %}
+#   {% endcachetable %}
+#
+# If any vary-on value is None (e.g. no watermark in the context) the block is
+# rendered uncached.
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, kind, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.kind = kind
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        vary_on = [value.resolve(context) for value in self.vary_on]
+        if any(value is None for value in vary_on):
+            return self.nodelist.render(context)
+
+        name = self.fragment_name.resolve(context)
+        key = make_template_fragment_key(f"{self.kind}:{name}", vary_on)
+        value = cache.get(key)
+        hit = value is not None
+        if not hit:
+            value = self.nodelist.render(context)
+            cache.set(key, value, FRAGMENT_CACHE_TIMEOUT)
+        _count(context, self.kind, hit)
+        return value
+
+
+def _count(context, kind, hit):
+    request = context.get('request')
+    if request is None:
+        return
+    if not hasattr(request, 'fragment_cache_stats'):
+        request.fragment_cache_stats = {}
+    stats = request.fragment_cache_stats
+    counts = stats.setdefault(kind, [0, 0])
+    counts[0 if hit else 1] += 1
+
+
+def _fragment_tag(kind):
+    end = f'endcache{kind}'
+
+    def tag(parser, token):
+        bits = token.split_contents()
+        if len(bits) < 3:
+            raise template.TemplateSyntaxError(f"'{bits[0]}' takes a fragment name and at least one vary-on value.")
+        nodelist = parser.parse((end,))
+        parser.delete_first_token()
+        return FragmentCacheNode(
+            nodelist, kind, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]],
+        )
+    return tag
+
+
+register.tag('cacherow', _fragment_tag('row'))
+register.tag('cachetable', _fragment_tag('table'))
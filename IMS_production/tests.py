@@ -1,2 +1,760 @@
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DataError, connection, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+from .alerts import format_digest, reorder_alerts, stock_velocity
+from .analytics import cached_stock_analytics
+from .timeseries import sales_series
+from .importer import import_catalog_file
+from .cache import PRODUCTS, suspend_invalidation, version
+from .ledger import InsufficientStock, adjust_stock, move, sell
+from .lookups import category_choices
+from .management.commands.rebuild_sales_summary import Command as RebuildSalesSummary
+from .middleware import ReplicaPinMiddleware
+from .models import ArchivedPeriod, Category, Product, Sale, SalesSummary, StockMovement, StockShard, StockSnapshot
+from . import coldstore, dbpool, index_audit, partitions, shards
+from .replica import PIN_SESSION_KEY, replica_reads
+from .snapshots import net_change, stock_on, stock_valuation, take_snapshot
+from .tasks import create_partitions, send_stock_alerts
+from .search import (
+    PRODUCT_SEARCH, SALE_SEARCH, SEARCH_RANK, STOCK_MOVEMENT_SEARCH, QuerySyntaxError, product_search_q, search_products,
+)
 
 # Create your tests here.
+
+
+def make_product(quantity=10, price="100.00", name="Rice", category=None):
+    category = category or Category.objects.create(name="Food", description="food")
+    return Product.objects.create(
+        name=name, description=name, category=category, price=Decimal(price), quantity=quantity,
+    )
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.product = make_product(quantity=10)
+
+    def test_sale_decrements_stock_and_writes_row(self):
+        sale = sell(self.product, 4, Decimal("120.00"))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 6)
+        self.assertEqual(Sale.objects.get(pk=sale.pk).quantity, 4)
+
+    def test_oversell_is_rejected_without_side_effects(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            sell(self.product, 11, Decimal("120.00"))
+        self.assertEqual(ctx.exception.available, 10)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 10)
+        self.assertFalse(Sale.objects.exists())
+
+    def test_movements_apply_in_both_directions(self):
+        move(self.product, 'Addition', 5, "restock")
+        move(self.product, 'Subtraction', 15, "damaged")
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 0)
+        self.assertEqual(StockMovement.objects.count(), 2)
+
+        with self.assertRaises(InsufficientStock):
+            move(self.product, 'Subtraction', 1, "damaged")
+        self.assertEqual(StockMovement.objects.count(), 2)
+
+
+class SalesSummaryRollupTests(TestCase):
+    def setUp(self):
+        self.product = make_product(quantity=100)
+
+    def buckets(self):
+        return {
+            (s.period, s.period_start): (s.total_sold, s.total_revenue)
+            for s in SalesSummary.objects.filter(product=self.product)
+        }
+
+    def test_sales_increment_day_week_and_month_buckets(self):
+        sell(self.product, 2, Decimal("150.00"), sale_date=date(2025, 3, 5))
+        sell(self.product, 3, Decimal("150.00"), sale_date=date(2025, 3, 6))
+
+        buckets = self.buckets()
+        self.assertEqual(buckets[('day', date(2025, 3, 5))], (2, Decimal("300.00")))
+        self.assertEqual(buckets[('week', date(2025, 3, 3))], (5, Decimal("750.00")))
+        self.assertEqual(buckets[('month', date(2025, 3, 1))], (5, Decimal("750.00")))
+
+    def test_delete_and_edit_move_totals(self):
+        sale = sell(self.product, 2, Decimal("150.00"), sale_date=date(2025, 3, 5))
+        sale.quantity = 1
+        sale.total_revenue = Decimal("150.00")
+        sale.save()
+        self.assertEqual(self.buckets()[('month', date(2025, 3, 1))], (1, Decimal("150.00")))
+
+        sale.delete()
+        self.assertEqual(self.buckets()[('month', date(2025, 3, 1))], (0, Decimal("0.00")))
+
+    def test_deleting_the_product_leaves_no_orphan_buckets(self):
+        sell(self.product, 2, Decimal("150.00"), sale_date=date(2025, 3, 5))
+        self.product.category.delete()
+        self.assertFalse(SalesSummary.objects.exists())
+
+    def test_rebuild_command_matches_incremental_totals(self):
+        for day in (1, 2, 15):
+            sell(self.product, 1, Decimal("150.00"), sale_date=date(2025, 4, day))
+        expected = self.buckets()
+
+        call_command('rebuild_sales_summary', chunk_size=2, stdout=StringIO())
+        self.assertEqual(self.buckets(), expected)
+
+    def test_rebuild_swaps_one_product_range_per_transaction(self):
+        other = make_product(name="Beans", category=self.product.category)
+        sell(self.product, 1, Decimal("150.00"), sale_date=date(2025, 4, 1))
+        sell(other, 2, Decimal("150.00"), sale_date=date(2025, 4, 1))
+        expected = sorted(SalesSummary.objects.values_list('product_id', 'period', 'period_start', 'total_sold', 'total_revenue'))
+
+        swap = RebuildSalesSummary._swap
+        with patch.object(RebuildSalesSummary, '_swap', autospec=True, side_effect=swap) as swapped:
+            call_command('rebuild_sales_summary', products_per_transaction=1, stdout=StringIO())
+        self.assertEqual([call.args[1] for call in swapped.call_args_list], [[self.product.pk], [other.pk]])
+        rebuilt = sorted(SalesSummary.objects.values_list('product_id', 'period', 'period_start', 'total_sold', 'total_revenue'))
+        self.assertEqual(rebuilt, expected)
+
+
+class CatalogImportTests(TestCase):
+    CSV = (
+        "name,category,price,quantity,sku\n"
+        "Rice,Food,1200,10,\n"
+        "Beans,Food,900,5,BEA-1\n"
+        "Rice,Food,1300,3,\n"
+        "Soap,Hygiene,500,0,\n"
+        "Milk,Drinks,700,8,BEA-1\n"
+        "Sugar,Food,800,4,\n"
+    )
+
+    def run_import(self, batch_size=2):
+        return import_catalog_file(BytesIO(self.CSV.encode()), "catalog.csv", batch_size=batch_size)
+
+    def test_products_and_categories_are_created_in_batches(self):
+        report = self.run_import()
+        self.assertEqual(report['processed'], 6)
+        self.assertEqual(report['created'], 3)
+        self.assertEqual(report['categories_created'], 2)
+        self.assertEqual(set(Product.objects.values_list('name', flat=True)), {"Rice", "Beans", "Sugar"})
+        self.assertTrue(all(Product.objects.values_list('sku', flat=True)))
+
+    def test_conflicts_and_errors_are_reported_per_row(self):
+        make_product(name="Sugar", category=Category.objects.create(name="Food", description=""))
+        report = self.run_import()
+        self.assertEqual(sorted(c['row'] for c in report['conflicts']), [4, 6, 7])
+        self.assertEqual([e['row'] for e in report['errors']], [5])
+        self.assertEqual(Category.objects.filter(name="Food").count(), 1)
+
+    def test_values_outside_the_columns_are_row_errors(self):
+        self.CSV = (
+            "name,category,price,quantity\n"
+            "A,Food,inf,1\nB,Food,NaN,1\nC,Food,1e30,1\nD,Food,123456789,1\nE,Food,5,inf\nF,Food,5,99999999999\n"
+            "Rice,Food,99999999.99,1\n"
+        )
+        report = self.run_import()
+        self.assertEqual([e['row'] for e in report['errors']], [2, 3, 4, 5, 6, 7])
+        self.assertEqual(report['created'], 1)
+
+    def test_a_batch_the_database_rejects_is_retried_row_by_row(self):
+        save = Product.save
+
+        def overflow_beans(product, *args, **kwargs):
+            if product.name == "Beans":
+                raise DataError("numeric field overflow")
+            return save(product, *args, **kwargs)
+
+        with patch.object(Product.objects, 'bulk_create', side_effect=DataError("numeric field overflow")), \
+                patch.object(Product, 'save', overflow_beans):
+            report = self.run_import(batch_size=10)
+        self.assertEqual(sorted(e['row'] for e in report['errors']), [3, 5])
+        self.assertEqual(set(Product.objects.values_list('name', flat=True)), {"Rice", "Sugar"})
+
+
+class ProductSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rice = make_product(name="Basmati Rice")
+        cls.juice = make_product(name="Juice", category=Category.objects.create(name="Drinks", description=""))
+        Sale.objects.create(product=cls.juice, quantity=1, sale_price=Decimal("5.00"), total_revenue=Decimal("5.00"))
+
+    def test_matches_name_sku_and_category(self):
+        products = Product.objects.all()
+        self.assertEqual(list(search_products(products, "basmati")), [self.rice])
+        self.assertEqual(list(search_products(products, self.juice.sku.lower())), [self.juice])
+        self.assertEqual(list(search_products(products, "drink")), [self.juice])
+
+    def test_related_search_and_sqlite_fallback(self):
+        sales = Sale.objects.filter(product_search_q("drink", "product__"))
+        self.assertEqual([sale.product for sale in sales], [self.juice])
+        # Ranking needs PostgreSQL; other backends keep the view's own ordering
+        self.assertNotIn(SEARCH_RANK, search_products(Product.objects.all(), "rice").query.annotations)
+
+
+@skipUnless(connection.vendor == 'postgresql', "search_vector is maintained by PostgreSQL triggers")
+class SearchVectorTriggerTests(TestCase):
+    def setUp(self):
+        self.rice = make_product(name="Basmati Rice")
+
+    def vector(self):
+        return Product.objects.values_list('search_vector', flat=True).get(pk=self.rice.pk)
+
+    def test_stock_updates_leave_the_vector_alone(self):
+        self.assertIsNotNone(self.vector())
+        # A NULL the trigger would overwrite shows whether it ran
+        Product.objects.filter(pk=self.rice.pk).update(search_vector=None)
+        sell(self.rice, 2, Decimal("120.00"))
+        self.assertIsNone(self.vector())
+        Product.objects.filter(pk=self.rice.pk).update(name="Brown Rice")
+        self.assertIsNotNone(self.vector())
+
+    def test_renaming_a_category_rebuilds_its_products(self):
+        Category.objects.filter(pk=self.rice.category_id).update(name="Grains")
+        self.assertEqual(list(search_products(Product.objects.all(), "grains")), [self.rice])
+
+
+class QuerySyntaxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rice = make_product(name="Rice", quantity=5, price="100.00")
+        cls.beans = make_product(name="Beans", quantity=50, price="450.00", category=cls.rice.category)
+        cls.sale = Sale.objects.create(
+            product=cls.rice, quantity=2, sale_price=Decimal("120.00"),
+            total_revenue=Decimal("240.00"), sale_date=date(2025, 2, 14),
+        )
+        Sale.objects.create(
+            product=cls.beans, quantity=1, sale_price=Decimal("500.00"),
+            total_revenue=Decimal("500.00"), sale_date=date(2025, 5, 1),
+        )
+
+    def search(self, syntax, queryset, query):
+        return list(syntax.filter(queryset, query))
+
+    def test_numeric_terms_compile_to_ranges(self):
+        products = Product.objects.order_by('pk')
+        self.assertEqual(self.search(PRODUCT_SEARCH, products, "qty>10"), [self.beans])
+        self.assertEqual(self.search(PRODUCT_SEARCH, products, "price:100..200"), [self.rice])
+        self.assertEqual(self.search(PRODUCT_SEARCH, products, "price:200.."), [self.beans])
+        self.assertEqual(self.search(PRODUCT_SEARCH, products, "qty<=5 rice"), [self.rice])
+
+    def test_partial_dates_cover_whole_months(self):
+        sales = Sale.objects.all()
+        self.assertEqual(self.search(SALE_SEARCH, sales, "date:2025-01..2025-03"), [self.sale])
+        self.assertEqual(self.search(SALE_SEARCH, sales, "date>2025-02"), [Sale.objects.get(product=self.beans)])
+        self.assertEqual(self.search(SALE_SEARCH, sales, "2025-02-14"), [self.sale])
+
+    def test_prefix_and_choice_terms(self):
+        self.assertEqual(self.search(PRODUCT_SEARCH, Product.objects.all(), f"sku:{self.rice.sku[:5]}"), [self.rice])
+        movement = move(self.rice, 'Addition', 3, "restock")
+        self.assertEqual(self.search(STOCK_MOVEMENT_SEARCH, StockMovement.objects.all(), "type:addition rice"), [movement])
+
+    def test_invalid_terms_raise_readable_errors(self):
+        for syntax, queryset, query in (
+            (PRODUCT_SEARCH, Product.objects.all(), "qty>many"),
+            (SALE_SEARCH, Sale.objects.all(), "date:2025-13"),
+        ):
+            with self.subTest(query=query), self.assertRaises(QuerySyntaxError):
+                syntax.filter(queryset, query)
+
+
+    def test_apostrophes_and_unknown_keys_are_plain_text(self):
+        mens = make_product(name="Men's shirt", category=self.rice.category)
+        ratio = make_product(name="Ratio X:1", category=self.rice.category)
+        products = Product.objects.all()
+        self.assertEqual(self.search(PRODUCT_SEARCH, products, "Men's shirt"), [mens])
+        self.assertEqual(self.search(PRODUCT_SEARCH, products, "qty>1 men's"), [mens])
+        self.assertEqual(self.search(PRODUCT_SEARCH, products, "X:1"), [ratio])
+
+
+class StockAnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rice = make_product(name="Rice", quantity=40, price="2.50")
+        cls.beans = make_product(name="Beans", quantity=3, price="10.00", category=cls.rice.category)
+        drinks = Category.objects.create(name="Drinks", description="")
+        make_product(name="Juice", quantity=0, price="4.00", category=drinks)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_aggregates_by_category_and_stock_level(self):
+        analytics = cached_stock_analytics()
+        self.assertEqual(analytics['levels']['out_of_stock'], 1)
+        self.assertEqual(analytics['levels']['low_stock'], 1)
+        self.assertEqual(analytics['levels']['in_stock'], 1)
+        self.assertEqual(analytics['levels']['value'], 130.0)
+        self.assertEqual(
+            [(row['name'], row['stock'], row['product_count']) for row in analytics['categories']],
+            [("Food", 43, 2), ("Drinks", 0, 1)],
+        )
+        self.assertEqual([row['name'] for row in analytics['top_products']], ["Rice", "Beans", "Juice"])
+
+    def test_cache_is_invalidated_by_ledger_and_saves(self):
+        cached_stock_analytics()
+        with self.assertNumQueries(0):
+            cached_stock_analytics()
+
+        sell(self.beans, 3, Decimal("12.00"))
+        self.assertEqual(cached_stock_analytics()['levels']['out_of_stock'], 2)
+
+        self.rice.quantity = 5
+        self.rice.save()
+        self.assertEqual(cached_stock_analytics()['levels']['low_stock'], 1)
+
+    def test_suspended_invalidation_keeps_the_cache(self):
+        cached_stock_analytics()
+        with suspend_invalidation():
+            sell(self.beans, 3, Decimal("12.00"))
+        self.assertEqual(cached_stock_analytics()['levels']['out_of_stock'], 1)
+        sell(self.rice, 1, Decimal("2.50"))
+        self.assertEqual(cached_stock_analytics()['levels']['out_of_stock'], 2)
+
+    def test_endpoint_is_admin_only(self):
+        admin = get_user_model().objects.create_user("boss", "boss@example.com", role="admin", password="pw")
+        self.client.force_login(admin)
+        response = self.client.get(reverse('analytics-stock'), {'top': 1})
+        self.assertEqual([row['name'] for row in response.json()['top_products']], ["Rice"])
+
+
+class CachedLookupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = make_product(quantity=10)
+
+    def test_category_choices_follow_category_writes(self):
+        self.assertEqual(category_choices(), [(self.product.category.pk, "Food")])
+        with self.assertNumQueries(0):
+            category_choices()
+        drinks = Category.objects.create(name="Drinks", description="")
+        self.assertEqual([name for _, name in category_choices()], ["Drinks", "Food"])
+        drinks.delete()
+        self.assertEqual(len(category_choices()), 1)
+
+
+class SalesSeriesTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.last_month = (self.today.replace(day=1) - timedelta(days=1)).replace(day=1)
+        self.rice = make_product(quantity=100, price="10.00")
+        sell(self.rice, 4, Decimal("12.00"), sale_date=self.last_month)
+        sell(self.rice, 2, Decimal("15.00"), sale_date=self.today)
+
+    def test_closed_buckets_come_from_rollups_and_current_is_live(self):
+        # Skew the closed rollup to prove it is what the series reads
+        SalesSummary.objects.filter(period='month', period_start=self.last_month).update(total_sold=40)
+        SalesSummary.objects.filter(period='month', period_start=self.today.replace(day=1)).update(total_sold=99)
+
+        series = sales_series('month', start=self.last_month)
+        self.assertEqual([bucket['period_start'] for bucket in series], [self.last_month, self.today.replace(day=1)])
+        self.assertEqual(series[0]['units'], 40)
+        self.assertEqual(series[1]['units'], 2)
+        self.assertEqual(series[1]['revenue'], 30.0)
+        self.assertEqual(series[1]['average_price'], 15.0)
+
+    def test_empty_buckets_and_filters(self):
+        other = make_product(name="Juice", category=Category.objects.create(name="Drinks", description=""))
+        series = sales_series('day', start=self.today - timedelta(days=2), category=other.category_id)
+        self.assertEqual(len(series), 3)
+        self.assertEqual({bucket['units'] for bucket in series}, {0})
+        self.assertIsNone(series[0]['average_price'])
+        with self.assertRaises(ValueError):
+            sales_series('year')
+
+
+class ReorderAlertTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.rice = make_product(name="Rice", quantity=100)
+        self.beans = make_product(name="Beans", quantity=100, category=self.rice.category)
+        self.salt = make_product(name="Salt", quantity=0, category=self.rice.category)
+        # Rice: 2/day over four weeks; Beans: a burst of 21 this week
+        for days_ago in range(28):
+            sell(self.rice, 2, Decimal("110.00"), sale_date=self.today - timedelta(days=days_ago))
+        sell(self.beans, 21, Decimal("110.00"), sale_date=self.today)
+        move(self.beans, 'Subtraction', 7, "damaged")
+
+    def test_velocity_uses_the_higher_moving_average(self):
+        velocity = {row['name']: row for row in stock_velocity()}
+        self.assertEqual(velocity['Rice']['velocity'], 2)
+        self.assertEqual(velocity['Rice']['reorder_point'], 20)
+        self.assertEqual(velocity['Beans']['velocity'], 4)          # (21 + 7) / 7 days
+        self.assertEqual(velocity['Beans']['days_of_cover'], 72 / 4)
+        self.assertIsNone(velocity['Salt']['days_of_cover'])
+
+    def test_alerts_and_single_digest(self):
+        Product.objects.filter(pk=self.rice.pk).update(quantity=10)
+        alerts = reorder_alerts()
+        self.assertEqual([row['name'] for row in alerts], ["Salt", "Rice"])
+        digest = format_digest(alerts, limit=1)
+        self.assertIn("Salt", digest)
+        self.assertIn("... and 1 more.", digest)
+
+        with self.settings(STOCK_ALERT_RECIPIENTS=["+250788000000"]), patch('IMS_production.tasks.send_sms') as send_sms:
+            result = send_stock_alerts()
+        send_sms.delay.assert_called_once()
+        self.assertEqual(result, {"alerts": 2, "sent": 1})
+
+
+class StockSnapshotTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+        self.rice = make_product(name="Rice", quantity=10, price="2.00")
+        Product.objects.filter(pk=self.rice.pk).update(updated_at=timezone.now() - timedelta(days=3))
+
+    def test_snapshot_excludes_changes_made_after_the_day(self):
+        sell(self.rice, 4, Decimal("3.00"))   # today, after yesterday closed
+        self.assertEqual(take_snapshot(self.yesterday), 1)
+        self.assertEqual(take_snapshot(self.yesterday), 1)   # re-runs overwrite
+        snapshot = StockSnapshot.objects.get()
+        self.assertEqual((snapshot.date, snapshot.quantity), (self.yesterday, 10))
+
+    def test_sharded_stock_is_read_from_the_shards_not_the_unfolded_quantity(self):
+        shards.enable(self.rice, 2)
+        sell(self.rice, 4, Decimal("3.00"))
+        self.assertEqual(take_snapshot(self.yesterday), 1)
+        self.assertEqual(StockSnapshot.objects.get().quantity, 10)
+        self.rice.refresh_from_db()
+        self.assertEqual(self.rice.quantity, 10)     # the snapshot wrote nothing else
+
+    def test_point_in_time_reads_snapshot_plus_later_changes(self):
+        take_snapshot(self.yesterday)
+        move(self.rice, 'Addition', 5, "restock")
+        sell(self.rice, 3, Decimal("3.00"))
+        self.assertEqual(stock_on(self.yesterday), {self.rice.pk: (10, Decimal("2.00"))})
+        self.assertEqual(stock_on(self.today)[self.rice.pk][0], 12)
+
+        valuation = stock_valuation(self.yesterday)
+        self.assertEqual((valuation['units'], valuation['value']), (10, Decimal("20.00")))
+
+        admin = get_user_model().objects.create_user("boss", "boss@example.com", role="admin", password="pw")
+        self.client.force_login(admin)
+        response = self.client.get(reverse('analytics-valuation'), {'date': self.yesterday.isoformat()})
+        self.assertEqual(response.json()['value'], "20.00")
+
+    def test_products_without_snapshot_are_replayed_backwards(self):
+        sell(self.rice, 4, Decimal("3.00"))
+        self.assertEqual(stock_on(self.yesterday)[self.rice.pk][0], 10)
+        make_product(name="Beans", category=self.rice.category)   # created today
+        self.assertEqual(len(stock_on(self.yesterday)), 1)
+
+
+class ShardedStockTests(TestCase):
+    def setUp(self):
+        self.product = make_product(quantity=10)
+        shards.enable(self.product, 4)
+
+    def quantities(self):
+        return list(StockShard.objects.filter(product=self.product).order_by('shard').values_list('quantity', flat=True))
+
+    def test_enable_spreads_stock_and_sales_hit_shards(self):
+        self.assertEqual(self.quantities(), [3, 3, 2, 2])
+        sell(self.product, 2, Decimal("120.00"))
+        self.assertEqual(sum(self.quantities()), 8)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 10)      # until the fold
+        self.assertEqual(shards.fold_all(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 8)
+        self.assertEqual(self.quantities(), [2, 2, 2, 2])
+
+    def test_large_sale_drains_across_shards_and_total_never_goes_negative(self):
+        sell(self.product, 9, Decimal("120.00"))
+        self.assertEqual(sum(self.quantities()), 1)
+        with self.assertRaises(InsufficientStock) as ctx:
+            sell(self.product, 2, Decimal("120.00"))
+        self.assertEqual(ctx.exception.available, 1)
+        self.assertTrue(all(quantity >= 0 for quantity in self.quantities()))
+
+    def test_stale_instances_follow_the_mode_in_the_database(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        stale.shard_count = 0               # loaded before enable
+        sell(stale, 3, Decimal("120.00"))
+        self.assertEqual(sum(self.quantities()), 7)
+        shards.fold_all()
+        self.assertEqual(Product.objects.get(pk=self.product.pk).quantity, 7)
+
+        stale = Product.objects.get(pk=self.product.pk)
+        shards.disable(self.product)
+        move(stale, 'Addition', 5, "restock")   # still thinks it is sharded
+        self.assertEqual(Product.objects.get(pk=self.product.pk).quantity, 12)
+        with self.assertRaises(InsufficientStock):
+            sell(stale, 13, Decimal("120.00"))
+
+    def test_additions_and_disable_fold_back(self):
+        move(self.product, 'Addition', 5, "restock")
+        shards.disable(self.product)
+        self.assertEqual(self.product.quantity, 15)
+        self.assertEqual(self.product.shard_count, 0)
+        self.assertFalse(StockShard.objects.exists())
+
+
+    def test_shard_writes_reach_cached_reads_and_timestamps(self):
+        def changes(action):
+            before = (version(PRODUCTS), Product.objects.get(pk=self.product.pk).created_at)
+            action()
+            after = (version(PRODUCTS), Product.objects.get(pk=self.product.pk).created_at)
+            return [a != b for a, b in zip(before, after)]
+
+        # The row itself only moves with quantity, at the fold
+        self.assertEqual(changes(lambda: adjust_stock(self.product, -2)), [True, False])
+        self.assertEqual(changes(shards.fold_all), [True, True])
+        self.assertEqual(changes(shards.fold_all), [False, False])       # nothing to fold
+        self.assertEqual(changes(lambda: shards.disable(self.product)), [True, True])
+        self.assertEqual(changes(lambda: shards.enable(self.product, 2)), [True, True])
+
+class DatabasePoolTests(TestCase):
+    def test_stats_endpoint_reports_this_process(self):
+        admin = get_user_model().objects.create_user("boss", "boss@example.com", role="admin", password="pw")
+        self.client.force_login(admin)
+        response = self.client.get(reverse('db-pool'))
+        # SQLite has no pool
+        self.assertEqual(response.json(), {'pid': os.getpid(), 'pools': {}})
+
+    def test_closing_pools_opens_none_for_unused_aliases(self):
+        opened = Mock()
+
+        class Wrapper:
+            _connection_pools = {'default': opened}
+
+            def __init__(self, alias):
+                self.alias = alias
+
+            @property
+            def pool(self):
+                if self.alias not in self._connection_pools:
+                    raise AssertionError(f"pool opened for {self.alias}")
+                return self._connection_pools[self.alias]
+
+            def close_pool(self):
+                self.pool.close()
+
+        with patch.object(dbpool, 'connections') as connections:
+            connections.all.return_value = [Wrapper('default'), Wrapper('replica')]
+            self.assertEqual(dbpool.pool_stats(), {'default': opened.get_stats.return_value})
+            dbpool.close_pools()
+        opened.close.assert_called_once_with()
+
+    def test_forked_child_drops_inherited_pools_without_closing_them(self):
+        inherited = Mock()
+
+        class Wrapper:
+            _connection_pools = {'default': inherited}
+            alias = 'default'
+            connection = object()
+
+        wrapper = Wrapper()
+        with patch.object(dbpool, 'connections') as connections:
+            connections.all.return_value = [wrapper]
+            dbpool.forget_inherited_pools()
+        self.assertEqual(Wrapper._connection_pools, {})
+        self.assertIsNone(wrapper.connection)
+        inherited.close.assert_not_called()
+
+
+class ReplicaRoutingTests(TestCase):
+    # Only the alias has to exist for routing decisions; no query reaches it
+    replica = patch.dict(settings.DATABASES, {'replica': {}})
+
+    def request(self, method='get', pinned_until=None):
+        request = getattr(RequestFactory(), method)('/')
+        request.session = {} if pinned_until is None else {PIN_SESSION_KEY: pinned_until}
+        return request
+
+    def test_opted_in_reads_of_inventory_models_use_the_replica(self):
+        with self.replica:
+            self.assertEqual(Product.objects.all().db, 'default')
+            with replica_reads(self.request()):
+                self.assertEqual(Product.objects.all().db, 'replica')
+                self.assertEqual(Sale.objects.all().db, 'replica')
+                # Sessions and users never lag behind a login
+                self.assertEqual(get_user_model().objects.all().db, 'default')
+                self.assertEqual(router.db_for_write(Product), 'default')
+            self.assertEqual(Product.objects.all().db, 'default')
+
+    def test_without_a_replica_everything_reads_from_the_primary(self):
+        with replica_reads(self.request()):
+            self.assertEqual(Product.objects.all().db, 'default')
+
+    def test_a_write_pins_the_session_to_the_primary(self):
+        middleware = ReplicaPinMiddleware(lambda request: HttpResponse())
+        with self.replica:
+            read = self.request()
+            middleware(read)
+            self.assertNotIn(PIN_SESSION_KEY, read.session)
+
+            write = self.request('post')
+            middleware(write)
+            self.assertGreater(write.session[PIN_SESSION_KEY], time.time())
+            with replica_reads(write):
+                self.assertEqual(Product.objects.all().db, 'default')
+
+            with replica_reads(self.request(pinned_until=time.time() - 1)):
+                self.assertEqual(Product.objects.all().db, 'replica')
+
+
+class IndexAuditTests(TestCase):
+    def test_reports_duplicate_prefix_and_unused_indexes(self):
+        index = index_audit.DbIndex
+        indexes = [
+            index('IMS_product_name_a26851_idx', ('name',), scans=40),
+            index('IMS_product_name_334d5b_idx', ('name', 'price', 'quantity'), scans=3),
+            index('IMS_product_sku_bfdc72_idx', ('sku',), scans=9),
+            index('product_sku_key', ('sku',), unique=True, scans=120),
+            index('IMS_product_quantit_cd03d9_idx', ('quantity',), scans=0),
+            index('product_name_trgm', (), special=True, scans=0),
+        ]
+        findings = {finding.index.name: finding for finding in index_audit.audit_model(Product, indexes)}
+
+        self.assertEqual(findings['IMS_product_name_a26851_idx'].reason, 'prefix')
+        self.assertEqual(findings['IMS_product_name_a26851_idx'].covered_by, 'IMS_product_name_334d5b_idx')
+        self.assertEqual(findings['IMS_product_sku_bfdc72_idx'].covered_by, 'product_sku_key')
+        self.assertEqual(findings['IMS_product_quantit_cd03d9_idx'].reason, 'unused')
+        # Created in SQL by migration 0007: reported, but left out of the migration
+        self.assertIsNone(findings['product_name_trgm'].operation)
+        self.assertNotIn('IMS_product_name_334d5b_idx', findings)
+        self.assertNotIn('product_sku_key', findings)
+
+    def test_the_current_schema_has_nothing_to_drop(self):
+        out = StringIO()
+        call_command('audit_indexes', stdout=out)
+        self.assertNotIn('-> drop', out.getvalue())
+        self.assertNotIn('Suggested migration', out.getvalue())
+
+    def test_suggested_migration_drops_declared_indexes(self):
+        declared = Product._meta.indexes[0]
+        finding = index_audit.Finding(Product, index_audit.DbIndex(declared.name, ('name',)), 'prefix')
+        finding.operation = index_audit.drop_operation(Product, finding.index)
+
+        source = index_audit.suggested_migration('IMS_production', [finding])
+        self.assertRegex(source, r"dependencies = \[\n        \('IMS_production', '\d{4}_\w+'\),\n    \]")
+        self.assertIn(f"migrations.RemoveIndex(\n            model_name='product',\n            name='{declared.name}'", source)
+
+
+class PartitionTests(TestCase):
+    def test_month_arithmetic_and_names(self):
+        self.assertEqual(partitions.month_of(date(2025, 12, 31)), date(2025, 12, 1))
+        self.assertEqual(partitions.add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(partitions.add_months(date(2025, 1, 1), -1), date(2024, 12, 1))
+        self.assertEqual(partitions.partition_name(Sale, date(2025, 3, 1)), f"{Sale._meta.db_table}_p2025_03")
+        # Sale is cut on its date, StockMovement on midnight UTC timestamps
+        self.assertEqual(partitions._bound(Sale, date(2025, 3, 1)), "2025-03-01")
+        self.assertEqual(partitions._bound(StockMovement, date(2025, 3, 1)), "2025-03-01 00:00:00+00")
+
+    def test_edited_movements_stay_in_their_month(self):
+        movement = move(make_product(), 'Addition', 3, "restock")
+        StockMovement.objects.filter(pk=movement.pk).update(created_at=datetime(2025, 3, 10, tzinfo=dt_timezone.utc))
+        movement.refresh_from_db()
+        movement.reason = "restock (corrected)"
+        movement.save()
+        movement.refresh_from_db()
+        self.assertEqual(movement.created_at, datetime(2025, 3, 10, tzinfo=dt_timezone.utc))
+        if partitions.is_partitioned(StockMovement):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT tableoid::regclass::text FROM {StockMovement._meta.db_table} WHERE id = %s", [movement.pk],
+                )
+                current = partitions.partition_name(StockMovement, partitions.month_of(date.today()))
+                self.assertNotEqual(cursor.fetchone()[0].strip('"'), current)
+
+    def test_everything_is_a_no_op_without_partitioned_tables(self):
+        if partitions.is_partitioned(Sale):
+            self.skipTest("running on partitioned PostgreSQL tables")
+        self.assertEqual(partitions.partitions(Sale), [])
+        self.assertEqual(create_partitions.apply().get(), {'created': []})
+        with self.assertRaises(ValueError):
+            partitions.detach_partition(Sale, date(2024, 1, 1))
+
+
+class ColdStoreTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+        self.rice = make_product(name="Rice", quantity=100, price="2.00")
+        old = datetime(2023, 1, 20, 12, tzinfo=dt_timezone.utc)
+        self.sales = [
+            sell(self.rice, 4, Decimal("3.00"), sale_date=date(2023, 1, 15)),
+            sell(self.rice, 2, Decimal("3.50"), sale_date=date(2023, 1, 31)),
+        ]
+        move(self.rice, 'Addition', 10, "restock")
+        Sale.objects.update(created_at=old)
+        StockMovement.objects.update(created_at=old)
+        self.recent = sell(self.rice, 1, Decimal("3.00"))
+
+    def test_closed_months_move_to_files_and_still_count(self):
+        since = datetime(2022, 12, 1, tzinfo=dt_timezone.utc)
+        before = net_change(since)
+        summarised = SalesSummary.objects.filter(period='monthly').values_list('total_sold', flat=True)
+        summarised = sorted(summarised)
+
+        periods = coldstore.archive_closed_periods(after_months=12)
+        self.assertEqual(sorted((p.source, p.month, p.rows) for p in periods), [
+            ('sale', date(2023, 1, 1), 2), ('stockmovement', date(2023, 1, 1), 1),
+        ])
+        self.assertEqual(list(Sale.objects.values_list('pk', flat=True)), [self.recent.pk])
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertEqual(coldstore.archive_closed_periods(after_months=12), [])
+
+        sale_period = ArchivedPeriod.objects.get(source='sale')
+        self.assertEqual(sale_period.totals, {'count': '2', 'quantity': '6', 'total_revenue': '19.00'})
+        coldstore.verify_period(sale_period)
+        data = coldstore.read_period(sale_period)
+        self.assertEqual(data['id'], [sale.pk for sale in self.sales])
+        self.assertEqual(data['sale_price'], [Decimal("3.00"), Decimal("3.50")])
+        self.assertEqual(data['sale_date'], [date(2023, 1, 15), date(2023, 1, 31)])
+        self.assertEqual(coldstore.read_period(ArchivedPeriod.objects.get(source='stockmovement'))['reason'], ["restock"])
+
+        # Deleted without signals: stock history and summaries are unchanged
+        self.assertEqual(net_change(since), before)
+        self.assertEqual(sorted(SalesSummary.objects.filter(period='monthly').values_list('total_sold', flat=True)), summarised)
+        # A range that ends before the archive opens no file
+        with patch.object(coldstore, 'read_period') as read:
+            net_change(datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        read.assert_not_called()
+
+    def test_months_are_read_and_deleted_a_chunk_at_a_time(self):
+        period = coldstore.archive_period(Sale, date(2023, 1, 1), chunk_size=1)
+        self.assertEqual(period.rows, 2)
+        self.assertEqual(period.bounds['sale_date'], ["2023-01-15", "2023-01-31"])
+        data = coldstore.read_period(period)
+        self.assertEqual(data['id'], [sale.pk for sale in self.sales])
+        self.assertEqual(data['total_revenue'], [Decimal("12.00"), Decimal("7.00")])
+        self.assertEqual(list(Sale.objects.values_list('pk', flat=True)), [self.recent.pk])
+
+    def test_rebuilding_summaries_keeps_archived_months(self):
+        coldstore.archive_closed_periods(after_months=12)
+        series = sales_series('month', start=date(2023, 1, 1), product=self.rice.pk)
+        self.assertEqual(series[0]['units'], 6)
+
+        call_command('rebuild_sales_summary', chunk_size=1, stdout=StringIO())
+        self.assertEqual(sales_series('month', start=date(2023, 1, 1), product=self.rice.pk), series)
+
+    def test_exports_include_archived_rows_matching_the_search(self):
+        coldstore.archive_closed_periods(after_months=12)
+        staff = get_user_model().objects.create_user("clerk", "clerk@example.com", role="staff", password="pw")
+        self.client.force_login(staff)
+
+        def exported(query):
+            response = self.client.get(reverse('staff-sales'), {'format': 'csv', 'q': query})
+            lines = b''.join(response.streaming_content).decode().splitlines()[1:]
+            return sorted(int(line.split(',')[0]) for line in lines)
+
+        old, recent = sorted(sale.pk for sale in self.sales), [self.recent.pk]
+        self.assertEqual(exported(''), sorted(old + recent))
+        self.assertEqual(exported('qty>3'), [self.sales[0].pk])
+        self.assertEqual(exported('Rice date:2023-01'), old)
+        self.assertEqual(exported('Beans'), [])
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from .cache import PRODUCTS, SALES, cached
+from .models import Sale, SalesSummary
+from .rollups import PERIODS, bucket_starts
+
+TRUNCATE = {
+    'day': TruncDay,
+    'week': TruncWeek,      # Monday, like rollups.bucket_starts
+    'month': TruncMonth,
+}
+
+# Buckets returned when the caller gives no start date
+DEFAULT_BUCKETS = {
+    'day': 30,
+    'week': 12,
+    'month': 12,
+}
+MAX_BUCKETS = 400
+
+
+#---------------------------------------------<> Buckets <>---------------------------------------------#
+
+def next_bucket(start, period):
+    if period == 'day':
+        return start + timedelta(days=1)
+    if period == 'week':
+        return start + timedelta(weeks=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def previous_buckets(end, period, count):
+    """First day of the ``count`` buckets ending with the one containing ``end``."""
+    start = bucket_starts(end)[period]
+    for _ in range(count - 1):
+        start = bucket_starts(start - timedelta(days=1))[period]
+    return start
+
+
+def _as_date(value):
+    return value.date() if hasattr(value, 'date') and callable(value.date) else value
+
+
+#---------------------------------------------<> Series <>---------------------------------------------#
+
+def sales_series(period='day', start=None, end=None, product=None, category=None):
+    """
+    Units, revenue and average price per ``period`` bucket between ``start`` and ``end``.
+
+    Closed buckets are read from the SalesSummary rollups, which are already
+    aggregated per product; only the bucket containing today is aggregated live
+    from Sale with a database-side Trunc*. ``product`` and ``category`` are ids.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of: {', '.join(PERIODS)}")
+
+    end = end or timezone.localdate()
+    start = bucket_starts(start)[period] if start else previous_buckets(end, period, DEFAULT_BUCKETS[period])
+    if start > end:
+        raise ValueError("start must not be after end")
+    current = bucket_starts(timezone.localdate())[period]
+
+    totals = {}
+
+    closed = SalesSummary.objects.filter(period=period, period_start__gte=start, period_start__lte=end, period_start__lt=current)
+    if product:
+        closed = closed.filter(product_id=product)
+    if category:
+        closed = closed.filter(product__category_id=category)
+    for row in closed.values('period_start').annotate(units=Sum('total_sold'), revenue=Sum('total_revenue')):
+        totals[row['period_start']] = (row['units'], row['revenue'])
+
+    if current <= end:
+        live = Sale.objects.filter(sale_date__gte=max(start, current), sale_date__lte=end)
+        if product:
+            live = live.filter(product_id=product)
+        if category:
+            live = live.filter(product__category_id=category)
+        rows = (
+            live.annotate(bucket=TRUNCATE[period]('sale_date'))
+            .values('bucket').annotate(units=Sum('quantity'), revenue=Sum('total_revenue'))
+        )
+        for row in rows:
+            totals[_as_date(row['bucket'])] = (row['units'], row['revenue'])
+
+    series = []
+    bucket = start
+    while bucket <= end and len(series) < MAX_BUCKETS:
+        units, revenue = totals.get(bucket, (0, Decimal(0)))
+        units, revenue = units or 0, revenue or Decimal(0)
+        series.append({
+            'period_start': bucket,
+            'units': units,
+            'revenue': float(revenue),
+            'average_price': float(revenue / units) if units else None,
+        })
+        bucket = next_bucket(bucket, period)
+    return series
+
+
+def cached_sales_series(period='day', start=None, end=None, product=None, category=None):
+    # Today is part of the key: it decides the default range and which bucket is live
+    key = f'series:{timezone.localdate()}:{period}:{start}:{end}:{product}:{category}'
+    return cached((SALES, PRODUCTS), key, lambda: sales_series(period, start, end, product, category))
+
+
+__all__ = (
+    "cached_sales_series",
+    "sales_series",
+)
@@ -1,7 +1,17 @@
 from django.urls import path
-from .views import ProductStockChartView
+from .views import (
+    CategoryAutocompleteView, DatabasePoolView, DeletionStatusView, ProductAutocompleteView,
+    ProductStockAnalyticsView, ProductStockChartView, SalesSeriesView, StockValuationView,
+)
 
 
 urlpatterns = [ 
     path('analytics/', ProductStockChartView.as_view(), name='analytics'),
+    path('analytics/stock.json', ProductStockAnalyticsView.as_view(), name='analytics-stock'),
+    path('analytics/sales.json', SalesSeriesView.as_view(), name='analytics-sales'),
+    path('analytics/valuation.json', StockValuationView.as_view(), name='analytics-valuation'),
+    path('db/pool.json', DatabasePoolView.as_view(), name='db-pool'),
+    path('deletions/<str:target>/<int:pk>.json', DeletionStatusView.as_view(), name='deletion-status'),
+    path('autocomplete/products.json', ProductAutocompleteView.as_view(), name='autocomplete-products'),
+    path('autocomplete/categories.json', CategoryAutocompleteView.as_view(), name='autocomplete-categories'),
 ]
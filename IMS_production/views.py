@@ -1,23 +1,116 @@
-from IMS_production.models import Product
-from django.views.generic import ListView
-from permission.login import LoginAdmin
+import os
+from django.http import Http404, JsonResponse
+from django.utils.dateparse import parse_date
+from django.views import View
+from django.views.generic import TemplateView
+from permission.login import LoginAdmin, LoginAuth
+from .analytics import cached_stock_analytics
+from .dbpool import pool_stats
+from .deletion import job_status
+from .lookups import category_suggestions, product_suggestions
+from .mixins import ReplicaReadMixin
+from .snapshots import stock_valuation
+from .timeseries import cached_sales_series
 
 # Create your views here.
 #-----------------------------------------------------------------<> analytics  <>---------------------------------------------#
 
 
-class ProductStockChartView(LoginAdmin, ListView):
-    model = Product
+class ProductStockChartView(LoginAdmin, ReplicaReadMixin, TemplateView):
+    # The page is a static shell; the charts load from ProductStockAnalyticsView
     template_name = 'analytics.html'
-    context_object_name = 'products'
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        # Include data for the chart
-        products = Product.objects.all().order_by('-updated_at') 
-        context['chart_data'] = {
-            'labels': [product.name for product in products],
-            'data': [product.quantity for product in products],
-            'categories': [product.category.name for product in products],
-        }
-        return context
\ No newline at end of file
+
+
+class ProductStockAnalyticsView(LoginAdmin, ReplicaReadMixin, View):
+    max_top = 50
+
+    def get(self, request):
+        try:
+            top = min(max(int(request.GET.get('top', 10)), 1), self.max_top)
+        except ValueError:
+            top = 10
+        return JsonResponse(cached_stock_analytics(top))
+
+
+class SalesSeriesView(LoginAdmin, ReplicaReadMixin, View):
+    """``?period=day|week|month&start=&end=&product=&category=`` as a JSON time series."""
+
+    def get(self, request):
+        try:
+            start, end = (self._date(request, name) for name in ('start', 'end'))
+            series = cached_sales_series(
+                period=request.GET.get('period', 'day'), start=start, end=end,
+                product=self._id(request, 'product'), category=self._id(request, 'category'),
+            )
+        except ValueError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        return JsonResponse({'series': series})
+
+    def _date(self, request, name):
+        value = request.GET.get(name)
+        if not value:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+        return parsed
+
+    def _id(self, request, name):
+        value = request.GET.get(name)
+        if not value:
+            return None
+        if not value.isdigit():
+            raise ValueError(f"{name} must be an id")
+        return int(value)
+
+
+class StockValuationView(LoginAdmin, ReplicaReadMixin, View):
+    """``?date=YYYY-MM-DD``: units and value held at the end of that day."""
+
+    def get(self, request):
+        day = parse_date(request.GET.get('date', ''))
+        if day is None:
+            return JsonResponse({'error': "date must be a date in YYYY-MM-DD format"}, status=400)
+        return JsonResponse(stock_valuation(day))
+
+
+#-----------------------------------------------------------------<> database  <>---------------------------------------------#
+
+
+class DatabasePoolView(LoginAdmin, View):
+    """This worker process's connection pool counters (size, waiting requests, errors...)."""
+
+    def get(self, request):
+        return JsonResponse({'pid': os.getpid(), 'pools': pool_stats()})
+
+
+#-----------------------------------------------------------------<> deletion  <>---------------------------------------------#
+
+
+class DeletionStatusView(LoginAdmin, View):
+    """Progress of the background deletion of a category or product, polled by the admin lists."""
+
+    def get(self, request, target, pk):
+        status = job_status(target, pk)
+        if status is None:
+            raise Http404(f"No deletion of {target} {pk}")
+        return JsonResponse(status)
+
+
+#-----------------------------------------------------------------<> autocomplete  <>---------------------------------------------#
+
+
+class AutocompleteView(LoginAuth, View):
+    """``?q=<prefix>`` -> ``{"results": [{"id": ..., "text": ...}, ...]}`` for AutocompleteSelect."""
+    suggest = None
+
+    def get(self, request):
+        return JsonResponse({'results': self.suggest(request.GET.get('q', ''))})
+
+
+class ProductAutocompleteView(AutocompleteView):
+    suggest = staticmethod(product_suggestions)
+
+
+class CategoryAutocompleteView(AutocompleteView):
+    suggest = staticmethod(category_suggestions)
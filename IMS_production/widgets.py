@@ -0,0 +1,42 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    A <select> for a ModelChoiceField over a large table.
+
+    Only the empty option and the selected row are rendered; autocomplete.js
+    fills in the rest from ``url`` as the user types. Validation is the field's
+    own single ``queryset.get(pk=...)``, so neither GET nor POST loads the table.
+    """
+
+    class Media:
+        js = ('js/autocomplete.js',)
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse(self.url)
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = [pk for pk in value if pk]
+        options = []
+        if field.empty_label is not None:
+            options.append(self.create_option(name, '', field.empty_label, not selected, 0, attrs=attrs))
+        if selected:
+            try:
+                rows = list(self.choices.queryset.filter(pk__in=selected))
+            except (ValueError, TypeError, ValidationError):
+                # A tampered or stale value; the field reports it when validating
+                rows = []
+            for obj in rows:
+                option_value, label = self.choices.choice(obj)
+                options.append(self.create_option(name, option_value, label, True, len(options), attrs=attrs))
+        return [(None, options, 0)]
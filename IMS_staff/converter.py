@@ -1,10 +1,21 @@
+from celery.result import AsyncResult
 from django.contrib import messages
-from django.views.generic import CreateView
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.views import View
+from django.views.generic import CreateView, FormView
 from permission.login import LoginStaff
 from IMS_production.models import Category, Sale, StockMovement
-from django.urls import reverse_lazy
+from IMS_production.ledger import InsufficientStock, record_movement, record_sale
+from IMS_production.importer import unique_upload_name
+from IMS_production.tasks import import_catalog
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth.mixins import UserPassesTestMixin
-from .forms import ProductForm, StockMovForm, SalesForm
+from .forms import ProductForm, StockMovForm, SalesForm, CatalogImportForm
+
+# Import task ids started from this session; only those can be polled
+IMPORT_TASKS_SESSION_KEY = 'catalog_import_tasks'
+IMPORT_TASKS_KEPT = 20
 
 
 #--------------------------------------------------<> Product <>--------------------------------------------#
@@ -45,6 +56,45 @@ class ProductCreateView(LoginStaff, UserPassesTestMixin, CreateView):
     
 
 
+class ProductImportView(LoginStaff, UserPassesTestMixin, FormView):
+    form_class = CatalogImportForm
+    template_name = 'staff/products/product-import.html'
+    login_url = reverse_lazy('login')
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        file_name = default_storage.save(unique_upload_name(upload.name), upload)
+        result = import_catalog.delay(file_name, form.cleaned_data.get('batch_size'))
+        started = self.request.session.get(IMPORT_TASKS_SESSION_KEY, [])
+        self.request.session[IMPORT_TASKS_SESSION_KEY] = (started + [result.id])[-IMPORT_TASKS_KEPT:]
+
+        messages.success(self.request, f"Import of '{upload.name}' started, progress is shown below.")
+        return HttpResponseRedirect(f"{reverse('staff-import-product')}?task={result.id}")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        task_id = self.request.GET.get('task', '')
+        context['task_id'] = task_id if task_id in self.request.session.get(IMPORT_TASKS_SESSION_KEY, []) else ''
+        return context
+
+    def test_func(self):
+        return not self.request.user.is_admin
+
+
+class ProductImportStatusView(LoginStaff, View):
+    """Polled by the import page: Celery state plus the progress or final report."""
+
+    def get(self, request, task_id):
+        # The report names products and rows; other users' imports are not found
+        if task_id not in request.session.get(IMPORT_TASKS_SESSION_KEY, []):
+            raise Http404("No such import")
+        result = AsyncResult(task_id)
+        info = result.info if isinstance(result.info, dict) else {}
+        if result.failed():
+            info = {'error': str(result.result)}
+        return JsonResponse({'state': result.state, 'info': info})
+
+
 #----------------------------------------------------------<> Category <>-----------------------------------------------------#
 
 class CategoryCreateView(LoginStaff, UserPassesTestMixin, CreateView):
@@ -79,22 +129,17 @@ class StockMovCreateView(LoginStaff, UserPassesTestMixin, CreateView):
         return not self.request.user.is_admin  # Only allow admin users to create stock movements
 
     def form_valid(self, form):
-        product = form.cleaned_data['product']
-        quantity = form.cleaned_data['quantity']
-        movement_type = form.cleaned_data['movement_type']
-
-        # Update stock in product table
-        if movement_type == 'Addition':
-            product.quantity += quantity
-        elif movement_type == 'Subtraction':
-            product.quantity -= quantity
-        product.save()
+        # Stock and the movement row are written together by the ledger
+        try:
+            self.object = record_movement(form.save(commit=False))
+        except InsufficientStock as exc:
+            form.add_error('quantity', f"Not enough stock available. Current stock: {exc.available}")
+            return self.form_invalid(form)
 
-        # Call parent form_valid and add success message
         messages.success(
-            self.request, f"Stock Movement for '{product.name}' was successfully registered!"
+            self.request, f"Stock Movement for '{self.object.product.name}' was successfully registered!"
         )
-        return super().form_valid(form)
+        return HttpResponseRedirect(self.get_success_url())
     
 #-------------------------------------------------<> Sales Form <>-------------------------------------------------#
     
@@ -113,19 +158,19 @@ class SaleCreateView(LoginStaff, UserPassesTestMixin, CreateView):
         quantity = form.cleaned_data['quantity']
         sales_price = form.cleaned_data['sale_price']
         product = form.cleaned_data['product']
-    
-        # update product quantity based on sale quantity
-        if product.quantity >= quantity and quantity > 0:
-            if product.price < sales_price > 0:
-                product.quantity -= quantity
-                product.save()
-                return super().form_valid(form)
-            else:
-                # Add error for invalid quantity
-                form.add_error('sale_price', f'Price less than purchase: {product.price}')
-                return self.form_invalid(form)
-        # Add error for invalid quantity
-        form.add_error('quantity', f'Quantity not found, available is: {product.quantity}')
-        return self.form_invalid(form)
-    
-        
\ No newline at end of file
+
+        if quantity <= 0:
+            form.add_error('quantity', f'Quantity not found, available is: {product.quantity}')
+            return self.form_invalid(form)
+
+        if not product.price < sales_price > 0:
+            form.add_error('sale_price', f'Price less than purchase: {product.price}')
+            return self.form_invalid(form)
+
+        # update product quantity based on sale quantity, atomically with the sale row
+        try:
+            self.object = record_sale(form.save(commit=False))
+        except InsufficientStock as exc:
+            form.add_error('quantity', f'Quantity not found, available is: {exc.available}')
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
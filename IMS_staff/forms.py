@@ -1,6 +1,7 @@
 from django import forms
 from IMS_production.models import Product, Category,StockMovement,Sale
-from django.db.models import F
+from IMS_production.lookups import category_choices
+from IMS_production.widgets import AutocompleteSelect
 from django.core.exceptions import ValidationError
 
 class ProductForm(forms.ModelForm):
@@ -11,10 +12,12 @@ class ProductForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Customize the 'category' field to show options from the Category table
-        category = Category.objects.all()
+        category = Category.objects.filter(pending_deletion=False)
         self.fields['category'].queryset = category
         self.fields['category'].empty_label = "Select a category"
         self.fields['category'].label_from_instance = lambda obj: f"{obj.name}"
+        # Render the options from the cache; the submitted id is still checked against the queryset
+        self.fields['category'].choices = [('', self.fields['category'].empty_label), *category_choices()]
 
     def clean(self):
         cleaned_data = super().clean()
@@ -34,15 +37,17 @@ class StockMovForm(forms.ModelForm):
     class Meta:
         model = StockMovement
         fields = ['product', 'movement_type', 'quantity', 'reason']
+        widgets = {'product': AutocompleteSelect('autocomplete-products')}
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filter and annotate products for the dropdown
-        products = Product.objects.annotate(category_name=F('category__name')).order_by('-created_at', '-updated_at')
-        self.fields['product'].queryset = products
+        # Products are searched through the autocomplete endpoint; only the selected one is loaded
+        self.fields['product'].queryset = Product.objects.select_related('category').filter(
+            pending_deletion=False, category__pending_deletion=False
+        )
         self.fields['product'].empty_label = "Select a product"
 
-        self.fields['product'].label_from_instance = lambda obj: f"{obj.name} ({obj.category_name})"
+        self.fields['product'].label_from_instance = lambda obj: f"{obj.name} ({obj.category.name})"
 
         # # Apply Bootstrap classes
         # self.fields['product'].widget.attrs.update({'class': 'form-select'})
@@ -72,15 +77,33 @@ class SalesForm(forms.ModelForm):
     class Meta:
         model = Sale
         fields = ('product', 'quantity', 'sale_price', 'total_revenue', 'sale_date')
+        widgets = {'product': AutocompleteSelect('autocomplete-products')}
         
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Filter and annotate products for the dropdown
-        products = Product.objects.select_related('category').annotate(category_name=F('category__name')).order_by('-created_at', '-updated_at')
-        self.fields['product'].queryset = products
+        # Products are searched through the autocomplete endpoint; only the selected one is loaded
+        self.fields['product'].queryset = Product.objects.select_related('category').filter(
+            pending_deletion=False, category__pending_deletion=False
+        )
         self.fields['product'].empty_label = "Select a product"
-        self.fields['product'].label_from_instance = lambda obj: f"{obj.name} ({obj.category_name})"
+        self.fields['product'].label_from_instance = lambda obj: f"{obj.name} ({obj.category.name})"
     
         
 
 
+
+
+class CatalogImportForm(forms.Form):
+    ALLOWED_EXTENSIONS = ('.csv', '.xlsx', '.xlsm')
+
+    file = forms.FileField(
+        label="Catalog file",
+        help_text="CSV or XLSX with columns: name, category, price, quantity (optional: sku, description, category description)",
+    )
+    batch_size = forms.IntegerField(label="Batch size", required=False, min_value=100, max_value=10000, initial=1000)
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(self.ALLOWED_EXTENSIONS):
+            raise ValidationError("Upload a .csv or .xlsx file.")
+        return upload
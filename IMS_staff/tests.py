@@ -1,2 +1,79 @@
+from decimal import Decimal
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from IMS_production.models import Category, Product, Sale
 
 # Create your tests here.
+
+
+class ProductAutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user("clerk", "clerk@example.com", role="staff", password="pw")
+        food = Category.objects.create(name="Food", description="")
+        cls.rice = Product.objects.create(name="Rice", description="", category=food, price=Decimal("10.00"), quantity=5)
+        Product.objects.create(name="Beans", description="", category=food, price=Decimal("4.00"), quantity=5)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def test_endpoint_matches_name_and_sku_prefixes(self):
+        url = reverse('autocomplete-products')
+        results = self.client.get(url, {'q': 'ri'}).json()['results']
+        self.assertEqual([(row['id'], row['text']) for row in results], [(self.rice.pk, "Rice (Food)")])
+        results = self.client.get(url, {'q': self.rice.sku[:6]}).json()['results']
+        self.assertIn(self.rice.pk, [row['id'] for row in results])
+        self.assertEqual(self.client.get(url, {'q': ' '}).json()['results'], [])
+
+    def test_form_renders_only_the_selected_product(self):
+        response = self.client.get(reverse('staff-add-sale'))
+        self.assertContains(response, 'data-autocomplete-url="%s"' % reverse('autocomplete-products'))
+        self.assertNotContains(response, "Rice (Food)")
+        self.assertNotContains(response, "Beans (Food)")
+
+        response = self.client.post(reverse('staff-add-sale'), {
+            'product': self.rice.pk, 'quantity': 2, 'sale_price': "12.00",
+            'total_revenue': "24.00", 'sale_date': "2025-03-05",
+        })
+        self.assertRedirects(response, reverse('staff-sales'), fetch_redirect_response=False)
+        self.assertEqual(Sale.objects.get().product, self.rice)
+
+    def test_invalid_post_keeps_the_chosen_product(self):
+        response = self.client.post(reverse('staff-add-sale'), {
+            'product': self.rice.pk, 'quantity': 2, 'sale_price': "1.00",
+            'total_revenue': "2.00", 'sale_date': "2025-03-05",
+        })
+        self.assertContains(response, "Rice (Food)")
+        self.assertNotContains(response, "Beans (Food)")
+
+
+class ProductImportStatusTests(TestCase):
+    def setUp(self):
+        self.staff = get_user_model().objects.create_user("clerk", "clerk@example.com", role="staff", password="pw")
+        self.client.force_login(self.staff)
+
+    @patch('IMS_staff.converter.AsyncResult')
+    @patch('IMS_staff.converter.default_storage')
+    @patch('IMS_staff.converter.import_catalog')
+    def test_only_the_user_who_started_an_import_can_poll_it(self, import_catalog, storage, async_result):
+        storage.save.return_value = "imports/catalog.csv"
+        import_catalog.delay.return_value.id = "task-1"
+        async_result.return_value.configure_mock(state='PROGRESS', info={'processed': 10})
+        async_result.return_value.failed.return_value = False
+        upload = SimpleUploadedFile("catalog.csv", b"name,category,price\n")
+        response = self.client.post(reverse('staff-import-product'), {'file': upload})
+        self.assertRedirects(response, f"{reverse('staff-import-product')}?task=task-1", fetch_redirect_response=False)
+
+        status = lambda task_id: self.client.get(reverse('staff-import-product-status', args=[task_id])).status_code
+        self.assertEqual(status("task-1"), 200)
+        async_result.assert_called_once_with("task-1")
+        self.assertEqual(status("task-2"), 404)
+
+        other = get_user_model().objects.create_user("clerk2", "clerk2@example.com", role="staff", password="pw")
+        self.client.force_login(other)
+        self.assertEqual(status("task-1"), 404)
@@ -6,7 +6,9 @@ from .converter import (
     CategoryCreateView,
     ProductCreateView,
     StockMovCreateView,
-    SaleCreateView
+    SaleCreateView,
+    ProductImportView,
+    ProductImportStatusView,
 )
 
 urlpatterns = [
@@ -26,4 +28,6 @@ urlpatterns +=[
     path('add-product/', ProductCreateView.as_view(), name='staff-create-product'),
     path('add-stock-movement/', StockMovCreateView.as_view(), name='staff-add-stock-movement'),
     path('add-sale/', SaleCreateView.as_view(), name='staff-add-sale'),
+    path('import-products/', ProductImportView.as_view(), name='staff-import-product'),
+    path('import-products/<str:task_id>/status/', ProductImportStatusView.as_view(), name='staff-import-product-status'),
 ]
\ No newline at end of file
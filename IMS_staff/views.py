@@ -3,12 +3,18 @@ from django.views import View
 from django.views.generic import TemplateView, ListView
 from permission.login import LoginStaff, LoginAuth
 from IMS_production.models import Product, Category, Sale, SalesSummary, StockMovement
+from IMS_production.cache import CATEGORIES, PRODUCTS, SALES, STOCK_MOVEMENTS
+from IMS_production.deletion import exclude_pending
+from IMS_production.mixins import (
+    CachedPageMixin, ConditionalGetMixin, ExportMixin, KeysetPaginationMixin, ReplicaReadMixin,
+)
+from IMS_production.search import (
+    CATEGORY_SEARCH, PRODUCT_SEARCH, SALE_SEARCH, SALES_SUMMARY_SEARCH, STOCK_MOVEMENT_SEARCH, QuerySyntaxError,
+)
 from django.urls import reverse_lazy
 from django.contrib.auth import get_user_model
 from django.contrib.auth import logout
 from django.contrib import messages
-from django.db.models import Q
-from django.utils.dateparse import parse_date
 
 User = get_user_model()
 
@@ -20,49 +26,45 @@ class StaffDashboardView(LoginStaff, TemplateView):
     success_url  = reverse_lazy('login')
     
 
-class ProductView(LoginStaff, ListView):
+class ProductView(LoginStaff, ReplicaReadMixin, ExportMixin, ConditionalGetMixin, CachedPageMixin, KeysetPaginationMixin, ListView):
     model = Product
+    page_cache_namespaces = (PRODUCTS,)
+    search_syntax = PRODUCT_SEARCH
     template_name = 'staff/product.html'
     context_object_name = 'products'
     success_url  = reverse_lazy('login')
     
     
     def get_queryset(self):
-        queryset = super().get_queryset().select_related('category')
+        queryset = exclude_pending(super().get_queryset()).select_related('category')
         
         # Get the search query from the GET parameters
         search_query = self.request.GET.get('q', '').strip()
 
         if search_query:
             try:
-                # Try parsing the search query as a date (YYYY-MM-DD)
-                search_date = parse_date(search_query)
-                if search_date:
-                    queryset = queryset.filter(Q(created_at=search_date) | Q(updated_at__date=search_date))
-                else:
-                    # Apply filters for other fields if not a valid date
-                    queryset = queryset.filter(
-                        Q(name__icontains=search_query) |
-                        Q(sku__icontains=search_query) |
-                        Q(category__name__icontains=search_query)
-                    )
-            except:
-                return messages.error(self.request, 'Invalid date you must enter date in YYYY-MM-DD format')
+                queryset = self.search_syntax.filter(queryset, search_query)
+            except QuerySyntaxError as error:
+                messages.error(self.request, str(error))
+                return queryset.none()
 
         return queryset
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        search_query = self.request.GET.get('q', '')
+        search_query = self.request.GET.get('q', '').strip()
         context['search_query'] = search_query
     
         # Add a message if the search query is empty
         if search_query == '':
-            context['placeholder'] = "Search product, sku, category or date created or updated.. (YYYY-MM-DD)..."
+            context['placeholder'] = "Search product, sku, category or date... e.g. qty<10 price:100..500 sku:ABC- created:2025-01"
     
         return context
     
-class CategoryView(LoginStaff, ListView):
+class CategoryView(LoginStaff, ReplicaReadMixin, ExportMixin, ConditionalGetMixin, CachedPageMixin, KeysetPaginationMixin, ListView):
     model = Category
+    page_cache_namespaces = (CATEGORIES,)
+    search_syntax = CATEGORY_SEARCH
+    conditional_field = 'created'
     template_name = 'staff/category.html'
     context_object_name = 'categories'
     success_url  = reverse_lazy('login')
@@ -71,11 +73,15 @@ class CategoryView(LoginStaff, ListView):
         queryset = super().get_queryset()
 
         # Get the search query from the GET parameters
-        search_query = self.request.GET.get('q', '')
+        search_query = self.request.GET.get('q', '').strip()
 
         if search_query:
-            # Filter users based on username, email, or role
-            queryset = queryset.filter(name__icontains=search_query)
+            try:
+                queryset = self.search_syntax.filter(queryset, search_query)
+            except QuerySyntaxError as error:
+                messages.error(self.request, str(error))
+                return queryset.none()
+
         return queryset
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -84,38 +90,30 @@ class CategoryView(LoginStaff, ListView):
     
         # Add a message if the search query is empty
         if search_query == '':
-            context['placeholder'] = "Search with category name...."
+            context['placeholder'] = "Search with category name or created:YYYY-MM-DD...."
     
         return context
     
-class SalesView(LoginStaff, ListView):
+class SalesView(LoginStaff, ReplicaReadMixin, ExportMixin, ConditionalGetMixin, CachedPageMixin, KeysetPaginationMixin, ListView):
     model = Sale
+    page_cache_namespaces = (SALES, PRODUCTS)
+    search_syntax = SALE_SEARCH
     template_name = 'staff/sales.html'
     context_object_name = 'sales'
     success_url  = reverse_lazy('login')
     
     def get_queryset(self):
-        queryset = super().get_queryset().select_related('product')
+        queryset = exclude_pending(super().get_queryset()).select_related('product')
         
         # Get the search query from the GET parameters
         search_query = self.request.GET.get('q', '').strip()
 
         if search_query:
             try:
-                # Try parsing the search query as a date (YYYY-MM-DD)
-                search_date = parse_date(search_query)
-                if search_date:
-                    queryset = queryset.filter(Q(created_at__date=search_date) | Q(sale_date=search_date))
-                else:
-                    # Apply filters for other fields if not a valid date
-                    queryset = queryset.filter(
-                        Q(product__name__icontains=search_query) |
-                        Q(quantity__icontains=search_query) |
-                        Q(sale_price__icontains=search_query) |
-                        Q(total_amount__icontains=search_query)
-                    )
-            except:
-                return messages.error(self.request, 'Invalid date you must enter date in YYYY-MM-DD format')
+                queryset = self.search_syntax.filter(queryset, search_query)
+            except QuerySyntaxError as error:
+                messages.error(self.request, str(error))
+                return queryset.none()
 
         return queryset
 
@@ -128,38 +126,33 @@ class SalesView(LoginStaff, ListView):
         
         # Add a placeholder for the search bar
         context['placeholder'] = (
-            "Search product, price, quantity, total, created_at or date registered (YYYY-MM-DD)..."
+            "Search product or date (YYYY-MM-DD)... e.g. qty>10 price:100..500 date:2025-01..2025-03 sku:ABC-"
         )
         
         return context
     
-class SalesSummaryView(LoginStaff, ListView):
+class SalesSummaryView(LoginStaff, ReplicaReadMixin, ExportMixin, ConditionalGetMixin, CachedPageMixin, KeysetPaginationMixin, ListView):
     model = SalesSummary
+    page_cache_namespaces = (SALES, PRODUCTS)
+    search_syntax = SALES_SUMMARY_SEARCH
+    keyset_fields = ('-id',)     # report_date moves on every upsert; the pk never does
+    conditional_field = 'report_date'
     template_name = 'staff/sales-summary.html'
     context_object_name = 'summaries'
     success_url  = reverse_lazy('login')
     
     def get_queryset(self):
-        queryset = super().get_queryset().select_related('product')
+        queryset = exclude_pending(super().get_queryset()).select_related('product')
         
         # Get the search query from the GET parameters
         search_query = self.request.GET.get('q', '').strip()
 
         if search_query:
             try:
-                # Try parsing the search query as a date (YYYY-MM-DD)
-                search_date = parse_date(search_query)
-                if search_date:
-                    queryset = queryset.filter(report_date__date=search_date)
-                else:
-                    # Apply filters for other fields if not a valid date
-                    queryset = queryset.filter(
-                        Q(product__name__icontains=search_query) |
-                        Q(total_sold__icontains=search_query) |
-                        Q(total_revenue__icontains=search_query)
-                    )
-            except:
-                return messages.error(self.request, 'Invalid date you must enter date in YYYY-MM-DD format')
+                queryset = self.search_syntax.filter(queryset, search_query)
+            except QuerySyntaxError as error:
+                messages.error(self.request, str(error))
+                return queryset.none()
 
         return queryset
 
@@ -172,37 +165,31 @@ class SalesSummaryView(LoginStaff, ListView):
         
         # Add a placeholder for the search bar
         context['placeholder'] = (
-            "Search product, total sold, revenue or report date (YYYY-MM-DD)..."
+            "Search product or period start (YYYY-MM-DD)... e.g. sold>10 revenue:1000.. period:week"
         )
         
         return context
     
-class StockMovementView(LoginStaff, ListView):
+class StockMovementView(LoginStaff, ReplicaReadMixin, ExportMixin, ConditionalGetMixin, CachedPageMixin, KeysetPaginationMixin, ListView):
     model = StockMovement
+    page_cache_namespaces = (STOCK_MOVEMENTS, PRODUCTS)
+    search_syntax = STOCK_MOVEMENT_SEARCH
     template_name = 'staff/stock-movement.html'
     context_object_name = 'movements'
     success_url  = reverse_lazy('login')
     
     def get_queryset(self):
-        queryset = super().get_queryset().select_related('product')
+        queryset = exclude_pending(super().get_queryset()).select_related('product')
 
         # Get the search query from the GET parameters
-        search_query = self.request.GET.get('q', '')
+        search_query = self.request.GET.get('q', '').strip()
         
         if search_query:
             try:
-                # Try parsing the search query as a date (YYYY-MM-DD)
-                search_date = parse_date(search_query)
-                if search_date:
-                    queryset = queryset.filter(created_at__date=search_date)
-                else:
-                    # Apply filters for other fields if not a valid date
-                    queryset = queryset.filter(Q(product_name__icontains=search_query) |
-                                       Q(movement_type=search_query) |
-                                       Q(quantity=search_query)
-                                       )
-            except:
-                return messages.error(self.request, 'Invalid date you must enter date in YYYY-MM-DD format')
+                queryset = self.search_syntax.filter(queryset, search_query)
+            except QuerySyntaxError as error:
+                messages.error(self.request, str(error))
+                return queryset.none()
 
         return queryset
     def get_context_data(self, **kwargs):
@@ -212,7 +199,7 @@ class StockMovementView(LoginStaff, ListView):
     
         # Add a message if the search query is empty
         if search_query == '':
-            context['placeholder'] = "Search product, type, quantity or date (YYYY-MM-DD)..."
+            context['placeholder'] = "Search product or date (YYYY-MM-DD)... e.g. type:addition qty>=5 sku:ABC-"
     
         return context
 
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Inventory_MS.settings')
@@ -13,3 +14,31 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
 
+# Database connection pools are per process and not fork-safe: the parent closes
+# its pool before the prefork children start, and each child drops any copy it
+# inherited and opens its own on first use.
+@worker_init.connect
+def close_db_pools(**kwargs):
+    from IMS_production.dbpool import close_pools
+    close_pools()
+
+
+@worker_process_init.connect
+def reset_db_pools(**kwargs):
+    from IMS_production.dbpool import forget_inherited_pools
+    forget_inherited_pools()
+
+
+# The WhatsApp client's HTTP connections follow the same rule: a prefork child
+# starts with an empty pool, and each process closes its own on the way out.
+@worker_process_init.connect
+def reset_http_clients(**kwargs):
+    from utils.whatsapp import CLIENT_POOL
+    CLIENT_POOL.forget()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_http_clients(**kwargs):
+    from utils.whatsapp import CLIENT_POOL
+    CLIENT_POOL.close()
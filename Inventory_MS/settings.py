@@ -11,7 +11,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+import copy
 import os
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -61,6 +63,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     #Custom apps
     'authentication',
@@ -97,6 +100,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'IMS_production.middleware.FragmentCacheStatsMiddleware',
+    'IMS_production.middleware.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'Inventory_MS.urls'
@@ -137,9 +142,47 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST', 'db'),  # Use 'db' when running in Docker
         'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,  # Check a connection before reusing it (pooled or persistent)
     }
 }
 
+# Connection pooling (psycopg 3 + psycopg_pool): every web and Celery worker process
+# keeps up to DB_POOL_MAX_SIZE connections open instead of connecting per request/task.
+# Set DB_POOL=false to fall back to persistent connections (CONN_MAX_AGE).
+if os.getenv('DB_POOL', 'true').lower() in ('1', 'true', 'yes'):
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),  # Seconds to wait for a free connection
+            'max_idle': 300,  # Close connections idle this long (seconds), down to min_size
+            'max_lifetime': 1800,  # Recycle connections after this long (seconds)
+            'name': 'default',
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('CONN_MAX_AGE', 60))
+
+# Read replica: with POSTGRES_REPLICA_HOST set, list pages and analytics (views
+# marked @use_replica / ReplicaReadMixin) read IMS_production and sms_tasks rows
+# from a streaming replica. A session is kept on the primary for
+# REPLICA_PIN_SECONDS after any write so it always sees its own changes.
+# Any second database works for local testing, e.g. two SQLite files.
+if os.getenv('POSTGRES_REPLICA_HOST'):
+    DATABASES['replica'] = copy.deepcopy(DATABASES['default'])
+    DATABASES['replica'].update({
+        'HOST': os.getenv('POSTGRES_REPLICA_HOST'),
+        'PORT': os.getenv('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    })
+    if 'pool' in DATABASES['replica'].get('OPTIONS', {}):
+        DATABASES['replica']['OPTIONS']['pool']['name'] = 'replica'
+
+DATABASE_ROUTERS = ['IMS_production.replica.ReplicaRouter']
+REPLICA_DATABASE = 'replica'
+REPLICA_APPS = ('IMS_production', 'sms_tasks')
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 15))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -200,6 +243,19 @@ LOGIN_URL = 'login'
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
 
+# Cache: the same Redis as the broker, in its own database
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL', 'redis://redis:6379/1'),
+        'TIMEOUT': 300,
+    }
+}
+PAGE_CACHE_TIMEOUT = 60  # Seconds a cached list page lives between invalidations
+LOOKUP_CACHE_TIMEOUT = 3600  # Seconds cached category choices and autocomplete results live between invalidations
+AUTOCOMPLETE_LIMIT = 20  # Suggestions returned per autocomplete request
+FRAGMENT_CACHE_TIMEOUT = 3600  # Seconds a rendered table or row fragment is kept
+
 
 # Task time limits
 CELERY_TASK_SOFT_TIME_LIMIT = 300  # 5 minutes soft limit
@@ -208,6 +264,66 @@ CELERY_TASK_TIME_LIMIT = 360  # 6 minutes hard limit
 # Message task configuration
 MESSAGE_TASK_BATCH_SIZE = 200  # Tasks to process per batch
 MESSAGE_TASK_RATE_LIMIT = None  # Set to "100/m" for 100 tasks per minute
+MESSAGE_ARCHIVE_AFTER_DAYS = int(os.getenv('MESSAGE_ARCHIVE_AFTER_DAYS', 30))  # Finished tasks older than this are archived
+MESSAGE_ARCHIVE_BATCH_SIZE = 500  # Tasks moved per transaction
+MESSAGE_ARCHIVE_MAX_BATCHES = 200  # Batches per archive_finished_tasks run
+MESSAGE_ARCHIVE_STORAGE = os.getenv('MESSAGE_ARCHIVE_STORAGE', 'table')  # 'table' (archive tables) or 'file' (NDJSON.gz in MEDIA_ROOT)
+
+# Catalog import configuration
+CATALOG_IMPORT_BATCH_SIZE = int(os.getenv('CATALOG_IMPORT_BATCH_SIZE', 1000))  # Products per bulk_create
+
+# Stock analytics configuration
+LOW_STOCK_THRESHOLD = int(os.getenv('LOW_STOCK_THRESHOLD', 10))  # Units at or below which a product counts as low stock
+ANALYTICS_CACHE_TIMEOUT = 300  # Seconds a cached analytics payload lives between invalidations
+
+# Reorder alert configuration
+VELOCITY_SHORT_WINDOW = 7  # Days in the short sales moving average
+VELOCITY_LONG_WINDOW = 28  # Days in the long sales moving average
+REORDER_LEAD_TIME_DAYS = int(os.getenv('REORDER_LEAD_TIME_DAYS', 7))  # Supplier lead time
+REORDER_SAFETY_DAYS = int(os.getenv('REORDER_SAFETY_DAYS', 3))  # Extra days of demand kept as safety stock
+STOCK_ALERT_CHANNEL = os.getenv('STOCK_ALERT_CHANNEL', 'sms')  # 'sms' or 'whatsapp'
+STOCK_ALERT_RECIPIENTS = [n for n in os.getenv('STOCK_ALERT_RECIPIENTS', '').split(',') if n]  # Defaults to admin phones
+
+# Stock snapshot configuration
+STOCK_SNAPSHOT_BATCH_SIZE = 5000  # Snapshot rows per bulk upsert
+
+# Background category/product deletion configuration
+DELETION_CHUNK_SIZE = int(os.getenv('DELETION_CHUNK_SIZE', 1000))  # Rows deleted per transaction
+DELETION_TIME_BUDGET = 240  # Seconds one cascade_delete run works before re-queueing itself (under CELERY_TASK_TIME_LIMIT)
+
+CELERY_BEAT_SCHEDULE = {
+    'send-stock-alerts': {
+        'task': 'IMS_production.tasks.send_stock_alerts',
+        'schedule': crontab(hour=7, minute=0),
+    },
+    'fold-stock-shards': {
+        'task': 'IMS_production.tasks.fold_stock_shards',
+        'schedule': 60.0,
+    },
+    'snapshot-stock': {
+        'task': 'IMS_production.tasks.snapshot_stock',
+        'schedule': crontab(hour=0, minute=5),
+    },
+    'create-partitions': {
+        'task': 'IMS_production.tasks.create_partitions',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    'archive-message-tasks': {
+        'task': 'sms_tasks.tasks.archive_finished_tasks',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'archive-cold-periods': {
+        'task': 'IMS_production.tasks.archive_cold_periods',
+        'schedule': crontab(day_of_month=2, hour=3, minute=0),
+    },
+}
+
+# Sale/StockMovement monthly partitions (PostgreSQL) kept ready this many months ahead
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+
+# Cold storage of old sales and stock movements (IMS_production.coldstore)
+COLD_ARCHIVE_AFTER_MONTHS = int(os.getenv('COLD_ARCHIVE_AFTER_MONTHS', 24))  # Months kept in the live tables
+COLD_ARCHIVE_DIR = 'archive/cold'  # Column files, under MEDIA_ROOT
 
 
 
@@ -239,6 +355,12 @@ WHATSAPP_DEFAULT_TIMEOUT = os.getenv("DEFAULT_TIMEOUT", 30.0)
 WHATSAPP_MAX_BATCH_SIZE = os.getenv("MAX_BATCH_SIZE", 100)
 WHATSAPP_MAX_TEXT_LENGTH = os.getenv("MAX_TEXT_LENGTH", 4096)
 
+# Per-process Graph API connection pool (utils.whatsapp.ClientPool); HTTP/2 needs httpx[http2]
+WHATSAPP_HTTP2 = os.getenv("WHATSAPP_HTTP2", "true").lower() in ("1", "true", "yes")
+WHATSAPP_MAX_CONNECTIONS = int(os.getenv("WHATSAPP_MAX_CONNECTIONS", 20))
+WHATSAPP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("WHATSAPP_MAX_KEEPALIVE_CONNECTIONS", 10))
+WHATSAPP_KEEPALIVE_EXPIRY = float(os.getenv("WHATSAPP_KEEPALIVE_EXPIRY", 30.0))  # Seconds an idle connection is kept
+
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
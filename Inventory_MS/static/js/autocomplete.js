@@ -0,0 +1,61 @@
+// Search box for <select data-autocomplete-url> (IMS_production.widgets.AutocompleteSelect).
+// The select starts with only the selected option; typing fetches matching rows
+// from the endpoint and replaces the other options.
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(function(select) {
+        const url = select.dataset.autocompleteUrl;
+        const search = document.createElement('input');
+        search.type = 'search';
+        search.className = 'form-control mb-1';
+        search.placeholder = 'Type a name or SKU...';
+        search.autocomplete = 'off';
+        select.parentNode.insertBefore(search, select);
+
+        let timer = null;
+        let latest = 0;
+
+        function render(results) {
+            const selected = select.value;
+            // Keep the empty option and the current choice, drop the previous results
+            Array.from(select.options).forEach(function(option) {
+                if (option.value && option.value !== selected) {
+                    option.remove();
+                }
+            });
+            results.forEach(function(row) {
+                if (String(row.id) === selected) {
+                    return;
+                }
+                select.add(new Option(row.text, row.id));
+            });
+            if (results.length && !selected) {
+                select.size = Math.min(results.length + 1, 8);
+            }
+        }
+
+        search.addEventListener('input', function() {
+            clearTimeout(timer);
+            const term = search.value.trim();
+            if (!term) {
+                render([]);
+                select.size = 0;
+                return;
+            }
+            timer = setTimeout(function() {
+                const request = ++latest;
+                fetch(url + '?q=' + encodeURIComponent(term), {credentials: 'same-origin'})
+                    .then(function(response) { return response.json(); })
+                    .then(function(data) {
+                        // Ignore answers to terms the user has already typed past
+                        if (request === latest) {
+                            render(data.results);
+                        }
+                    });
+            }, 200);
+        });
+
+        select.addEventListener('change', function() {
+            select.size = 0;
+        });
+    });
+});
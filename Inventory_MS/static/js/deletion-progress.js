@@ -0,0 +1,26 @@
+// Progress badge for rows being deleted in the background (IMS_production.deletion).
+// Each <span data-deletion-url> polls its job until it finishes, then the row goes.
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('[data-deletion-url]').forEach(function(badge) {
+        function render(job) {
+            if (job.status === 'done') {
+                badge.closest('tr').remove();
+                return true;
+            }
+            if (job.status === 'failed') {
+                badge.className = 'badge bg-danger';
+                badge.textContent = 'Deletion failed: ' + job.error;
+                return true;
+            }
+            badge.textContent = 'Deleting... ' + job.progress + '%';
+            return false;
+        }
+
+        function poll() {
+            fetch(badge.dataset.deletionUrl, {credentials: 'same-origin'})
+                .then(response => response.ok ? response.json() : null)
+                .then(job => { if (job && !render(job)) setTimeout(poll, 2000); });
+        }
+        poll();
+    });
+});
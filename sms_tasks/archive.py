@@ -0,0 +1,146 @@
+import gzip
+import io
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import FINISHED_STATUSES, ArchivedExecutionLog, ArchivedMessageTask, MessageTask, TaskExecutionLog
+
+# message_tasks only needs to hold what the scheduler and the dashboards
+# still work on. Tasks that finished (failed ones only once they have no
+# retries left) or were soft-deleted more than
+# MESSAGE_ARCHIVE_AFTER_DAYS ago are moved, with their execution logs, either
+# into the archive tables (default; the API reads them back with
+# ?include_archived=1) or into gzipped NDJSON files under MEDIA_ROOT
+# (MESSAGE_ARCHIVE_STORAGE = 'file'; one task per line with its logs, not
+# readable through the API).
+#
+# Each batch of MESSAGE_ARCHIVE_BATCH_SIZE tasks is copied and deleted in its
+# own transaction; rows are locked with SKIP LOCKED so a worker still
+# touching a task never waits on the archiver.
+
+MESSAGE_ARCHIVE_AFTER_DAYS = getattr(settings, "MESSAGE_ARCHIVE_AFTER_DAYS", 30)
+MESSAGE_ARCHIVE_BATCH_SIZE = getattr(settings, "MESSAGE_ARCHIVE_BATCH_SIZE", 500)
+MESSAGE_ARCHIVE_MAX_BATCHES = getattr(settings, "MESSAGE_ARCHIVE_MAX_BATCHES", 200)
+MESSAGE_ARCHIVE_STORAGE = getattr(settings, "MESSAGE_ARCHIVE_STORAGE", "table")
+MESSAGE_ARCHIVE_DIR = getattr(settings, "MESSAGE_ARCHIVE_DIR", "archive/message_tasks")
+
+TASK_COLUMNS = tuple(field.attname for field in MessageTask._meta.concrete_fields)
+LOG_COLUMNS = tuple(field.attname for field in TaskExecutionLog._meta.concrete_fields)
+
+
+def archivable(cutoff):
+    """Tasks finished for good (failures only once out of retries) or soft-deleted, and untouched since ``cutoff``."""
+    finished = Q(status__in=FINISHED_STATUSES) & ~Q(status='failed', retries__lt=F('max_retries'))
+    return MessageTask.objects.filter(finished | Q(is_deleted=True), updated_at__lt=cutoff)
+
+
+#---------------------------------------------<> Targets <>---------------------------------------------#
+
+def _to_tables(tasks, logs, archived_at):
+    ArchivedMessageTask.objects.bulk_create(ArchivedMessageTask(**row, archived_at=archived_at) for row in tasks)
+    ArchivedExecutionLog.objects.bulk_create(ArchivedExecutionLog(**row) for row in logs)
+
+
+def _to_file(tasks, logs, archived_at):
+    """Write the batch as one gzipped NDJSON file; returns its storage name."""
+    logs_by_task = {}
+    for row in logs:
+        logs_by_task.setdefault(row['task_id'], []).append(row)
+
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as stream:
+        for row in tasks:
+            record = {**row, 'archived_at': archived_at, 'execution_logs': logs_by_task.get(row['id'], [])}
+            stream.write(json.dumps(record, cls=DjangoJSONEncoder).encode() + b'\n')
+    name = f"{MESSAGE_ARCHIVE_DIR}/{archived_at:%Y/%m/%d}/{archived_at:%H%M%S}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+#---------------------------------------------<> Archiving <>---------------------------------------------#
+
+def archive_batch(cutoff, batch_size=MESSAGE_ARCHIVE_BATCH_SIZE, storage=MESSAGE_ARCHIVE_STORAGE):
+    """Move up to ``batch_size`` archivable tasks and their logs; the number of tasks moved."""
+    written = None
+    try:
+        with transaction.atomic():
+            ids = list(
+                archivable(cutoff).select_for_update(skip_locked=True).order_by()
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return 0
+            tasks = list(MessageTask.objects.filter(pk__in=ids).order_by().values(*TASK_COLUMNS))
+            logs = list(TaskExecutionLog.objects.filter(task_id__in=ids).order_by().values(*LOG_COLUMNS))
+
+            archived_at = timezone.now()
+            if storage == 'file':
+                written = _to_file(tasks, logs, archived_at)
+            else:
+                _to_tables(tasks, logs, archived_at)
+            TaskExecutionLog.objects.filter(task_id__in=ids).delete()
+            MessageTask.objects.filter(pk__in=ids).delete()
+    except Exception:
+        # The rows are still in message_tasks; don't leave a second copy on disk
+        if written:
+            default_storage.delete(written)
+        raise
+    return len(ids)
+
+
+def archive_message_tasks(older_than_days=None, batch_size=None, max_batches=None, storage=None):
+    """
+    Archive finished tasks older than ``older_than_days`` in batches.
+
+    Stops after ``max_batches`` batches so a large backlog is worked off over
+    several runs; returns ``{"archived": n, "batches": n, "more": bool}``.
+    """
+    days = MESSAGE_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or MESSAGE_ARCHIVE_BATCH_SIZE
+    max_batches = max_batches or MESSAGE_ARCHIVE_MAX_BATCHES
+    storage = storage or MESSAGE_ARCHIVE_STORAGE
+    if storage not in ('table', 'file'):
+        raise ValueError("storage must be 'table' or 'file'")
+
+    cutoff = timezone.now() - timedelta(days=days)
+    archived = batches = 0
+    while batches < max_batches:
+        moved = archive_batch(cutoff, batch_size, storage)
+        if moved:
+            archived, batches = archived + moved, batches + 1
+        if moved < batch_size:
+            return {"archived": archived, "batches": batches, "more": False}
+    return {"archived": archived, "batches": batches, "more": True}
+
+
+#---------------------------------------------<> Reading <>---------------------------------------------#
+
+# What the task list serializer reads; selected in the same order from both tables
+LIST_COLUMNS = (
+    'id', 'recipient', 'status', 'scheduled_time', 'created_at', 'updated_at', 'priority', 'retries', 'max_retries',
+)
+
+
+def with_archived(hot, archived):
+    """
+    ``hot`` (MessageTask) and ``archived`` (ArchivedMessageTask) rows as one queryset of MessageTask.
+
+    Both sides must already be filtered; the result can still be ordered,
+    counted and sliced but not filtered further.
+    """
+    return hot.order_by().only(*LIST_COLUMNS).union(archived.order_by().only(*LIST_COLUMNS), all=True)
+
+
+__all__ = (
+    "archivable",
+    "archive_batch",
+    "archive_message_tasks",
+    "with_archived",
+)
@@ -0,0 +1,157 @@
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from sms_tasks.models import MessageTask
+from sms_tasks.tasks import MESSAGE_TASK_BATCH_SIZE, due_tasks
+
+SEED_SQL = """
+INSERT INTO {table} (id, recipient, message_body, options, status, scheduled_time,
+                     created_at, updated_at, retries, max_retries, priority, is_deleted)
+SELECT gen_random_uuid(),
+       '+2507' || lpad((g % 100000000)::text, 8, '0'),
+       %(body)s,
+       '{{}}'::jsonb,
+       CASE WHEN g %% 100 < %(live)s THEN (ARRAY['pending', 'queued', 'retrying'])[1 + g %% 3]
+            WHEN g %% 100 < 97 THEN 'completed'
+            WHEN g %% 100 < 99 THEN 'failed'
+            ELSE 'cancelled' END,
+       now() + ((g %% 172800) - 86400) * interval '1 second',
+       now(), now(), 0, 3, g %% 10, g %% 1000 = 0
+FROM generate_series(%(start)s, %(stop)s) AS g
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed message_tasks with a mostly-finished backlog (10M rows by default), then time the "
+        "schedule_pending_tasks query and task inserts/status transitions against the current indexes. "
+        "Run it before and after `migrate sms_tasks 0001`/`migrate sms_tasks` to compare index sets; "
+        "pass --keep to reuse the seeded rows between runs."
+    )
+
+    BODY = 'benchmark_scheduler'
+    RECIPIENT = '+250799999999'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000)
+        parser.add_argument('--live-percent', type=int, default=2, help="Share of seeded rows in a live status")
+        parser.add_argument('--iterations', type=int, default=200, help="Scheduler queries to time")
+        parser.add_argument('--inserts', type=int, default=5000, help="Tasks to insert and walk through their statuses")
+        parser.add_argument('--keep', action='store_true', help="Leave the seeded rows in place")
+
+    def handle(self, *args, **options):
+        try:
+            self._seed(options['rows'], options['live_percent'])
+            self._explain()
+            self._scheduler(options['iterations'])
+            self._inserts(options['inserts'])
+        finally:
+            MessageTask.objects.filter(recipient=self.RECIPIENT, message_body=self.BODY).delete()
+            if not options['keep']:
+                self.stdout.write("Deleting the seeded rows...")
+                MessageTask.objects.filter(message_body=self.BODY).delete()
+
+    #---------------------------------------------<> Seed <>---------------------------------------------#
+
+    def _seed(self, rows, live_percent):
+        existing = MessageTask.objects.filter(message_body=self.BODY).count()
+        if existing >= rows:
+            self.stdout.write(f"Reusing {existing} seeded rows")
+            return
+
+        started = time.perf_counter()
+        chunk = 1_000_000
+        for start in range(existing + 1, rows + 1, chunk):
+            stop = min(start + chunk - 1, rows)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        SEED_SQL.format(table=MessageTask._meta.db_table),
+                        {'body': self.BODY, 'live': live_percent, 'start': start, 'stop': stop},
+                    )
+            else:
+                self._seed_orm(start, stop, live_percent)
+            self.stdout.write(f"  seeded {stop}/{rows}")
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f"VACUUM ANALYZE {MessageTask._meta.db_table}")
+            else:
+                cursor.execute(f"ANALYZE {MessageTask._meta.db_table}")
+        self.stdout.write(f"Seeded {rows - existing} rows in {time.perf_counter() - started:.1f}s")
+
+    def _seed_orm(self, start, stop, live_percent):
+        now = timezone.now()
+        live = ('pending', 'queued', 'retrying')
+        batch = []
+        for g in range(start, stop + 1):
+            if g % 100 < live_percent:
+                status = live[g % 3]
+            elif g % 100 < 97:
+                status = 'completed'
+            elif g % 100 < 99:
+                status = 'failed'
+            else:
+                status = 'cancelled'
+            batch.append(MessageTask(
+                recipient=f'+2507{g % 100000000:08d}', message_body=self.BODY, status=status,
+                scheduled_time=now + timezone.timedelta(seconds=(g % 172800) - 86400),
+                priority=g % 10, is_deleted=g % 1000 == 0,
+            ))
+            if len(batch) == 5000:
+                MessageTask.objects.bulk_create(batch)
+                batch = []
+        MessageTask.objects.bulk_create(batch)
+
+    #---------------------------------------------<> Cases <>---------------------------------------------#
+
+    def _explain(self):
+        with transaction.atomic():
+            plan = due_tasks(MESSAGE_TASK_BATCH_SIZE).explain()
+        self.stdout.write("Scheduler query plan:")
+        for line in plan.splitlines():
+            self.stdout.write(f"  {line}")
+
+    def _scheduler(self, iterations):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            with transaction.atomic():
+                list(due_tasks(MESSAGE_TASK_BATCH_SIZE))
+                transaction.set_rollback(True)  # leave the rows pending for the next run
+            timings.append((time.perf_counter() - started) * 1000)
+        self._report(f"scheduler query (batch {MESSAGE_TASK_BATCH_SIZE})", timings)
+
+    def _inserts(self, count):
+        now = timezone.now()
+        tasks = [
+            MessageTask(id=uuid.uuid4(), recipient=self.RECIPIENT, message_body=self.BODY, scheduled_time=now)
+            for _ in range(count)
+        ]
+
+        started = time.perf_counter()
+        for task in tasks:
+            task.save(force_insert=True)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"[insert] {count} tasks in {elapsed:.2f}s: {count / elapsed:.0f} rows/s")
+
+        # pending -> queued -> processing -> completed, as schedule_pending_tasks and send_whatsapp do
+        started = time.perf_counter()
+        for task in tasks:
+            task.status = MessageTask.Status.QUEUED
+            task.save(update_fields=['status', 'updated_at'])
+            task.mark_processing()
+            task.mark_completed()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"[transitions] {count * 3} updates in {elapsed:.2f}s: {count * 3 / elapsed:.0f} updates/s")
+
+    def _report(self, label, timings):
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f"[{label}] {len(timings)} runs: mean {statistics.mean(timings):.2f}ms, "
+            f"p50 {statistics.median(timings):.2f}ms, p95 {p95:.2f}ms"
+        )
@@ -0,0 +1,116 @@
+import asyncio
+import contextlib
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import httpx
+from django.core.management.base import BaseCommand
+from utils.whatsapp import ClientPool, Settings, WhatsAppClient
+
+REPLY = json.dumps({"messaging_product": "whatsapp", "messages": [{"id": "wamid.benchmark"}]}).encode()
+
+
+class GraphStandIn(BaseHTTPRequestHandler):
+    """Answers every POST like the Graph API's /messages, keeping the connection open."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True   # headers and body go out in two writes
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(REPLY)))
+        self.end_headers()
+        self.wfile.write(REPLY)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Send text messages to a local stand-in for the Graph API, first with a new httpx client per "
+        "message (a fresh TCP connection each time) and then through the shared ClientPool, and report "
+        "messages per second for each, sync and async. The stand-in speaks plain HTTP/1.1, so this "
+        "measures connection reuse only; against graph.facebook.com each new client also pays a TLS "
+        "handshake, which the pool saves as well."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=10, help="Async sends in flight at once")
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), GraphStandIn)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/v20.0"
+
+        stand_in = mock.patch.multiple(
+            Settings, GRAPH_API_URL=url, WHATSAPP_PHONE_ID='benchmark', WHATSAPP_TOKEN='benchmark',
+        )
+        # send() prints every response; keep the report readable
+        with stand_in, contextlib.redirect_stdout(io.StringIO()):
+            client = WhatsAppClient()
+            client.pool = ClientPool()
+            results = [
+                ("sync, new client per message", self._sync(self._unpooled(client), options)),
+                ("sync, pooled", self._sync(client.send, options)),
+                ("async, new client per message", asyncio.run(self._async(self._aunpooled(client), options))),
+                ("async, pooled", asyncio.run(self._async(client.asend, options, pool=client.pool))),
+            ]
+            client.pool.close()
+        server.shutdown()
+
+        for label, rate in results:
+            self.stdout.write(f"[{label}] {options['messages']} messages: {rate:.0f} msg/s")
+
+    #---------------------------------------------<> Senders <>---------------------------------------------#
+
+    def _payload(self, n):
+        return {"messaging_product": "whatsapp", "to": "+250700000000", "type": "text", "text": {"body": f"benchmark {n}"}}
+
+    def _unpooled(self, client):
+        # How WhatsAppClient.send worked before the pool
+        def send(payload):
+            with httpx.Client(timeout=Settings.DEFAULT_TIMEOUT) as http:
+                response = http.post(client.base_url, headers=client.headers, json=payload)
+                response.raise_for_status()
+                return response.json()
+        return send
+
+    def _aunpooled(self, client):
+        async def send(payload):
+            async with httpx.AsyncClient(timeout=Settings.DEFAULT_TIMEOUT) as http:
+                response = await http.post(client.base_url, headers=client.headers, json=payload)
+                response.raise_for_status()
+                return response.json()
+        return send
+
+    #---------------------------------------------<> Runners <>---------------------------------------------#
+
+    def _sync(self, send, options):
+        send(self._payload(0))      # warm-up
+        started = time.perf_counter()
+        for n in range(options['messages']):
+            send(self._payload(n))
+        return options['messages'] / (time.perf_counter() - started)
+
+    async def _async(self, send, options, pool=None):
+        limit = asyncio.Semaphore(options['concurrency'])
+
+        async def one(n):
+            async with limit:
+                await send(self._payload(n))
+
+        await one(0)                # warm-up
+        started = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in range(options['messages'])))
+        elapsed = time.perf_counter() - started
+        if pool is not None:
+            await pool.aclose()
+        return options['messages'] / elapsed
@@ -0,0 +1,122 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:30
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('django_celery_beat', '0019_alter_periodictasks_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageTask',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('recipient', models.CharField(db_index=True, max_length=20, validators=[django.core.validators.RegexValidator(message='Enter a valid phone number', regex='^\\+?1?\\d{9,15}$')])),
+                ('message_body', models.TextField(max_length=4096)),
+                ('options', models.JSONField(blank=True, default=dict, help_text='Advanced message options: type, template_name, media_id, buttons, etc.')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('retrying', 'Retrying'), ('cancelled', 'Cancelled')], db_index=True, default='pending', max_length=20)),
+                ('scheduled_time', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('retries', models.PositiveIntegerField(default=0)),
+                ('max_retries', models.PositiveIntegerField(default=3)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('celery_task_id', models.CharField(blank=True, db_index=True, max_length=255, null=True)),
+                ('priority', models.IntegerField(db_index=True, default=5)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Message Task',
+                'verbose_name_plural': 'Message Tasks',
+                'db_table': 'message_tasks',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SMSTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('phone_numbers', models.TextField(help_text='Comma-separated phone numbers for bulk SMS')),
+                ('message', models.TextField(max_length=1000)),
+                ('sender', models.CharField(default='System', max_length=100)),
+                ('send_type', models.CharField(choices=[('immediate', 'Immediate'), ('single', 'Single SMS'), ('bulk', 'Bulk SMS')], default='single', max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('success', 'Success'), ('failed', 'Failed'), ('disabled', 'Disabled')], default='pending', max_length=10)),
+                ('last_execution', models.DateTimeField(blank=True, null=True)),
+                ('execution_count', models.PositiveIntegerField(default=0)),
+                ('success_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('retry_count', models.PositiveIntegerField(default=3)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('periodic_task', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='django_celery_beat.periodictask')),
+            ],
+            options={
+                'db_table': 'sms_tasks',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskExecutionLog',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(max_length=20)),
+                ('timestamp', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('execution_time_ms', models.IntegerField(null=True)),
+                ('error_details', models.JSONField(blank=True, null=True)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='execution_logs', to='sms_tasks.messagetask')),
+            ],
+            options={
+                'verbose_name': 'Task Execution Log',
+                'verbose_name_plural': 'Task Execution Logs',
+                'db_table': 'task_execution_logs',
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='messagetask',
+            index=models.Index(fields=['status', 'scheduled_time', 'priority'], name='idx_scheduled_tasks'),
+        ),
+        migrations.AddIndex(
+            model_name='messagetask',
+            index=models.Index(fields=['status', 'updated_at'], name='idx_active_tasks'),
+        ),
+        migrations.AddIndex(
+            model_name='messagetask',
+            index=models.Index(fields=['recipient', '-created_at'], name='idx_recipient_history'),
+        ),
+        migrations.AddIndex(
+            model_name='smstask',
+            index=models.Index(fields=['status', 'is_active'], name='sms_tasks_status_15dde1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smstask',
+            index=models.Index(fields=['created_at'], name='sms_tasks_created_986312_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskexecutionlog',
+            index=models.Index(fields=['task', '-timestamp'], name='idx_task_logs'),
+        ),
+        migrations.AddIndex(
+            model_name='taskexecutionlog',
+            index=models.Index(fields=['status', '-timestamp'], name='idx_status_logs'),
+        ),
+    ]
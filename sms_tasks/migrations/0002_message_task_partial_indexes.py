@@ -0,0 +1,120 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:30
+
+import django.core.validators
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently as PostgresAddIndexConcurrently
+from django.contrib.postgres.operations import RemoveIndexConcurrently as PostgresRemoveIndexConcurrently
+from django.db import migrations, models
+
+# message_tasks is written to constantly by the scheduler and the workers, so
+# on PostgreSQL the indexes are built and dropped CONCURRENTLY (no write lock),
+# including the single-column ones that go with db_index on five fields.
+# The new indexes exist before the old ones go, so the scheduler is never left
+# without one. Other databases get the plain operations.
+
+
+class AddIndexConcurrently(PostgresAddIndexConcurrently):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class RemoveIndexConcurrently(PostgresRemoveIndexConcurrently):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return migrations.RemoveIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return migrations.RemoveIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class DropFieldIndexConcurrently(migrations.AlterField):
+    """AlterField that only turns db_index off; the index (and its "_like" twin) is dropped CONCURRENTLY."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        # Same lookup AlterField does, minus the indexes declared in Meta
+        meta_index_names = {index.name for index in model._meta.indexes}
+        column = model._meta.get_field(self.name).column
+        for name in schema_editor._constraint_names(model, [column], index=True, type_=models.Index.suffix, exclude=meta_index_names):
+            schema_editor.execute(schema_editor._delete_index_sql(model, name, concurrently=True))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        field = model._meta.get_field(self.name)
+        schema_editor.execute(schema_editor._create_index_sql(model, fields=[field], concurrently=True))
+        if field.db_type(schema_editor.connection).startswith('varchar'):
+            schema_editor.execute(schema_editor._create_index_sql(
+                model, fields=[field], suffix='_like', opclasses=['varchar_pattern_ops'], concurrently=True,
+            ))
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('sms_tasks', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='messagetask',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('status', 'pending')), fields=['priority', 'scheduled_time'], name='idx_due_tasks'),
+        ),
+        AddIndexConcurrently(
+            model_name='messagetask',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('status__in', ('pending', 'queued', 'retrying'))), fields=['status', 'scheduled_time'], name='idx_live_tasks'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='messagetask',
+            name='idx_scheduled_tasks',
+        ),
+        RemoveIndexConcurrently(
+            model_name='messagetask',
+            name='idx_active_tasks',
+        ),
+        DropFieldIndexConcurrently(
+            model_name='messagetask',
+            name='celery_task_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='messagetask',
+            name='is_deleted',
+            field=models.BooleanField(default=False),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='messagetask',
+            name='priority',
+            field=models.IntegerField(default=5),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='messagetask',
+            name='recipient',
+            field=models.CharField(max_length=20, validators=[django.core.validators.RegexValidator(message='Enter a valid phone number', regex='^\\+?1?\\d{9,15}$')]),
+        ),
+        DropFieldIndexConcurrently(
+            model_name='messagetask',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('retrying', 'Retrying'), ('cancelled', 'Cancelled')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.1.3 on 2026-10-17 06:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_tasks', '0002_message_task_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMessageTask',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('recipient', models.CharField(max_length=20)),
+                ('message_body', models.TextField(max_length=4096)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('retrying', 'Retrying'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('scheduled_time', models.DateTimeField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('retries', models.PositiveIntegerField(default=0)),
+                ('max_retries', models.PositiveIntegerField(default=3)),
+                ('error_message', models.TextField(blank=True, null=True)),
+                ('celery_task_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('priority', models.IntegerField(default=5)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(db_index=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Message Task',
+                'verbose_name_plural': 'Archived Message Tasks',
+                'db_table': 'message_tasks_archive',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedExecutionLog',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(max_length=20)),
+                ('timestamp', models.DateTimeField()),
+                ('execution_time_ms', models.IntegerField(null=True)),
+                ('error_details', models.JSONField(blank=True, null=True)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('task', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='execution_logs', to='sms_tasks.archivedmessagetask')),
+            ],
+            options={
+                'verbose_name': 'Archived Execution Log',
+                'verbose_name_plural': 'Archived Execution Logs',
+                'db_table': 'task_execution_logs_archive',
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedmessagetask',
+            index=models.Index(fields=['-created_at'], name='idx_archive_created'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmessagetask',
+            index=models.Index(fields=['recipient', '-created_at'], name='idx_archive_recipient_history'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedexecutionlog',
+            index=models.Index(fields=['task', '-timestamp'], name='idx_archive_task_logs'),
+        ),
+    ]
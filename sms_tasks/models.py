@@ -91,13 +91,17 @@ class SMSTask(models.Model):
 
 
 
+# Statuses a task can still be picked up from (see MessageTask's partial indexes)
+LIVE_STATUSES = ('pending', 'queued', 'retrying')
+
+
 class MessageTask(models.Model):
     """
     Core model for WhatsApp message scheduling and tracking.
     
     Design Decisions:
     - UUID primary key: Prevents enumeration attacks, supports distributed systems
-    - Indexed status field: Optimizes queries for task filtering
+    - Partial indexes on live statuses: Keep scheduler lookups small and status transitions cheap
     - Atomic status transitions: Ensures data consistency
     - Soft deletes: Maintains audit trail
     - Options JSONField: Supports template, media, interactive messages
@@ -128,7 +132,6 @@ class MessageTask(models.Model):
                 message='Enter a valid phone number'
             )
         ],
-        db_index=True  # Optimize recipient lookup queries
     )
     message_body = models.TextField(max_length=4096)
     
@@ -144,7 +147,6 @@ class MessageTask(models.Model):
         max_length=20,
         choices=Status.choices,
         default=Status.PENDING,
-        db_index=True  # Critical for filtering by status
     )
     
     # Timing fields
@@ -166,14 +168,13 @@ class MessageTask(models.Model):
         max_length=255, 
         blank=True, 
         null=True,
-        db_index=True  # Quick lookup by Celery task ID
     )
     
     # Priority queue support (lower number = higher priority)
-    priority = models.IntegerField(default=5, db_index=True)
+    priority = models.IntegerField(default=5)
     
     # Soft delete support
-    is_deleted = models.BooleanField(default=False, db_index=True)
+    is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
     
     # User tracking (optional - add if you need user association)
@@ -182,16 +183,22 @@ class MessageTask(models.Model):
     class Meta:
         db_table = 'message_tasks'
         ordering = ['-created_at']
+        # Most rows are finished tasks that the scheduler never looks at again,
+        # so its indexes only cover live, non-deleted rows. A status transition
+        # out of the live set drops the row from them instead of rewriting a
+        # handful of full-table indexes.
         indexes = [
-            # Composite index for scheduled task retrieval
+            # schedule_pending_tasks: pending, due, ORDER BY priority, scheduled_time
             models.Index(
-                fields=['status', 'scheduled_time', 'priority'],
-                name='idx_scheduled_tasks'
+                fields=['priority', 'scheduled_time'],
+                condition=models.Q(status='pending', is_deleted=False),
+                name='idx_due_tasks'
             ),
-            # Index for active task monitoring
+            # overdue() and live task monitoring
             models.Index(
-                fields=['status', 'updated_at'],
-                name='idx_active_tasks'
+                fields=['status', 'scheduled_time'],
+                condition=models.Q(status__in=LIVE_STATUSES, is_deleted=False),
+                name='idx_live_tasks'
             ),
             # Index for recipient history
             models.Index(
@@ -287,6 +294,87 @@ class TaskExecutionLog(models.Model):
         return f"Log {self.id} - Task {self.task.id} - {self.status}"
 
 
+# Statuses a task ends in. A failed task isn't over while retries < max_retries
+# (see MessageTask.can_retry), so sms_tasks.archive only moves failures that
+# have used up their retries; archived tasks can't be retried.
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class ArchivedMessageTask(models.Model):
+    """
+    A finished MessageTask moved out of the hot table by sms_tasks.archive.
+
+    Same columns in the same order as MessageTask (the API unions the two
+    tables for ``?include_archived=1``), plus when it was archived. The
+    timestamps are copied as they were, so none of them is automatic.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    recipient = models.CharField(max_length=20)
+    message_body = models.TextField(max_length=4096)
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=MessageTask.Status.choices)
+    scheduled_time = models.DateTimeField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    retries = models.PositiveIntegerField(default=0)
+    max_retries = models.PositiveIntegerField(default=3)
+    error_message = models.TextField(blank=True, null=True)
+    celery_task_id = models.CharField(max_length=255, blank=True, null=True)
+    priority = models.IntegerField(default=5)
+    is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        getattr(settings, "AUTH_USER_MODEL"), blank=True, null=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    archived_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'message_tasks_archive'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='idx_archive_created'),
+            models.Index(fields=['recipient', '-created_at'], name='idx_archive_recipient_history'),
+        ]
+        verbose_name = 'Archived Message Task'
+        verbose_name_plural = 'Archived Message Tasks'
+
+    def __str__(self):
+        return f"Archived MessageTask {self.id} - {self.recipient} ({self.status})"
+
+    def can_retry(self):
+        """Archived tasks are finished for good"""
+        return False
+
+    is_overdue = False
+    execution_duration = MessageTask.execution_duration
+
+
+class ArchivedExecutionLog(models.Model):
+    """TaskExecutionLog rows of an archived task, moved with it."""
+    id = models.UUIDField(primary_key=True, editable=False)
+    # db_index=False: idx_archive_task_logs leads with task
+    task = models.ForeignKey(ArchivedMessageTask, on_delete=models.CASCADE, related_name='execution_logs', db_index=False)
+    status = models.CharField(max_length=20)
+    timestamp = models.DateTimeField()
+    execution_time_ms = models.IntegerField(null=True)
+    error_details = models.JSONField(null=True, blank=True)
+    metadata = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        db_table = 'task_execution_logs_archive'
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['task', '-timestamp'], name='idx_archive_task_logs'),
+        ]
+        verbose_name = 'Archived Execution Log'
+        verbose_name_plural = 'Archived Execution Logs'
+
+    def __str__(self):
+        return f"Archived log {self.id} - Task {self.task_id} - {self.status}"
+
+
 class MessageTaskQuerySet(models.QuerySet):
     """Custom QuerySet for MessageTask with common filters"""
     
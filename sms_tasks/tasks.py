@@ -11,6 +11,7 @@ import traceback
 import httpx
 import logging
 import time
+from .archive import archive_message_tasks
 from .models import MessageTask, TaskExecutionLog
 
 from .services import WhatsAppService  # adapter (see whatsapp_service.py)
@@ -362,6 +363,15 @@ def send_whatsapp_payload(self: Task, payload: Dict[str, Any], context: Dict[str
 # ----------------------------
 # Scheduler: pick pending tasks and enqueue them (run by Celery Beat)
 # ----------------------------
+
+def due_tasks(limit):
+    """The next ``limit`` due pending tasks, locked for this transaction (the scheduler's query)."""
+    return (MessageTask.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=MessageTask.Status.PENDING, scheduled_time__lte=timezone.now(), is_deleted=False)
+            .order_by('priority', 'scheduled_time')[:limit])
+
+
 @shared_task(bind=True)
 def schedule_pending_tasks(self: Task) -> Dict[str, int]:
     """
@@ -369,17 +379,14 @@ def schedule_pending_tasks(self: Task) -> Dict[str, int]:
     - Uses select_for_update(skip_locked=True) to allow concurrent schedulers.
     - Batches to MESSAGE_TASK_BATCH_SIZE.
     """
-    now = timezone.now()
     batch_size = MESSAGE_TASK_BATCH_SIZE
     queued = 0
     candidates = []
 
     # Select and mark QUEUED in one transaction to avoid racing.
+    # The filter and ordering match the idx_due_tasks partial index.
     with transaction.atomic():
-        qs = (MessageTask.objects
-              .select_for_update(skip_locked=True)
-              .filter(status=MessageTask.Status.PENDING, scheduled_time__lte=now, is_deleted=False)
-              .order_by('priority', 'scheduled_time')[:batch_size])
+        qs = due_tasks(batch_size)
         candidates = list(qs)
         for t in candidates:
             t.status = MessageTask.Status.QUEUED
@@ -420,8 +427,19 @@ def cleanup_old_logs(days: int = 90, dry_run: bool = False) -> Dict[str, int]:
     logger.info("cleanup_old_logs: deleted %d logs", deleted)
     return {"deleted": deleted}
 
+# ----------------------------
+# Archive finished tasks (run by Celery Beat)
+# ----------------------------
+@shared_task(acks_late=True)
+def archive_finished_tasks(older_than_days: int = None, storage: str = None) -> Dict[str, Any]:
+    """Move old finished MessageTask rows and their logs out of the hot tables (sms_tasks.archive)."""
+    result = archive_message_tasks(older_than_days=older_than_days, storage=storage)
+    logger.info("archive_finished_tasks: archived %d tasks in %d batches", result["archived"], result["batches"])
+    return result
+
 
 __all__ = (
+    "archive_finished_tasks",
     "send_sms",
     "send_whatsapp",
     "send_whatsapp_payload",
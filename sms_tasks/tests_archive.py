@@ -0,0 +1,87 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .archive import archive_message_tasks
+from .models import ArchivedExecutionLog, ArchivedMessageTask, MessageTask, TaskExecutionLog
+
+# sms_tasks/tests.py is a pytest module; these run under `manage.py test`.
+
+TASKS = '/sms/whats/tasks/'
+
+
+class MessageArchiveTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("boss", "boss@example.com", role="admin", password="pw")
+        old = timezone.now() - timedelta(days=60)
+        self.tasks = {}
+        for name, status, retries in (
+            ('completed', 'completed', 0),
+            ('exhausted', 'failed', 3),
+            ('retryable', 'failed', 0),
+            ('pending', 'pending', 0),
+            ('recent', 'completed', 0),
+        ):
+            task = MessageTask.objects.create(
+                recipient=f"+2507880000{len(self.tasks):02d}", message_body=name, status=status,
+                retries=retries, max_retries=3, scheduled_time=old, created_by=self.user,
+            )
+            TaskExecutionLog.objects.create(task=task, status=status, execution_time_ms=5)
+            self.tasks[name] = task
+        MessageTask.objects.exclude(pk=self.tasks['recent'].pk).update(updated_at=old)
+        self.client.force_login(self.user)
+
+    def test_only_tasks_finished_for_good_move_to_the_archive_tables(self):
+        result = archive_message_tasks(batch_size=1)
+        self.assertEqual(result, {"archived": 2, "batches": 2, "more": False})
+
+        archived = {self.tasks['completed'].pk, self.tasks['exhausted'].pk}
+        self.assertEqual(set(ArchivedMessageTask.objects.values_list('pk', flat=True)), archived)
+        self.assertEqual(set(ArchivedExecutionLog.objects.values_list('task_id', flat=True)), archived)
+        self.assertFalse(MessageTask.objects.filter(pk__in=archived).exists())
+        # Still retryable, so still in the hot table
+        self.assertTrue(MessageTask.objects.get(pk=self.tasks['retryable'].pk).can_retry())
+        self.assertEqual(ArchivedMessageTask.objects.get(pk=self.tasks['completed'].pk).created_at, self.tasks['completed'].created_at)
+
+    def test_file_target_writes_tasks_with_their_logs(self):
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            self.assertEqual(archive_message_tasks(storage='file')['archived'], 2)
+            records = []
+            for root, _, files in os.walk(media):
+                for name in files:
+                    with gzip.open(os.path.join(root, name)) as stream:
+                        records += [json.loads(line) for line in stream]
+        self.assertEqual({record['message_body'] for record in records}, {'completed', 'exhausted'})
+        self.assertTrue(all(len(record['execution_logs']) == 1 for record in records))
+        self.assertFalse(ArchivedMessageTask.objects.exists())
+
+    def test_api_reads_the_archive_only_when_asked(self):
+        archive_message_tasks()
+        completed = self.tasks['completed']
+
+        self.assertEqual(self.client.get(TASKS).json()['count'], 3)
+        response = self.client.get(TASKS, {'include_archived': '1'})
+        self.assertEqual(response.json()['count'], 5)
+        failed = self.client.get(TASKS, {'include_archived': '1', 'status': 'failed'}).json()
+        self.assertEqual({row['id'] for row in failed['results']}, {str(self.tasks['exhausted'].pk), str(self.tasks['retryable'].pk)})
+
+        self.assertEqual(self.client.get(f'{TASKS}{completed.pk}/').status_code, 404)
+        detail = self.client.get(f'{TASKS}{completed.pk}/', {'include_archived': '1'})
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.json()['id'], str(completed.pk))
+
+    def test_union_list_etag_changes_with_either_table(self):
+        archive_message_tasks()
+        response = self.client.get(TASKS, {'include_archived': '1'})
+        etag = response['ETag']
+        again = self.client.get(TASKS, {'include_archived': '1'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        ArchivedMessageTask.objects.filter(pk=self.tasks['completed'].pk).delete()
+        changed = self.client.get(TASKS, {'include_archived': '1'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
@@ -5,21 +5,26 @@ from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.shortcuts import render,redirect
 from django.db.models import Q, Count, Avg, Sum
 from django.utils import timezone
 from .models import SMSTask
 from .forms import SMSTaskForm, SMSTaskFilterForm
 from permission.login import LoginAdmin
-from rest_framework import viewsets, status, filters
+from rest_framework import viewsets, status, filters, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import transaction
-from .models import MessageTask, TaskExecutionLog
+from django.utils.decorators import method_decorator
+from utils.http import not_modified, queryset_validators, set_validators, vary_etag
+from IMS_production.mixins import ReplicaReadMixin
+from IMS_production.replica import use_replica
+from .archive import with_archived
+from .models import ArchivedMessageTask, MessageTask, TaskExecutionLog
 from .serializers import (
     MessageTaskListSerializer,
     MessageTaskDetailSerializer,
@@ -40,7 +45,7 @@ class AdminRequiredMixin(LoginAdmin, UserPassesTestMixin):
         return is_admin(self.request.user)
 
 # Main Dashboard View
-class SMSTaskListView(AdminRequiredMixin, ListView):
+class SMSTaskListView(AdminRequiredMixin, ReplicaReadMixin, ListView):
     model = SMSTask
     template_name = 'sms_tasks/dashboard.html'
     context_object_name = 'tasks'
@@ -284,6 +289,7 @@ def bulk_actions(request):
 
 # Statistics and Analytics View
 @user_passes_test(is_admin)
+@use_replica
 def task_analytics(request):
     """Provide analytics data for dashboard charts"""
     from django.db.models import Count
@@ -337,7 +343,26 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class MessageTaskViewSet(viewsets.ModelViewSet):
+class ConditionalListMixin:
+    """
+    ETag/Last-Modified on ``list``: polling clients get a 304 before the page is
+    queried or serialized when nothing in the filtered queryset has changed.
+    """
+    conditional_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.list_validators(queryset)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def list_validators(self, queryset):
+        return queryset_validators(queryset, self.conditional_field, self.request.user.pk)
+
+
+class MessageTaskViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     Advanced task management with Celery, WebSocket notifications,
     and optional scheduled/recurring sending.
@@ -375,6 +400,44 @@ class MessageTaskViewSet(viewsets.ModelViewSet):
             queryset = queryset.prefetch_related('execution_logs')
         return queryset
 
+    @property
+    def include_archived(self):
+        """``?include_archived=1``: list and retrieve also read the archive tables (sms_tasks.archive)."""
+        return self.request.query_params.get('include_archived') in ('1', 'true', 'yes')
+
+    def filter_queryset(self, queryset):
+        if self.action != 'list' or not self.include_archived:
+            return super().filter_queryset(queryset)
+        # Filter each table on its own, then order the union
+        hot, archived = queryset, ArchivedMessageTask.objects.filter(is_deleted=False)
+        for backend in self.filter_backends:
+            if backend is not filters.OrderingFilter:
+                hot = backend().filter_queryset(self.request, hot, self)
+                archived = backend().filter_queryset(self.request, archived, self)
+        self.archive_sides = (hot, archived)
+        return filters.OrderingFilter().filter_queryset(self.request, with_archived(hot, archived), self)
+
+    def list_validators(self, queryset):
+        if not queryset.query.combinator:
+            return super().list_validators(queryset)
+        # Aggregates over the union aren't portable; combine each table's validators
+        (hot_etag, hot_modified), (archived_etag, archived_modified) = (
+            super(MessageTaskViewSet, self).list_validators(side) for side in self.archive_sides
+        )
+        return vary_etag(hot_etag, archived_etag), max(filter(None, (hot_modified, archived_modified)), default=None)
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if self.action != 'retrieve' or not self.include_archived:
+                raise
+        task = generics.get_object_or_404(
+            ArchivedMessageTask.objects.prefetch_related('execution_logs'), pk=self.kwargs['pk']
+        )
+        self.check_object_permissions(self.request, task)
+        return task
+
     # -------------------------------------------------------------------------
     # 🧩 Helper methods
     # -------------------------------------------------------------------------
@@ -527,6 +590,7 @@ class MessageTaskViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Failed to enqueue task'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     @action(detail=False, methods=['get'])
+    @method_decorator(use_replica)
     def statistics(self, request):
         """Get dashboard statistics."""
         queryset = self.filter_queryset(self.get_queryset())
@@ -568,7 +632,7 @@ class MessageTaskViewSet(viewsets.ModelViewSet):
 
 
 
-class TaskExecutionLogViewSet(viewsets.ReadOnlyModelViewSet):
+class TaskExecutionLogViewSet(ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only ViewSet for execution logs.
     
@@ -579,6 +643,7 @@ class TaskExecutionLogViewSet(viewsets.ReadOnlyModelViewSet):
     
     queryset = TaskExecutionLog.objects.all()
     serializer_class = TaskExecutionLogSerializer
+    conditional_field = 'timestamp'     # logs are append-only
     permission_classes = [IsAuthenticated]
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
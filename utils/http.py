@@ -0,0 +1,59 @@
+"""
+Conditional GET helpers shared by the HTML list views and the DRF viewsets.
+
+A listing's validators are derived from one aggregate over the filtered
+queryset, the newest change timestamp and the row count: an edit moves the
+timestamp, a delete moves the count. When the client's copy is current the
+view answers 304 before any row is fetched, rendered or serialized.
+"""
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def queryset_validators(queryset, timestamp_field, *salt):
+    """
+    ``(etag, last_modified)`` for ``queryset``.
+
+    ``salt`` is folded into the ETag for whatever else the representation
+    depends on (the user, a cache version...). The ETag is weak: the HTML
+    around the rows differs per request (CSRF token) without changing meaning.
+    """
+    state = queryset.order_by().aggregate(last_modified=Max(timestamp_field), count=Count('pk'))
+    last_modified = state['last_modified']
+    fingerprint = ':'.join(
+        str(part) for part in (state['count'], last_modified.isoformat() if last_modified else '', *salt)
+    )
+    etag = f'W/"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+    return etag, last_modified
+
+
+def vary_etag(etag, *salt):
+    """``etag`` re-hashed with ``salt``, for a representation that also depends on e.g. the user."""
+    fingerprint = ':'.join(str(part) for part in (etag, *salt))
+    return f'W/"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+
+
+def _timestamp(last_modified):
+    return timegm(last_modified.utctimetuple()) if last_modified else None
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response if the request's validators still match, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    """Attach the validators and make clients revalidate before reusing their copy."""
+    if response.status_code in (200, 304):
+        response.headers['ETag'] = etag
+        if last_modified:
+            response.headers['Last-Modified'] = http_date(_timestamp(last_modified))
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -19,6 +19,8 @@ __all__ = (
     "ButtonBuilder",
     "MediaType",
     "WHATSAPP_CLIENT",
+    "CLIENT_POOL",
+    "ClientPool",
     "Settings",
     "MessageResponse",
     "MediaUploadResponse",
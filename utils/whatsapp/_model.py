@@ -1,6 +1,11 @@
 from .settings import Settings
+import asyncio
 import httpx
+import importlib.util
 import logging
+import os
+import threading
+import weakref
 from typing import Optional, Dict, Any
 from dataclasses import dataclass, field
 import hmac
@@ -88,11 +93,101 @@ class MediaUploadResponse:
 
 
 
+# -----------------------------
+# Connection pool
+# -----------------------------
+class ClientPool:
+    """
+    Long-lived httpx clients shared by every WhatsAppClient in the process.
+
+    Connections to the Graph API are kept alive between messages instead of
+    paying a TCP+TLS handshake per send, and multiplexed over HTTP/2 when the
+    ``h2`` package is installed (``httpx[http2]``). The sync client is shared
+    by all threads; an AsyncClient is bound to its event loop, so there is one
+    per running loop.
+
+    A forked child (Celery prefork, gunicorn) must not use the parent's
+    sockets: the pool notices the new pid and starts over without closing
+    what it inherited.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._client: Optional[httpx.Client] = None
+        self._async_clients = weakref.WeakKeyDictionary()   # event loop -> AsyncClient
+
+    def _options(self) -> dict:
+        http2 = Settings.HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("WHATSAPP_HTTP2 is set but the 'h2' package is missing; using HTTP/1.1")
+            http2 = False
+        return {
+            "http2": http2,
+            "timeout": Settings.DEFAULT_TIMEOUT,
+            "limits": httpx.Limits(
+                max_connections=Settings.MAX_CONNECTIONS,
+                max_keepalive_connections=Settings.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=Settings.KEEPALIVE_EXPIRY,
+            ),
+        }
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self.forget()
+
+    def client(self) -> httpx.Client:
+        """The process' sync client, opened on first use."""
+        self._check_pid()
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._options())
+        return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """The AsyncClient of the running event loop, opened on first use."""
+        self._check_pid()
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(**self._options())
+        return client
+
+    def forget(self) -> None:
+        """Drop the clients without closing them (their sockets belong to the parent process)."""
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def close(self) -> None:
+        """Close the sync client and the async ones whose loop is idle; the next send opens new ones."""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+        for loop, async_client in list(self._async_clients.items()):
+            if not loop.is_closed() and not loop.is_running():
+                loop.run_until_complete(async_client.aclose())
+        self._async_clients.clear()
+
+    async def aclose(self) -> None:
+        """Close the running loop's AsyncClient."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+CLIENT_POOL = ClientPool()
+
+
 # -----------------------------
 # WhatsApp API Client
 # -----------------------------
 class WhatsAppClient:
     """Enhanced WhatsApp Cloud API client with utilities."""
+    pool: ClientPool = CLIENT_POOL
 
     def __init__(self):
         self.base_url = f"{Settings.GRAPH_API_URL}/{Settings.WHATSAPP_PHONE_ID}/messages"
@@ -103,16 +198,15 @@ class WhatsAppClient:
     def send(self, payload: dict) -> MessageResponse:
         """Synchronous message send with structured response."""
         try:
-            with httpx.Client(timeout=Settings.DEFAULT_TIMEOUT) as client:
-                response = client.post(self.base_url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                success_res = MessageResponse.from_api_response(response.json())
-                print(success_res)
-                
-                if success_res.success:
-                    print(f"Message sent successfully: {success_res.message_id}")
-                
-                return success_res
+            response = self.pool.client().post(self.base_url, headers=self.headers, json=payload)
+            response.raise_for_status()
+            success_res = MessageResponse.from_api_response(response.json())
+            print(success_res)
+            
+            if success_res.success:
+                print(f"Message sent successfully: {success_res.message_id}")
+            
+            return success_res
             
         except httpx.HTTPStatusError as exc:
             logger.error(f"HTTP error: {exc.response.status_code} - {exc.response.text}")
@@ -129,12 +223,11 @@ class WhatsAppClient:
     async def asend(self, payload: dict) -> MessageResponse:
         """Async message send with structured response."""
         try:
-            async with httpx.AsyncClient(timeout=Settings.DEFAULT_TIMEOUT) as client:
-                response = await client.post(self.base_url, headers=self.headers, json=payload)
-                response.raise_for_status()
-                success_res =  MessageResponse.from_api_response(response.json())
-                print(success_res)
-                return success_res
+            response = await self.pool.async_client().post(self.base_url, headers=self.headers, json=payload)
+            response.raise_for_status()
+            success_res =  MessageResponse.from_api_response(response.json())
+            print(success_res)
+            return success_res
             
         except httpx.HTTPStatusError as exc:
             logger.error(f"HTTP error: {exc.response.status_code} - {exc.response.text}")
@@ -157,14 +250,15 @@ class WhatsAppClient:
                 if mime_type is None:
                     return MediaUploadResponse(success=False, error_message="Could not determine MIME type")
 
-            with httpx.Client(timeout=60.0) as client:
-                with open(file_path, "rb") as f:
-                    files = {"file": (path.name, f, mime_type)}
-                    data = {"messaging_product": "whatsapp"}
-                    response = client.post(self.media_url, headers=self.headers, data=data, files=files)
-                    response.raise_for_status()
-                    result = response.json()
-                    return MediaUploadResponse(success=True, media_id=result.get("id"))
+            with open(file_path, "rb") as f:
+                files = {"file": (path.name, f, mime_type)}
+                data = {"messaging_product": "whatsapp"}
+                response = self.pool.client().post(
+                    self.media_url, headers=self.headers, data=data, files=files, timeout=Settings.MEDIA_TIMEOUT
+                )
+                response.raise_for_status()
+                result = response.json()
+                return MediaUploadResponse(success=True, media_id=result.get("id"))
         except Exception as exc:
             logger.error(f"Media upload error: {exc}", exc_info=True)
             return MediaUploadResponse(success=False, error_message=str(exc))
@@ -181,14 +275,15 @@ class WhatsAppClient:
                 if mime_type is None:
                     return MediaUploadResponse(success=False, error_message="Could not determine MIME type")
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                with open(file_path, "rb") as f:
-                    files = {"file": (path.name, f, mime_type)}
-                    data = {"messaging_product": "whatsapp"}
-                    response = await client.post(self.media_url, headers=self.headers, data=data, files=files)
-                    response.raise_for_status()
-                    result = response.json()
-                    return MediaUploadResponse(success=True, media_id=result.get("id"))
+            with open(file_path, "rb") as f:
+                files = {"file": (path.name, f, mime_type)}
+                data = {"messaging_product": "whatsapp"}
+                response = await self.pool.async_client().post(
+                    self.media_url, headers=self.headers, data=data, files=files, timeout=Settings.MEDIA_TIMEOUT
+                )
+                response.raise_for_status()
+                result = response.json()
+                return MediaUploadResponse(success=True, media_id=result.get("id"))
         except Exception as exc:
             logger.error(f"Media upload async error: {exc}", exc_info=True)
             return MediaUploadResponse(success=False, error_message=str(exc))
@@ -202,21 +297,20 @@ class WhatsAppClient:
         }
 
         try:
-            with httpx.Client(timeout=10.0) as client:
-                response = client.post(self.base_url, headers=self.headers, json=payload)
-                response.raise_for_status()
+            response = self.pool.client().post(self.base_url, headers=self.headers, json=payload, timeout=10.0)
+            response.raise_for_status()
 
-                # Parse API response safely
-                try:
-                    data = response.json()
-                except ValueError:
-                    data = {}
+            # Parse API response safely
+            try:
+                data = response.json()
+            except ValueError:
+                data = {}
 
-                logger.info(f"Message {message_id} marked as read")
-                return MessageResponse.from_success(
-                    message_id=message_id,
-                    raw_response=data or {"status_code": response.status_code}
-                )
+            logger.info(f"Message {message_id} marked as read")
+            return MessageResponse.from_success(
+                message_id=message_id,
+                raw_response=data or {"status_code": response.status_code}
+            )
 
         except httpx.HTTPStatusError as exc:
             # Graph API responded with an error status
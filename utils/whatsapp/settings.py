@@ -20,6 +20,12 @@ class Settings:
     DEFAULT_TIMEOUT: float = getattr(settings, "WHATSAPP_DEFAULT_TIMEOUT", 30.0)
     MAX_BATCH_SIZE: int = getattr(settings, "WHATSAPP_MAX_BATCH_SIZE", 100)
     MAX_TEXT_LENGTH: int = getattr(settings, "WHATSAPP_MAX_TEXT_LENGTH", 4096)
+    MEDIA_TIMEOUT: float = getattr(settings, "WHATSAPP_MEDIA_TIMEOUT", 60.0)
+    # Connection pool shared by every WhatsAppClient in the process
+    HTTP2: bool = getattr(settings, "WHATSAPP_HTTP2", True)
+    MAX_CONNECTIONS: int = getattr(settings, "WHATSAPP_MAX_CONNECTIONS", 20)
+    MAX_KEEPALIVE_CONNECTIONS: int = getattr(settings, "WHATSAPP_MAX_KEEPALIVE_CONNECTIONS", 10)
+    KEEPALIVE_EXPIRY: float = getattr(settings, "WHATSAPP_KEEPALIVE_EXPIRY", 30.0)
 
     @classmethod
     def headers(cls) -> dict:
@@ -8,7 +8,7 @@ or: python -m pytest test_whatsapp.py -v --cov=whatsapp_module
 from django.core.exceptions import ValidationError
 from _parameters import TemplateParameterBuilder, ButtonBuilder
 from .helpers import generate_whatsapp_options
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 import httpx
 import pytest
 import json
@@ -34,6 +34,7 @@ try:
         ButtonBuilder,
         MediaType,
         whatsapp_client,
+        CLIENT_POOL,
     )
 except ImportError:
     # If module not found, skip tests
@@ -57,6 +58,14 @@ def mock_env_vars(monkeypatch):
     Settings.WHATSAPP_BUSINESS_ID = "business_123"
 
 
+@pytest.fixture(autouse=True)
+def fresh_client_pool():
+    """Each test opens its own pooled clients, so httpx.Client patches take effect."""
+    CLIENT_POOL.forget()
+    yield
+    CLIENT_POOL.forget()
+
+
 @pytest.fixture
 def valid_phone():
     """Valid phone number for testing."""
@@ -200,7 +209,7 @@ class TestWhatsAppClient:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.json.return_value = mock_success_response
-        mock_client.return_value.__enter__.return_value.post.return_value = mock_response
+        mock_client.return_value.post.return_value = mock_response
         
         client = WhatsAppClient()
         payload = {"messaging_product": "whatsapp", "to": "+250788123456"}
@@ -215,7 +224,7 @@ class TestWhatsAppClient:
         mock_response = Mock()
         mock_response.status_code = 400
         mock_response.json.return_value = mock_error_response
-        mock_client.return_value.__enter__.return_value.post.return_value = mock_response
+        mock_client.return_value.post.return_value = mock_response
         
         client = WhatsAppClient()
         payload = {"messaging_product": "whatsapp"}
@@ -227,7 +236,7 @@ class TestWhatsAppClient:
     @patch('httpx.Client')
     def test_send_network_error(self, mock_client, mock_env_vars):
         """Test send with network error."""
-        mock_client.return_value.__enter__.return_value.post.side_effect = \
+        mock_client.return_value.post.side_effect = \
             httpx.RequestError("Network error")
         
         client = WhatsAppClient()
@@ -308,7 +317,7 @@ class TestWhatsAppClient:
         """Test marking message as read."""
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_client.return_value.__enter__.return_value.post.return_value = mock_response
+        mock_client.return_value.post.return_value = mock_response
         
         client = WhatsAppClient()
         result = client.mark_as_read("msg123")
@@ -318,7 +327,7 @@ class TestWhatsAppClient:
     @patch('httpx.Client')
     def test_mark_as_read_failure(self, mock_client, mock_env_vars):
         """Test marking message as read failure."""
-        mock_client.return_value.__enter__.return_value.post.side_effect = \
+        mock_client.return_value.post.side_effect = \
             Exception("Error")
         
         client = WhatsAppClient()
@@ -937,8 +946,8 @@ class TestAsyncOperations:
         mock_response.status_code = 200
         mock_response.json.return_value = mock_success_response
         
-        mock_async_client.return_value.__aenter__.return_value.post = \
-            Mock(return_value=mock_response)
+        mock_async_client.return_value.post = \
+            AsyncMock(return_value=mock_response)
         
         client = WhatsAppClient()
         payload = {"messaging_product": "whatsapp"}
@@ -954,8 +963,8 @@ class TestAsyncOperations:
         mock_response.status_code = 200
         mock_response.json.return_value = mock_success_response
         
-        mock_async_client.return_value.__aenter__.return_value.post = \
-            Mock(return_value=mock_response)
+        mock_async_client.return_value.post = \
+            AsyncMock(return_value=mock_response)
         
         msg = TextMessage(valid_phone, "Async test")
         response = await msg.send_direct_async()